@@ -0,0 +1,40 @@
+"""NotificationsUserCreatedAtIndex
+
+Revision ID: 5b8e2f1c9a3d
+Revises: 039420c446f1
+Create Date: 2026-10-18 10:12:41.118204
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5b8e2f1c9a3d"
+down_revision: Union[str, Sequence[str], None] = "039420c446f1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    # Built concurrently so the notifications table stays writable meanwhile.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_notifications_user_id_created_at_id",
+            "notifications",
+            ["user_id", sa.text("created_at DESC"), sa.text("id DESC")],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_notifications_user_id_created_at_id",
+            table_name="notifications",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
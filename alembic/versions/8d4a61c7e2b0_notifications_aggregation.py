@@ -0,0 +1,66 @@
+"""NotificationsAggregation
+
+Revision ID: 8d4a61c7e2b0
+Revises: 5b8e2f1c9a3d
+Create Date: 2026-10-18 12:03:17.402911
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8d4a61c7e2b0"
+down_revision: Union[str, Sequence[str], None] = "5b8e2f1c9a3d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    op.add_column(
+        "notifications", sa.Column("target", sa.String(length=255), nullable=True)
+    )
+    op.add_column(
+        "notifications",
+        sa.Column("aggregation_key", sa.String(length=300), nullable=True),
+    )
+    op.add_column(
+        "notifications",
+        sa.Column("actor_count", sa.Integer(), server_default="1", nullable=False),
+    )
+    op.add_column(
+        "notifications",
+        sa.Column(
+            "last_actors",
+            postgresql.ARRAY(sa.String(length=255)),
+            server_default="{}",
+            nullable=False,
+        ),
+    )
+    # Existing rows have no aggregation key, so the index starts empty.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ux_notifications_aggregation_key_created_at",
+            "notifications",
+            ["aggregation_key", "created_at"],
+            unique=True,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ux_notifications_aggregation_key_created_at",
+            table_name="notifications",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column("notifications", "last_actors")
+    op.drop_column("notifications", "actor_count")
+    op.drop_column("notifications", "aggregation_key")
+    op.drop_column("notifications", "target")
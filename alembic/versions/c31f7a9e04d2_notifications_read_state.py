@@ -0,0 +1,46 @@
+"""NotificationsReadState
+
+Revision ID: c31f7a9e04d2
+Revises: 8d4a61c7e2b0
+Create Date: 2026-10-18 13:21:45.870236
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c31f7a9e04d2"
+down_revision: Union[str, Sequence[str], None] = "8d4a61c7e2b0"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    # A constant default does not rewrite the table.
+    op.add_column(
+        "notifications",
+        sa.Column("is_read", sa.Boolean(), server_default=sa.false(), nullable=False),
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_notifications_user_id_unread",
+            "notifications",
+            ["user_id", sa.text("created_at DESC"), sa.text("id DESC")],
+            postgresql_where=sa.text("NOT is_read"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_notifications_user_id_unread",
+            table_name="notifications",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column("notifications", "is_read")
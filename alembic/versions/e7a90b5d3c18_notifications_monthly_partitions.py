@@ -0,0 +1,116 @@
+"""NotificationsMonthlyPartitions
+
+Revision ID: e7a90b5d3c18
+Revises: c31f7a9e04d2
+Create Date: 2026-10-18 14:40:09.315527
+
+"""
+from datetime import date, datetime
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+from settings import settings
+
+# revision identifiers, used by Alembic.
+revision: str = "e7a90b5d3c18"
+down_revision: Union[str, Sequence[str], None] = "c31f7a9e04d2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The maintenance job creates the same months, see `notifications.partitions`.
+MONTHS_AHEAD = settings.NOTIFICATIONS_PARTITIONS_AHEAD
+
+COLUMNS = (
+    "id, created_at, user_id, type, text, target, aggregation_key, actor_count, "
+    "last_actors, is_read"
+)
+
+INDEXES = (
+    "CREATE INDEX ix_notifications_user_id_created_at_id "
+    "ON notifications (user_id, created_at DESC, id DESC)",
+    "CREATE UNIQUE INDEX ux_notifications_aggregation_key_created_at "
+    "ON notifications (aggregation_key, created_at)",
+    "CREATE INDEX ix_notifications_user_id_unread "
+    "ON notifications (user_id, created_at DESC, id DESC) WHERE NOT is_read",
+)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def create_table(partitioned: bool):
+    op.execute(
+        f"""
+        CREATE TABLE notifications (
+            id integer NOT NULL DEFAULT nextval('notifications_id_seq'),
+            created_at {"timestamptz" if partitioned else "timestamp"} NOT NULL,
+            user_id integer NOT NULL
+                REFERENCES users (id) ON DELETE CASCADE,
+            type varchar(15) NOT NULL,
+            text varchar(255) NOT NULL,
+            target varchar(255),
+            aggregation_key varchar(300),
+            actor_count integer NOT NULL DEFAULT 1,
+            last_actors varchar(255)[] NOT NULL DEFAULT '{{}}',
+            is_read boolean NOT NULL DEFAULT false,
+            PRIMARY KEY ({"id, created_at" if partitioned else "id"})
+        ){" PARTITION BY RANGE (created_at)" if partitioned else ""}
+        """
+    )
+
+
+def replace_table(partitioned: bool):
+    op.execute("ALTER TABLE notifications RENAME TO notifications_old")
+    op.execute(
+        "ALTER TABLE notifications_old "
+        "RENAME CONSTRAINT notifications_pkey TO notifications_old_pkey"
+    )
+    for name in (
+        "ix_notifications_user_id_created_at_id",
+        "ux_notifications_aggregation_key_created_at",
+        "ix_notifications_user_id_unread",
+    ):
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+    op.execute("ALTER SEQUENCE notifications_id_seq OWNED BY NONE")
+
+    create_table(partitioned)
+    if partitioned:
+        oldest = op.get_bind().scalar(
+            sa.text("SELECT min(created_at) FROM notifications_old")
+        )
+        month = date.today().replace(day=1)
+        first = (oldest or datetime.now()).date().replace(day=1)
+        while first <= add_months(month, MONTHS_AHEAD):
+            op.execute(
+                f"CREATE TABLE notifications_p{first:%Y%m} PARTITION OF notifications "
+                f"FOR VALUES FROM ('{first}') TO ('{add_months(first, 1)}')"
+            )
+            first = add_months(first, 1)
+        op.execute(
+            "CREATE TABLE notifications_default PARTITION OF notifications DEFAULT"
+        )
+
+    op.execute(
+        f"INSERT INTO notifications ({COLUMNS}) "
+        f"SELECT {COLUMNS} FROM notifications_old"
+    )
+    op.execute("DROP TABLE notifications_old")
+    op.execute("ALTER SEQUENCE notifications_id_seq OWNED BY notifications.id")
+    for index in INDEXES:
+        op.execute(index)
+
+
+def upgrade():
+    # Rows are copied under an exclusive lock, plan a maintenance window for
+    # large tables. Later partitions are managed by `notifications.partitions`.
+    op.execute("LOCK TABLE notifications IN ACCESS EXCLUSIVE MODE")
+    replace_table(partitioned=True)
+
+
+def downgrade():
+    op.execute("LOCK TABLE notifications IN ACCESS EXCLUSIVE MODE")
+    replace_table(partitioned=False)
@@ -0,0 +1,54 @@
+"""NotificationsLastActivity
+
+Revision ID: f3b6d82a41c7
+Revises: e7a90b5d3c18
+Create Date: 2026-10-18 16:05:27.184402
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f3b6d82a41c7"
+down_revision: Union[str, Sequence[str], None] = "e7a90b5d3c18"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def create_list_indexes(column: str):
+    # Indexes of a partitioned table can not be built concurrently.
+    op.execute(
+        f"CREATE INDEX ix_notifications_user_id_{column}_id "
+        f"ON notifications (user_id, {column} DESC, id DESC)"
+    )
+    op.execute(
+        "CREATE INDEX ix_notifications_user_id_unread "
+        f"ON notifications (user_id, {column} DESC, id DESC) WHERE NOT is_read"
+    )
+
+
+def upgrade():
+    op.add_column(
+        "notifications",
+        sa.Column("last_activity_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.execute("UPDATE notifications SET last_activity_at = created_at")
+    op.alter_column(
+        "notifications",
+        "last_activity_at",
+        nullable=False,
+        server_default=sa.func.now(),
+    )
+    op.execute("DROP INDEX IF EXISTS ix_notifications_user_id_created_at_id")
+    op.execute("DROP INDEX IF EXISTS ix_notifications_user_id_unread")
+    create_list_indexes("last_activity_at")
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS ix_notifications_user_id_last_activity_at_id")
+    op.execute("DROP INDEX IF EXISTS ix_notifications_user_id_unread")
+    create_list_indexes("created_at")
+    op.drop_column("notifications", "last_activity_at")
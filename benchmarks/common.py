@@ -0,0 +1,37 @@
+"""Helpers shared by the benchmark scripts."""
+import uuid
+
+import httpx
+
+
+def percentile(samples: list[float], percent: float) -> float:
+    """Get a percentile of the samples.
+
+    Args:
+        samples: Sorted latency samples.
+        percent: Percentile in range 0..100.
+
+    Returns:
+        float: Percentile value.
+    """
+    if not samples:
+        return 0.0
+    index = min(len(samples) - 1, round(percent / 100 * (len(samples) - 1)))
+    return samples[index]
+
+
+async def get_access_token(client: httpx.AsyncClient) -> str:
+    """Register a throwaway user and return its access token.
+
+    Args:
+        client: HTTP client.
+
+    Returns:
+        str: Access token.
+    """
+    response = await client.post(
+        "/auth/register",
+        json={"username": f"bench-{uuid.uuid4().hex}", "password": "bench"},
+    )
+    response.raise_for_status()
+    return response.json()["access"]
@@ -0,0 +1,84 @@
+"""Measure notification list latency under concurrent load.
+
+Run it against a running service (for example the docker-compose stack) once
+on the branch before the change and once after, then compare the printed
+percentiles:
+
+    python benchmarks/concurrent_latency.py --url http://localhost:8081 \
+        --concurrency 50 --requests 2000
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+from common import get_access_token, percentile
+
+
+async def run(url: str, concurrency: int, total_requests: int) -> dict:
+    """Fire concurrent list requests and collect latencies.
+
+    Args:
+        url: Service base url.
+        concurrency: Number of in-flight requests.
+        total_requests: Total number of requests.
+
+    Returns:
+        dict: Latency report.
+    """
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        token = await get_access_token(client)
+        headers = {"Authorization": f"Bearer {token}"}
+        for _ in range(5):
+            await client.post(
+                "/notifications/",
+                json={"type": "like", "text": "benchmark"},
+                headers=headers,
+            )
+
+        latencies: list[float] = []
+        errors = 0
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def request_once() -> None:
+            nonlocal errors
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get("/notifications/", headers=headers)
+                latencies.append((time.perf_counter() - started) * 1000)
+                if response.status_code != 200:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(request_once() for _ in range(total_requests)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": total_requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "rps": round(total_requests / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "mean_ms": round(statistics.fmean(latencies), 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8081")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.url, args.concurrency, args.requests))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Import-time profile of the app, the cost paid by every process start.
+
+Runs `python -X importtime -c "import main"` in a fresh interpreter, which
+also shows what the gunicorn master saves the workers with GUNICORN_PRELOAD.
+Run from `src` so the settings find the .env file:
+
+    cd src && python ../benchmarks/import_time.py --top 30 --output ../import.json
+
+Run it on both branches and compare the JSON reports.
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+HEADER = "import time:"
+
+
+def parse_importtime(stderr: str) -> list[dict]:
+    """Parse the `-X importtime` output.
+
+    Args:
+        stderr: Standard error of the profiled interpreter.
+
+    Returns:
+        list[dict]: Module, self and cumulative microseconds of every import.
+    """
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith(HEADER) or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len(HEADER) :].split("|", 2)
+        imports.append(
+            {
+                "module": name.strip(),
+                "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+                "self_us": int(self_us),
+                "cumulative_us": int(cumulative_us),
+            }
+        )
+    return imports
+
+
+def profile(module: str, runs: int) -> dict:
+    """Import the module in fresh interpreters and keep the fastest run.
+
+    Args:
+        module: The imported module.
+        runs: Number of interpreters started.
+
+    Returns:
+        dict: Total time and the imports of the fastest run.
+    """
+    best = None
+    for _ in range(runs):
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True,
+            check=True,
+            text=True,
+        )
+        imports = parse_importtime(completed.stderr)
+        total = sum(item["cumulative_us"] for item in imports if item["depth"] == 0)
+        if best is None or total < best["total_us"]:
+            best = {"total_us": total, "imports": imports}
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument("--output", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    result = profile(args.module, args.runs)
+    imports = result["imports"]
+    report = {
+        "module": args.module,
+        "runs": args.runs,
+        "total_ms": round(result["total_us"] / 1000, 2),
+        "modules": len(imports),
+        "top_cumulative": [
+            {key: item[key] for key in ("module", "cumulative_us", "self_us")}
+            for item in sorted(imports, key=lambda item: -item["cumulative_us"])[
+                : args.top
+            ]
+        ],
+        "top_self": [
+            {key: item[key] for key in ("module", "self_us")}
+            for item in sorted(imports, key=lambda item: -item["self_us"])[: args.top]
+        ],
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as report_file:
+            report_file.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
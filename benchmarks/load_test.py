@@ -0,0 +1,358 @@
+"""Load test of the auth and notification flows with a read/write mix.
+
+Virtual users register, log in, refresh tokens, create, list and delete
+notifications. Without --url the app is driven in process through
+httpx.ASGITransport, which still needs the Postgres and Redis from the .env
+file. Run from `src` so the settings find it:
+
+    cd src && python ../benchmarks/load_test.py --concurrency 50 --users 200 \
+        --duration 60 --write-ratio 0.2 --output ../load-main.json
+
+Against the docker-compose stack:
+
+    python benchmarks/load_test.py --url http://localhost:8081
+
+Run it on both branches with the same arguments and compare the JSON reports.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+
+import httpx
+from common import percentile
+
+NOTIFICATION_TYPES = ("like", "comment", "repost")
+PASSWORD = "load-test"
+
+
+@dataclass
+class VirtualUser:
+    username: str
+    access: str = ""
+    refresh: str = ""
+    notification_ids: list[int] = field(default_factory=list)
+
+    @property
+    def headers(self) -> dict[str, str]:
+        return {"Authorization": f"Bearer {self.access}"}
+
+
+class Recorder:
+    def __init__(self):
+        """Initialize latency and error collection by route."""
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+
+    async def request(
+        self, client: httpx.AsyncClient, route: str, method: str, url: str, **kwargs
+    ) -> httpx.Response | None:
+        """Send a request and record its latency under the route label.
+
+        Args:
+            client: HTTP client.
+            route: Route label, e.g. `GET /notifications/`.
+            method: HTTP method.
+            url: Request url.
+            kwargs: Arguments of `httpx.AsyncClient.request`.
+
+        Returns:
+            httpx.Response | None: The response, None on transport errors.
+        """
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.errors[route] += 1
+            return None
+        self.latencies[route].append((time.perf_counter() - started) * 1000)
+        if response.status_code >= 400:
+            self.errors[route] += 1
+        return response
+
+    def report(self, elapsed: float) -> dict:
+        """Summarize the recorded requests.
+
+        Args:
+            elapsed: Duration of the measured phase in seconds.
+
+        Returns:
+            dict: Requests, errors, RPS and latency percentiles by route.
+        """
+        routes = {}
+        for route in sorted(set(self.latencies) | set(self.errors)):
+            samples = sorted(self.latencies[route])
+            routes[route] = {
+                "requests": len(samples),
+                "errors": self.errors[route],
+                "rps": round(len(samples) / elapsed, 2),
+                "p50_ms": round(percentile(samples, 50), 2),
+                "p95_ms": round(percentile(samples, 95), 2),
+                "p99_ms": round(percentile(samples, 99), 2),
+                "mean_ms": round(statistics.fmean(samples), 2) if samples else 0.0,
+            }
+        total = sum(route["requests"] for route in routes.values())
+        return {
+            "requests": total,
+            "errors": sum(self.errors.values()),
+            "rps": round(total / elapsed, 2),
+            "routes": routes,
+        }
+
+
+async def register(client: httpx.AsyncClient, recorder: Recorder) -> VirtualUser:
+    user = VirtualUser(username=f"load-{uuid.uuid4().hex}")
+    response = await recorder.request(
+        client,
+        "POST /auth/register",
+        "POST",
+        "/auth/register",
+        json={"username": user.username, "password": PASSWORD},
+    )
+    if response is not None and response.status_code == 200:
+        user.access = response.json()["access"]
+        user.refresh = response.json()["refresh"]
+    return user
+
+
+async def login(client: httpx.AsyncClient, recorder: Recorder, user: VirtualUser):
+    response = await recorder.request(
+        client,
+        "POST /auth/login",
+        "POST",
+        "/auth/login",
+        json={"username": user.username, "password": PASSWORD},
+    )
+    if response is not None and response.status_code == 200:
+        user.access = response.json()["access"]
+        user.refresh = response.json()["refresh"]
+
+
+async def refresh(client: httpx.AsyncClient, recorder: Recorder, user: VirtualUser):
+    response = await recorder.request(
+        client,
+        "POST /auth/refresh",
+        "POST",
+        "/auth/refresh",
+        headers={"Authorization": f"Bearer {user.refresh}"},
+    )
+    if response is not None and response.status_code == 200:
+        user.access = response.json()["access"]
+
+
+async def create_notification(
+    client: httpx.AsyncClient, recorder: Recorder, user: VirtualUser
+):
+    await recorder.request(
+        client,
+        "POST /notifications/",
+        "POST",
+        "/notifications/",
+        json={
+            "type": random.choice(NOTIFICATION_TYPES),
+            "text": f"load test {uuid.uuid4().hex[:8]}",
+        },
+        headers=user.headers,
+    )
+
+
+async def list_pages(
+    client: httpx.AsyncClient, recorder: Recorder, user: VirtualUser, pages: int
+):
+    cursor = None
+    for _ in range(pages):
+        params = {"cursor": cursor} if cursor else {}
+        response = await recorder.request(
+            client,
+            "GET /notifications/",
+            "GET",
+            "/notifications/",
+            params=params,
+            headers=user.headers,
+        )
+        if response is None or response.status_code != 200:
+            return
+        page = response.json()
+        user.notification_ids = [item["id"] for item in page["items"]]
+        cursor = page.get("next_cursor")
+        if not cursor:
+            return
+
+
+async def delete_notification(
+    client: httpx.AsyncClient, recorder: Recorder, user: VirtualUser
+):
+    if not user.notification_ids:
+        return
+    await recorder.request(
+        client,
+        "DELETE /notifications/",
+        "DELETE",
+        "/notifications/",
+        json={"id": user.notification_ids.pop()},
+        headers=user.headers,
+    )
+
+
+async def run_virtual_user(
+    client: httpx.AsyncClient,
+    recorder: Recorder,
+    population: list[VirtualUser],
+    deadline: float,
+    args: argparse.Namespace,
+) -> None:
+    """Run random flows of random users until the deadline.
+
+    Args:
+        client: HTTP client.
+        recorder: Latency recorder.
+        population: Registered users.
+        deadline: `time.perf_counter()` value to stop at.
+        args: Command line arguments.
+    """
+    while time.perf_counter() < deadline:
+        user = random.choice(population)
+        roll = random.random()
+        if roll < args.login_ratio:
+            await login(client, recorder, user)
+        elif roll < args.login_ratio + args.refresh_ratio:
+            await refresh(client, recorder, user)
+        elif random.random() < args.write_ratio:
+            if user.notification_ids and random.random() < args.delete_ratio:
+                await delete_notification(client, recorder, user)
+            else:
+                await create_notification(client, recorder, user)
+        else:
+            await list_pages(client, recorder, user, args.pages)
+
+
+@asynccontextmanager
+async def open_client(url: str | None, concurrency: int):
+    limits = httpx.Limits(max_connections=concurrency)
+    if url:
+        async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+            yield client
+        return
+
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+    from main import app  # noqa: WPS433
+
+    # ASGITransport does not send lifespan events, run the lifespan here.
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://load-test", timeout=60
+        ) as client:
+            yield client
+
+
+def get_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args: argparse.Namespace) -> dict:
+    """Register the population, seed notifications and run the mix.
+
+    Args:
+        args: Command line arguments.
+
+    Returns:
+        dict: The report.
+    """
+    random.seed(args.seed)
+    async with open_client(args.url, args.concurrency) as client:
+        setup = Recorder()
+        setup_started = time.perf_counter()
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def register_one() -> VirtualUser:
+            async with semaphore:
+                user = await register(client, setup)
+                for _ in range(args.seed_notifications):
+                    await create_notification(client, setup, user)
+                return user
+
+        population = [
+            user
+            for user in await asyncio.gather(
+                *(register_one() for _ in range(args.users))
+            )
+            if user.access
+        ]
+        if not population:
+            raise SystemExit("No user could register, is the service up?")
+        setup_elapsed = time.perf_counter() - setup_started
+
+        recorder = Recorder()
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(
+            *(
+                run_virtual_user(client, recorder, population, deadline, args)
+                for _ in range(args.concurrency)
+            )
+        )
+        elapsed = time.perf_counter() - started
+
+    return {
+        "revision": get_revision(),
+        "target": args.url or "in-process",
+        "config": {
+            "concurrency": args.concurrency,
+            "users": args.users,
+            "duration": args.duration,
+            "write_ratio": args.write_ratio,
+            "delete_ratio": args.delete_ratio,
+            "login_ratio": args.login_ratio,
+            "refresh_ratio": args.refresh_ratio,
+            "pages": args.pages,
+            "seed": args.seed,
+        },
+        "setup": setup.report(setup_elapsed),
+        **recorder.report(elapsed),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="Service base url, in process if omitted")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    parser.add_argument("--delete-ratio", type=float, default=0.3)
+    parser.add_argument("--login-ratio", type=float, default=0.01)
+    parser.add_argument("--refresh-ratio", type=float, default=0.02)
+    parser.add_argument("--pages", type=int, default=2)
+    parser.add_argument("--seed-notifications", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as report_file:
+            report_file.write(output)
+
+
+if __name__ == "__main__":
+    main()
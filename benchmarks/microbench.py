@@ -0,0 +1,366 @@
+"""Microbenchmarks of per-request hot paths with a regression check.
+
+Redis is replaced by fakeredis, repository benchmarks need the Postgres from
+the .env file and only run with --database. Run from `src`:
+
+    cd src && python ../benchmarks/microbench.py run --output ../bench-main.json
+    cd src && python ../benchmarks/microbench.py run --output ../bench-branch.json
+    python benchmarks/microbench.py compare bench-main.json bench-branch.json \
+        --threshold 10
+
+`compare` exits with 1 when the median of any benchmark grew by more than
+the threshold percentage.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import uuid
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import fakeredis  # noqa: E402
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+
+from notifications.models import Notification  # noqa: E402
+from notifications.repostiory import LIST_COLUMNS, NotificationRepository  # noqa: E402
+from notifications.schemas import (  # noqa: E402
+    NotificationPagginateSchema,
+    NotificationSchema,
+    notification_list_adapter,
+    notification_page_adapter,
+)
+from security import (  # noqa: E402
+    create_access_token,
+    decode_token,
+    encode_token,
+    get_password_hash,
+    get_token_data,
+    verify_password,
+)
+from services.authorization.authorization import token_whitelist_service  # noqa: E402
+from services.authorization.token_cache import verified_token_cache  # noqa: E402
+from services.hashing import password_hashing_service  # noqa: E402
+from services.redis import redis_service  # noqa: E402
+from users.models import User  # noqa: E402
+
+FORMAT_VERSION = 1
+
+
+def measure(call: Callable[[], None], rounds: int, min_time: float) -> dict:
+    """Time a synchronous call.
+
+    The number of calls per round is doubled until a round takes `min_time`,
+    the result is the median of `rounds` rounds of that size.
+
+    Args:
+        call: The benchmarked call.
+        rounds: Number of timed rounds.
+        min_time: Minimum duration of a round in seconds.
+
+    Returns:
+        dict: Median, minimum and standard deviation in microseconds per call.
+    """
+    number = 1
+    while timed_round(call, number) < min_time:
+        number *= 2
+    return summarize(
+        [timed_round(call, number) / number for _ in range(rounds)], number
+    )
+
+
+def timed_round(call: Callable[[], None], number: int) -> float:
+    started = time.perf_counter()
+    for _ in range(number):
+        call()
+    return time.perf_counter() - started
+
+
+async def measure_async(
+    call: Callable[[], Awaitable], rounds: int, min_time: float
+) -> dict:
+    """Time a coroutine function like `measure`.
+
+    Args:
+        call: Returns the benchmarked awaitable.
+        rounds: Number of timed rounds.
+        min_time: Minimum duration of a round in seconds.
+
+    Returns:
+        dict: Median, minimum and standard deviation in microseconds per call.
+    """
+
+    async def timed(number: int) -> float:
+        started = time.perf_counter()
+        for _ in range(number):
+            await call()
+        return time.perf_counter() - started
+
+    number = 1
+    while await timed(number) < min_time:
+        number *= 2
+    return summarize([await timed(number) / number for _ in range(rounds)], number)
+
+
+def summarize(samples: list[float], number: int) -> dict:
+    return {
+        "median_us": round(statistics.median(samples) * 1e6, 3),
+        "min_us": round(min(samples) * 1e6, 3),
+        "stdev_us": round(statistics.pstdev(samples) * 1e6, 3),
+        "calls_per_round": number,
+        "rounds": len(samples),
+    }
+
+
+def make_rows(count: int) -> list[Notification]:
+    now = datetime.now(timezone.utc)
+    return [
+        Notification(
+            id=index,
+            user_id=1,
+            type="like",
+            text=f"benchmark notification {index}",
+            created_at=now - timedelta(seconds=index),
+            target=f"post:{index}",
+            aggregation_key=None,
+            actor_count=1,
+            last_actors=["benchmark"],
+            is_read=False,
+        )
+        for index in range(count)
+    ]
+
+
+def make_list_rows(rows: list[Notification]) -> list:
+    names = [column.key for column in LIST_COLUMNS]
+    Row = namedtuple("Row", names)
+    return [Row(*(getattr(row, name) for name in names)) for row in rows]
+
+
+def encode_with_response_model(rows: list[Notification]) -> bytes:
+    # The list path before rows were selected as tuples: per-item validation,
+    # `response_model` validation of the page and `jsonable_encoder`.
+    page = NotificationPagginateSchema(
+        items=[NotificationSchema.model_validate(row) for row in rows],
+        total=len(rows),
+        next_cursor="benchmark",
+    )
+    page = NotificationPagginateSchema.model_validate(page.model_dump())
+    return json.dumps(jsonable_encoder(page)).encode()
+
+
+def encode_fast_path(rows: list) -> bytes:
+    return notification_page_adapter.dump_json(
+        NotificationPagginateSchema.model_construct(
+            items=notification_list_adapter.validate_python(rows, from_attributes=True),
+            total=len(rows),
+            pages=1,
+            current_page=1,
+            next_cursor="benchmark",
+        )
+    )
+
+
+async def bench_core(args: argparse.Namespace) -> dict:
+    results = {}
+    rounds, min_time = args.rounds, args.min_time
+
+    redis_service._redis = fakeredis.FakeAsyncRedis()
+    password_hashing_service.start()
+    try:
+        username = "benchmark"
+        results["security.encode_token"] = measure(
+            lambda: encode_token(username=username), rounds, min_time
+        )
+        results["security.create_access_token"] = await measure_async(
+            lambda: create_access_token(username=username), rounds, min_time
+        )
+        token = await create_access_token(username=username)
+        results["security.decode_token"] = measure(
+            lambda: decode_token(token), rounds, min_time
+        )
+
+        def uncached_token_data() -> None:
+            verified_token_cache.evict_user(username)
+            get_token_data(token)
+
+        results["security.get_token_data.uncached"] = measure(
+            uncached_token_data, rounds, min_time
+        )
+        get_token_data(token)
+        results["security.get_token_data.cached"] = measure(
+            lambda: get_token_data(token), rounds, min_time
+        )
+        results["token_whitelist.check_token_on_the_whitelist"] = await measure_async(
+            lambda: token_whitelist_service.check_token_on_the_whitelist(
+                token=token, username=username
+            ),
+            rounds,
+            min_time,
+        )
+
+        hashed = await get_password_hash("benchmark")
+        results["security.verify_password"] = await measure_async(
+            lambda: verify_password("benchmark", hashed), rounds, min_time
+        )
+    finally:
+        password_hashing_service.shutdown()
+        await redis_service._redis.aclose()
+        redis_service._redis = None
+
+    for size in (5, 50, 500):
+        rows = make_rows(size)
+        tuples = make_list_rows(rows)
+        results[f"schemas.notification_model_validate.{size}"] = measure(
+            lambda rows=rows: [NotificationSchema.model_validate(row) for row in rows],
+            rounds,
+            min_time,
+        )
+        results[f"schemas.notification_list_adapter.{size}"] = measure(
+            lambda tuples=tuples: notification_list_adapter.validate_python(
+                tuples, from_attributes=True
+            ),
+            rounds,
+            min_time,
+        )
+        page = NotificationPagginateSchema(
+            items=[NotificationSchema.model_validate(row) for row in rows],
+            total=size,
+            next_cursor="benchmark",
+        )
+        results[f"schemas.notification_page_dump_json.{size}"] = measure(
+            page.model_dump_json, rounds, min_time
+        )
+        results[f"list_response.response_model.{size}"] = measure(
+            lambda rows=rows: encode_with_response_model(rows), rounds, min_time
+        )
+        results[f"list_response.fast_path.{size}"] = measure(
+            lambda tuples=tuples: encode_fast_path(tuples), rounds, min_time
+        )
+    return results
+
+
+async def bench_repository(args: argparse.Namespace) -> dict:
+    from database import AsyncSessionLocal, dispose_async_engine  # noqa: WPS433
+
+    results = {}
+    rounds, min_time = args.rounds, args.min_time
+    redis_service._redis = fakeredis.FakeAsyncRedis()
+    async with AsyncSessionLocal() as db:
+        user = User(username=f"bench-{uuid.uuid4().hex}", password="benchmark")
+        db.add(user)
+        await db.commit()
+        repository = NotificationRepository(db=db)
+        await repository.add_many(
+            [
+                NotificationSchema(user_id=user.id, type="like", text=f"bench {index}")
+                for index in range(args.seed_rows)
+            ]
+        )
+        try:
+            results["repository.find_with_cursor"] = await measure_async(
+                lambda: repository.find_with_cursor(user_id=user.id, limit=50),
+                rounds,
+                min_time,
+            )
+            results["repository.find"] = await measure_async(
+                lambda: repository.find(user_id=user.id), rounds, min_time
+            )
+            results["repository.count.uncached"] = await measure_async(
+                lambda: uncached_count(repository, user.id), rounds, min_time
+            )
+        finally:
+            await db.delete(user)
+            await db.commit()
+    await redis_service._redis.aclose()
+    redis_service._redis = None
+    await dispose_async_engine()
+    return results
+
+
+async def uncached_count(repository, user_id: int) -> int:
+    await redis_service.delete(repository._counter.key(user_id))
+    return await repository.count(user_id=user_id)
+
+
+async def run(args: argparse.Namespace) -> dict:
+    results = await bench_core(args)
+    if args.database:
+        results.update(await bench_repository(args))
+    return {
+        "format": FORMAT_VERSION,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "benchmarks": dict(sorted(results.items())),
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> tuple[list, bool]:
+    """Compare the medians of two reports.
+
+    Args:
+        baseline: The stored report.
+        current: The new report.
+        threshold: Allowed slowdown in percent.
+
+    Returns:
+        tuple: Rows of name, baseline, current and change in percent, and
+            whether any benchmark regressed past the threshold.
+    """
+    rows, regressed = [], False
+    for name, result in sorted(current["benchmarks"].items()):
+        base = baseline["benchmarks"].get(name)
+        if base is None:
+            rows.append((name, None, result["median_us"], None))
+            continue
+        change = (result["median_us"] - base["median_us"]) / base["median_us"] * 100
+        regressed = regressed or change > threshold
+        rows.append((name, base["median_us"], result["median_us"], round(change, 2)))
+    return rows, regressed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run the benchmarks")
+    run_parser.add_argument("--rounds", type=int, default=7)
+    run_parser.add_argument("--min-time", type=float, default=0.05)
+    run_parser.add_argument("--database", action="store_true")
+    run_parser.add_argument("--seed-rows", type=int, default=1000)
+    run_parser.add_argument("--output", help="Also write the report to this file")
+
+    compare_parser = commands.add_parser("compare", help="Compare two reports")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=10.0)
+
+    args = parser.parse_args()
+    if args.command == "run":
+        report = json.dumps(asyncio.run(run(args)), indent=2, sort_keys=True)
+        print(report)
+        if args.output:
+            with open(args.output, "w") as report_file:
+                report_file.write(report + "\n")
+        return
+
+    with open(args.baseline) as baseline_file, open(args.current) as current_file:
+        rows, regressed = compare(
+            json.load(baseline_file), json.load(current_file), args.threshold
+        )
+    for name, base, current, change in rows:
+        change_text = "new" if change is None else f"{change:+.2f}%"
+        flag = " REGRESSION" if change is not None and change > args.threshold else ""
+        print(f"{name:55} {base or '-':>12} {current:>12} {change_text:>9}{flag}")
+    sys.exit(1 if regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""Compare notification ingest throughput of single and batch inserts.
+
+With NOTIFICATIONS_WRITE_BEHIND single inserts are answered with 202 before
+the rows are written, their time then runs until the ingest worker has
+written every row, as seen by GET /notifications/unread_count.
+
+    python benchmarks/notification_ingest.py --url http://localhost:8081 \
+        --items 5000 --concurrency 20 --batch-size 1000
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+from common import get_access_token
+
+POLL_INTERVAL = 0.05
+DRAIN_TIMEOUT = 300
+
+
+def make_items(count: int) -> list[dict]:
+    """Build notification payloads.
+
+    Args:
+        count: Number of payloads.
+
+    Returns:
+        list[dict]: Notification payloads.
+    """
+    return [{"type": "like", "text": f"benchmark {index}"} for index in range(count)]
+
+
+async def get_unread(client: httpx.AsyncClient, headers: dict) -> int:
+    """Get the number of unread notifications of the benchmark user.
+
+    Args:
+        client: HTTP client.
+        headers: Auth headers.
+
+    Returns:
+        int: Unread notifications.
+    """
+    response = await client.get("/notifications/unread_count", headers=headers)
+    response.raise_for_status()
+    return response.json()["unread"]
+
+
+async def wait_for_unread(
+    client: httpx.AsyncClient, headers: dict, expected: int, timeout: float
+) -> None:
+    """Wait until the ingest worker has written the enqueued notifications.
+
+    Args:
+        client: HTTP client.
+        headers: Auth headers.
+        expected: Unread notifications once every row is written.
+        timeout: Seconds to wait.
+
+    Raises:
+        TimeoutError: If the rows are not written in time.
+    """
+    deadline = time.perf_counter() + timeout
+    while await get_unread(client, headers) < expected:
+        if time.perf_counter() > deadline:
+            raise TimeoutError("The ingest worker did not drain the stream")
+        await asyncio.sleep(POLL_INTERVAL)
+
+
+async def single_inserts(
+    client: httpx.AsyncClient, headers: dict, items: list[dict], concurrency: int
+) -> tuple[float, bool]:
+    """Send one POST /notifications/ per item and wait for the rows.
+
+    Args:
+        client: HTTP client.
+        headers: Auth headers.
+        items: Notification payloads.
+        concurrency: Number of in-flight requests.
+
+    Returns:
+        tuple: Elapsed seconds until every row is written and whether the
+            service answered with write-behind.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    unread = await get_unread(client, headers)
+
+    async def post(item: dict) -> int:
+        async with semaphore:
+            response = await client.post("/notifications/", json=item, headers=headers)
+            response.raise_for_status()
+            return response.status_code
+
+    started = time.perf_counter()
+    statuses = await asyncio.gather(*(post(item) for item in items))
+    write_behind = 202 in statuses
+    if write_behind:
+        await wait_for_unread(client, headers, unread + len(items), DRAIN_TIMEOUT)
+    return time.perf_counter() - started, write_behind
+
+
+async def batch_inserts(
+    client: httpx.AsyncClient, headers: dict, items: list[dict], batch_size: int
+) -> float:
+    """Send items through POST /notifications/batch.
+
+    Args:
+        client: HTTP client.
+        headers: Auth headers.
+        items: Notification payloads.
+        batch_size: Number of items per request.
+
+    Returns:
+        float: Elapsed seconds.
+    """
+    started = time.perf_counter()
+    for start in range(0, len(items), batch_size):
+        response = await client.post(
+            "/notifications/batch",
+            json=items[start : start + batch_size],
+            headers=headers,
+        )
+        response.raise_for_status()
+    return time.perf_counter() - started
+
+
+async def run(url: str, count: int, concurrency: int, batch_size: int) -> dict:
+    """Run both ingest paths with the same payloads.
+
+    Args:
+        url: Service base url.
+        count: Number of notifications per path.
+        concurrency: Number of in-flight single insert requests.
+        batch_size: Number of items per batch request.
+
+    Returns:
+        dict: Throughput report.
+    """
+    items = make_items(count)
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=300) as client:
+        headers = {"Authorization": f"Bearer {await get_access_token(client)}"}
+        single_elapsed, write_behind = await single_inserts(
+            client, headers, items, concurrency
+        )
+        batch_elapsed = await batch_inserts(client, headers, items, batch_size)
+
+    return {
+        "items": count,
+        "single": {
+            "seconds": round(single_elapsed, 3),
+            "rows_per_second": round(count / single_elapsed, 1),
+            "write_behind": write_behind,
+        },
+        "batch": {
+            "seconds": round(batch_elapsed, 3),
+            "rows_per_second": round(count / batch_elapsed, 1),
+        },
+        "speedup": round(single_elapsed / batch_elapsed, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8081")
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.url, args.items, args.concurrency, args.batch_size))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Per-request cost of token verification with and without the token cache.
+
+Run from `src` so the settings find the .env file:
+
+    cd src && python ../benchmarks/token_decode.py --number 20000
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from security import encode_token, get_token_data  # noqa: E402
+from services.authorization.token_cache import verified_token_cache  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=20000)
+    args = parser.parse_args()
+
+    token = encode_token(username="benchmark")
+
+    def uncached() -> None:
+        verified_token_cache.evict_user("benchmark")
+        get_token_data(token)
+
+    def cached() -> None:
+        get_token_data(token)
+
+    get_token_data(token)
+    uncached_seconds = min(timeit.repeat(uncached, number=args.number, repeat=3))
+    cached_seconds = min(timeit.repeat(cached, number=args.number, repeat=3))
+
+    uncached_us = uncached_seconds / args.number * 1e6
+    cached_us = cached_seconds / args.number * 1e6
+    print(
+        json.dumps(
+            {
+                "calls": args.number,
+                "uncached_us_per_call": round(uncached_us, 2),
+                "cached_us_per_call": round(cached_us, 2),
+                "saved_us_per_call": round(uncached_us - cached_us, 2),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,9 @@
+from fastapi import HTTPException, status
+
+
+class ProfileNotFoundHTTPException(HTTPException):
+    def __init__(self, details: str = ""):
+        super().__init__(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Not found. {details}.",
+        )
@@ -0,0 +1,76 @@
+import asyncio
+
+from fastapi import APIRouter, Depends, status
+from fastapi.responses import FileResponse, PlainTextResponse
+
+from admin.exceptions import ProfileNotFoundHTTPException
+from admin.schemas import ProfileFormat, ProfileSchema, ProfileSort, SlowQuerySchema
+from dependencies import verify_admin_token
+from services.profiling import profile_store
+from services.slow_queries import slow_query_log
+
+router = APIRouter(dependencies=[Depends(verify_admin_token)])
+
+
+@router.get(
+    "/profiles", status_code=status.HTTP_200_OK, response_model=list[ProfileSchema]
+)
+async def list_profiles():
+    """List stored request profiles, newest first.
+
+    Returns:
+        list[ProfileSchema]: Request details of the profiles.
+    """
+    return await asyncio.to_thread(profile_store.list)
+
+
+@router.get("/profiles/{profile_id}", status_code=status.HTTP_200_OK)
+async def get_profile(
+    profile_id: str,
+    format: ProfileFormat = ProfileFormat.text,
+    sort: ProfileSort = ProfileSort.cumulative,
+    limit: int = 50,
+):
+    """Get a stored request profile.
+
+    Args:
+        profile_id: The profile id.
+        format: `text` for the top functions, `raw` for the pstats file to
+            open with `pstats` or snakeviz.
+        sort: pstats sort key of the text report.
+        limit: Number of functions in the text report.
+
+    Returns:
+        The report or the pstats file.
+
+    Raises:
+        ProfileNotFoundHTTPException: If profile does not exist.
+    """
+    path = profile_store.path(profile_id)
+    if path is None:
+        raise ProfileNotFoundHTTPException("Profile not found")
+    if format == ProfileFormat.raw:
+        return FileResponse(
+            path, media_type="application/octet-stream", filename=path.name
+        )
+
+    report = await asyncio.to_thread(
+        profile_store.render, profile_id, sort.value, limit
+    )
+    return PlainTextResponse(report)
+
+
+@router.get(
+    "/slow_queries",
+    status_code=status.HTTP_200_OK,
+    response_model=list[SlowQuerySchema],
+)
+async def list_slow_queries():
+    """List slow statements recorded by the worker serving the request.
+
+    Every worker keeps its own records, the structured log has all of them.
+
+    Returns:
+        list[SlowQuerySchema]: Slow statements with their plans, newest first.
+    """
+    return slow_query_log.records()
@@ -0,0 +1,43 @@
+from enum import Enum
+from typing import Any, Optional
+
+from base_schema import BaseSchema
+
+
+class ProfileFormat(str, Enum):
+    text = "text"
+    raw = "raw"
+
+
+# Values of pstats.SortKey, other strings make sort_stats raise.
+class ProfileSort(str, Enum):
+    calls = "calls"
+    cumulative = "cumulative"
+    filename = "filename"
+    line = "line"
+    name = "name"
+    nfl = "nfl"
+    pcalls = "pcalls"
+    stdname = "stdname"
+    time = "time"
+
+
+class ProfileSchema(BaseSchema):
+    id: str
+    method: str
+    path: str
+    route: Optional[str] = None
+    status: int
+    duration_ms: float
+    trigger: str
+    created_at: str
+
+
+class SlowQuerySchema(BaseSchema):
+    fingerprint: str
+    sql: str
+    parameters: Any = None
+    duration_ms: float
+    repository_method: Optional[str] = None
+    created_at: str
+    plan: Any = None
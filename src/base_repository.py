@@ -1,9 +1,13 @@
+import inspect
 from abc import ABC, abstractmethod
 from typing import Generic, TypeVar
 
 from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from services.slow_queries import track_repository_method
+
 EntityT = TypeVar("EntityT", bound=BaseModel)
 
 
@@ -63,3 +67,67 @@ class BaseRepository(ABC, Generic[EntityT]):
         Returns:
             EntityT: Entity.
         """
+
+
+class AsyncBaseRepository(ABC, Generic[EntityT]):
+    def __init_subclass__(cls, **kwargs):
+        # Slow statements are reported with the public method that ran them.
+        super().__init_subclass__(**kwargs)
+        for name, method in list(vars(cls).items()):
+            if not name.startswith("_") and inspect.iscoroutinefunction(method):
+                setattr(cls, name, track_repository_method(method))
+
+    def __init__(self, db: AsyncSession):
+        self._db = db
+        self.objects = self._db
+
+    async def release(self) -> None:
+        """Return the session connection to the pool.
+
+        The session reconnects on next use, call it before a long wait.
+        """
+        await self._db.close()
+
+    @abstractmethod
+    async def get(self, entity_id: int) -> EntityT:
+        """Get an entity by id.
+
+        Args:
+            entity_id: Entity id.
+
+        Returns:
+            EntityT: Entity.
+        """
+
+    @abstractmethod
+    async def update(self, entity: EntityT) -> EntityT:
+        """Update an entity by id.
+
+        Args:
+            entity: Entity data.
+
+        Returns:
+            EntityT: Entity.
+        """
+
+    @abstractmethod
+    async def add(self, entity: EntityT) -> EntityT:
+        """Add an entity.
+
+        Args:
+            entity: Entity data.
+
+        Returns:
+            EntityT: Entity.
+        """
+
+    @abstractmethod
+    async def find(self, **kwargs) -> EntityT:
+        """Find an entity.
+
+        Args:
+            kwargs: Filters data.
+
+        Returns:
+            EntityT: Entity.
+        """
@@ -1,9 +1,25 @@
 import logging
+from uuid import uuid4
 
-from sqlalchemy import create_engine
+from sqlalchemy import Engine, create_engine
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.pool import NullPool
 
-from settings import postgres_settings
+from database_pool import (
+    InstrumentedNullPool,
+    InstrumentedQueuePool,
+    get_pool_size,
+    get_pool_stats,
+)
+from services.metrics import instrument_engine
+from services.slow_queries import slow_query_log
+from settings import postgres_settings, settings
 
 logging.basicConfig()
 logging.getLogger("sqlalchemy.engine").setLevel(logging.ERROR)
@@ -15,19 +31,134 @@ SQLALCHEMY_DATABASE_URL = (
     f"{postgres_settings.POSTGRES_HOST}:{postgres_settings.POSTGRES_PORT}/"
     f"{postgres_settings.POSTGRES_DB}"
 )
+SQLALCHEMY_ASYNC_DATABASE_URL = (
+    "postgresql+asyncpg://"
+    f"{postgres_settings.POSTGRES_USER}:{postgres_settings.POSTGRES_PASSWORD}@"
+    f"{postgres_settings.POSTGRES_HOST}:{postgres_settings.POSTGRES_PORT}/"
+    f"{postgres_settings.POSTGRES_DB}"
+)
 
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    pool_size=0,
-    max_overflow=-1,
-    pool_timeout=10,
-    pool_recycle=3600,
-    pool_pre_ping=True,
-)
+def get_async_engine_options() -> dict:
+    """Get async engine pool options.
+
+    Every gunicorn worker gets an equal share of POSTGRES_CONNECTION_BUDGET
+    minus POSTGRES_RESERVED_CONNECTIONS and never opens more. In PgBouncer
+    mode pooling is left to PgBouncer and asyncpg keeps no prepared
+    statements, so transaction pooling is safe.
+
+    Returns:
+        dict: Keyword arguments of `create_async_engine`.
+    """
+    if postgres_settings.POSTGRES_PGBOUNCER:
+        return {
+            "poolclass": InstrumentedNullPool,
+            "connect_args": {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+            },
+        }
+
+    return {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": get_pool_size(
+            connection_budget=postgres_settings.POSTGRES_CONNECTION_BUDGET,
+            workers=settings.WORKERS,
+            reserved=postgres_settings.POSTGRES_RESERVED_CONNECTIONS,
+        ),
+        "max_overflow": 0,
+        "pool_timeout": postgres_settings.POSTGRES_POOL_TIMEOUT,
+        "pool_recycle": 3600,
+        "pool_pre_ping": True,
+    }
+
+
+_engine: Engine | None = None
+_async_engine: AsyncEngine | None = None
+
+
+def get_engine() -> Engine:
+    """Get the sync engine, creating it on first use.
+
+    Only used by maintenance scripts, so it keeps no idle connections.
+
+    Returns:
+        Engine: The engine of this process.
+    """
+    global _engine
+    if _engine is None:
+        _engine = create_engine(SQLALCHEMY_DATABASE_URL, poolclass=NullPool)
+    return _engine
+
+
+def get_async_engine() -> AsyncEngine:
+    """Get the async engine, creating it on first use.
+
+    The engine is created lazily so a gunicorn master preloading the app
+    never holds a pool that forked workers would share.
+
+    Returns:
+        AsyncEngine: The engine of this process.
+    """
+    global _async_engine
+    if _async_engine is None:
+        _async_engine = create_async_engine(
+            SQLALCHEMY_ASYNC_DATABASE_URL, **get_async_engine_options()
+        )
+        if settings.METRICS_ENABLED:
+            instrument_engine(_async_engine.sync_engine)
+        if settings.SLOW_QUERY_THRESHOLD_MS:
+            # EXPLAIN connects outside the pool, slow requests keep their slots.
+            explain_engine = create_async_engine(
+                SQLALCHEMY_ASYNC_DATABASE_URL,
+                poolclass=NullPool,
+                connect_args=get_async_engine_options().get("connect_args", {}),
+            )
+            slow_query_log.instrument(_async_engine, explain_engine=explain_engine)
+    return _async_engine
 
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def reset_engines_after_fork() -> None:
+    """Forget engines inherited from the parent process.
+
+    Inherited connections are left open for the parent instead of being
+    closed, the next use creates a fresh engine in this process.
+    """
+    global _engine, _async_engine
+    if _async_engine is not None:
+        _async_engine.sync_engine.dispose(close=False)
+    if _engine is not None:
+        _engine.dispose(close=False)
+    _engine = None
+    _async_engine = None
+
+
+async def dispose_async_engine() -> None:
+    """Close the pooled connections of this process, called on shutdown."""
+    global _async_engine
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    _async_engine = None
+
+
+class LazyAsyncSessionmaker(async_sessionmaker):
+    def __call__(self, **local_kw) -> AsyncSession:
+        """Create a session bound to the engine of this process.
+
+        Returns:
+            AsyncSession: The session.
+        """
+        local_kw.setdefault("bind", get_async_engine())
+        return super().__call__(**local_kw)
+
+
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
+AsyncSessionLocal = LazyAsyncSessionmaker(
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
 Base = declarative_base()
 
 
@@ -38,8 +169,33 @@ def get_db():
     Yields:
         The database session
     """
-    with SessionLocal() as db:  # pragma: no cover
+    with SessionLocal(bind=get_engine()) as db:  # pragma: no cover
         try:
             yield db  # pragma: no cover
         finally:
             db.close()
+
+
+async def get_async_db():
+    """
+    Get an async database session.
+
+    Yields:
+        The async database session
+    """
+    async with AsyncSessionLocal() as db:  # pragma: no cover
+        try:
+            yield db  # pragma: no cover
+        finally:
+            await db.close()
+
+
+def get_async_pool_stats() -> dict[str, float]:
+    """Get gauges and checkout counters of the async engine pool.
+
+    Returns:
+        dict[str, float]: Pool stats of this worker.
+    """
+    if _async_engine is None:
+        return {}
+    return get_pool_stats(_async_engine.pool)
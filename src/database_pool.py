@@ -0,0 +1,106 @@
+import time
+
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
+
+
+class PoolMetrics:
+    def __init__(self):
+        """Initialize checkout counters of a connection pool."""
+        self.checkouts = 0
+        self.waiting = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def observe(self, wait_seconds: float) -> None:
+        """Record a finished checkout.
+
+        Args:
+            wait_seconds (float): Time spent waiting for the connection.
+        """
+        self.checkouts += 1
+        self.wait_seconds_total += wait_seconds
+        self.wait_seconds_max = max(self.wait_seconds_max, wait_seconds)
+
+    def stats(self) -> dict[str, float]:
+        """Get the checkout counters.
+
+        Returns:
+            dict[str, float]: Checkouts, callers waiting right now and wait time.
+        """
+        return {
+            "checkouts": self.checkouts,
+            "waiting": self.waiting,
+            "wait_seconds_total": round(self.wait_seconds_total, 6),
+            "wait_seconds_max": round(self.wait_seconds_max, 6),
+        }
+
+
+class InstrumentedPoolMixin:
+    # `_do_get` is where the pool blocks for a free connection or opens one.
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        self.metrics.waiting += 1
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            self.metrics.waiting -= 1
+            self.metrics.observe(time.perf_counter() - started)
+
+
+class InstrumentedQueuePool(InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    metrics = PoolMetrics()
+
+
+class InstrumentedNullPool(InstrumentedPoolMixin, NullPool):
+    metrics = PoolMetrics()
+
+
+def get_pool_size(connection_budget: int, workers: int, reserved: int = 0) -> int:
+    """Split the global connection budget between gunicorn workers.
+
+    Args:
+        connection_budget: Connections the service may hold in total.
+        workers: Number of gunicorn workers.
+        reserved: Connections kept for the ingest worker, migrations and
+            maintenance scripts.
+
+    Returns:
+        int: Connections one worker may hold.
+
+    Raises:
+        ValueError: If the budget does not leave a connection per worker.
+    """
+    workers = max(1, workers)
+    available = connection_budget - reserved
+    if available < workers:
+        raise ValueError(
+            f"POSTGRES_CONNECTION_BUDGET={connection_budget} minus "
+            f"POSTGRES_RESERVED_CONNECTIONS={reserved} does not leave a "
+            f"connection for each of {workers} workers"
+        )
+    return available // workers
+
+
+def get_pool_stats(pool) -> dict[str, float]:
+    """Get pool gauges and checkout counters.
+
+    Args:
+        pool: Engine pool.
+
+    Returns:
+        dict[str, float]: Pool size, connections checked in and out, overflow
+            and checkout counters.
+    """
+    stats: dict[str, float] = {}
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        stats = {
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+        }
+    if isinstance(pool, InstrumentedPoolMixin):
+        stats.update(pool.metrics.stats())
+    return stats
@@ -1,24 +1,27 @@
+import hmac
 from typing import Annotated
 
-from fastapi import Depends
+from fastapi import Depends, Header
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.exc import NoResultFound
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from database import get_db
+from database import AsyncSessionLocal, get_async_db
 from exceptions import WrongCredentialsHTTPException
 from notifications.repostiory import NotificationRepository
 from security import get_token_data
 from services.authorization.authorization import token_whitelist_service
 from services.authorization.exceptions import TokenHTTPException
 from services.authorization.schemas import TypeOfToken
+from settings import settings
 from users.repository import UserRepository
-from users.schemas import UserSchema
+from users.schemas import UserProfileSchema
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login", auto_error=False)
 
 
-def get_user_repository(db: Session = Depends(get_db)) -> UserRepository:
+def get_user_repository(db: AsyncSession = Depends(get_async_db)) -> UserRepository:
     """Get user repository.
 
     Args:
@@ -31,7 +34,7 @@ def get_user_repository(db: Session = Depends(get_db)) -> UserRepository:
 
 
 def get_notification_repository(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ) -> NotificationRepository:
     """Get notification repository.
 
@@ -47,7 +50,7 @@ def get_notification_repository(
 async def get_current_user_by_refresh_token(
     token: Annotated[str, Depends(oauth2_scheme)],
     user_repository: UserRepository = Depends(get_user_repository),
-) -> UserSchema:
+) -> UserProfileSchema:
     """Get current user.
 
     Args:
@@ -65,9 +68,11 @@ async def get_current_user_by_refresh_token(
     if token_data.type != TypeOfToken.refresh:
         raise WrongCredentialsHTTPException("Could not validate credentials")
     try:
-        user = user_repository.find(username=token_data.sub)
+        user = await user_repository.find_profile(username=token_data.sub)
     except NoResultFound:
         raise WrongCredentialsHTTPException("Could not validate credentials")
+    if user is None:
+        raise WrongCredentialsHTTPException("Could not validate credentials")
 
     if await token_whitelist_service.check_token_on_the_whitelist(
         token=token, username=user.username
@@ -77,18 +82,17 @@ async def get_current_user_by_refresh_token(
     raise TokenHTTPException("Token is not in the whitelist")
 
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    user_repository: UserRepository = Depends(get_user_repository),
-) -> UserSchema:
-    """Get current user.
+async def get_user_by_access_token(
+    token: str, user_repository: UserRepository
+) -> UserProfileSchema:
+    """Authenticate an access token outside of the request dependencies.
 
     Args:
         token: JWT token.
         user_repository: User repository.
 
     Returns:
-        User: Current user.
+        User: Token owner.
 
     Raises:
         WrongCredentialsHTTPException: If user does not exist.
@@ -98,9 +102,11 @@ async def get_current_user(
     if token_data.type != TypeOfToken.access:
         raise WrongCredentialsHTTPException("Could not validate credentials")
     try:
-        user = user_repository.find(username=token_data.sub)
+        user = await user_repository.find_profile(username=token_data.sub)
     except NoResultFound:
         raise WrongCredentialsHTTPException("Could not validate credentials")
+    if user is None:
+        raise WrongCredentialsHTTPException("Could not validate credentials")
 
     if await token_whitelist_service.check_token_on_the_whitelist(
         token=token, username=user.username
@@ -108,3 +114,82 @@ async def get_current_user(
         return user
 
     raise TokenHTTPException("Token is not in the whitelist")
+
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    user_repository: UserRepository = Depends(get_user_repository),
+) -> UserProfileSchema:
+    """Get current user.
+
+    Args:
+        token: JWT token.
+        user_repository: User repository.
+
+    Returns:
+        User: Current user.
+
+    Raises:
+        WrongCredentialsHTTPException: If user does not exist.
+        TokenIsNotInWhiteListHTTPException: If token is not on whitelist.
+    """
+    return await get_user_by_access_token(token=token, user_repository=user_repository)
+
+
+async def get_user_by_stream_token(token: str) -> UserProfileSchema:
+    """Authenticate a long-lived stream with a short-lived database session.
+
+    The session is closed before the stream starts, so open streams do not
+    hold pooled connections.
+
+    Args:
+        token: JWT token.
+
+    Returns:
+        User: Token owner.
+    """
+    async with AsyncSessionLocal() as db:
+        return await get_user_by_access_token(
+            token=token, user_repository=UserRepository(db=db)
+        )
+
+
+async def get_stream_user(
+    token: str | None = None,
+    header_token: str | None = Depends(optional_oauth2_scheme),
+) -> UserProfileSchema:
+    """Get current user of an event stream.
+
+    EventSource cannot send headers, so the token may come as a query
+    parameter as well.
+
+    Args:
+        token: JWT token from the query.
+        header_token: JWT token from the Authorization header.
+
+    Returns:
+        User: Current user.
+
+    Raises:
+        WrongCredentialsHTTPException: If there is no token.
+    """
+    token = header_token or token
+    if not token:
+        raise WrongCredentialsHTTPException("Could not validate credentials")
+    return await get_user_by_stream_token(token=token)
+
+
+def verify_admin_token(x_admin_token: str | None = Header(default=None)) -> None:
+    """Check the X-Admin-Token header of admin endpoints.
+
+    Args:
+        x_admin_token: Admin token.
+
+    Raises:
+        WrongCredentialsHTTPException: If token is wrong or admin endpoints
+            are disabled by an empty ADMIN_TOKEN.
+    """
+    if not settings.ADMIN_TOKEN or not hmac.compare_digest(
+        (x_admin_token or "").encode(), settings.ADMIN_TOKEN.encode()
+    ):
+        raise WrongCredentialsHTTPException("Invalid admin token")
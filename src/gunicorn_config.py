@@ -1,4 +1,8 @@
 import multiprocessing
+import os
+import shutil
+
+from settings import settings
 
 bind = "0.0.0.0:80"
 worker_class = "uvicorn.workers.UvicornWorker"
@@ -28,10 +32,36 @@ timeout = 600
 #######################################################
 max_requests = 15000
 max_requests_jitter = 3
-workers = multiprocessing.cpu_count() * 2 + 1
+workers = settings.WORKERS
+preload_app = settings.GUNICORN_PRELOAD
 
 cores = multiprocessing.cpu_count()
 workers_per_core = float(2)
 default_web_concurrency = workers_per_core * cores
 use_max_workers = 15
 web_concurrency = 5
+
+
+def on_starting(server):
+    # Samples of a previous run would be aggregated with the new ones.
+    multiproc_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if multiproc_dir:
+        shutil.rmtree(multiproc_dir, ignore_errors=True)
+        os.makedirs(multiproc_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
+
+
+def post_fork(server, worker):
+    # With preload_app the master imported the app, connections it may have
+    # opened must not be shared by the workers.
+    from database import reset_engines_after_fork
+    from services.redis import redis_service
+
+    reset_engines_after_fork()
+    redis_service.reset_after_fork()
@@ -1,11 +1,27 @@
+from contextlib import asynccontextmanager
+
 import uvicorn
 from fastapi import Depends, FastAPI, Response, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.middleware.cors import CORSMiddleware
 
-from database import get_db
+from admin.routers import router as admin_router
+from database import (
+    dispose_async_engine,
+    get_async_db,
+    get_async_engine,
+    get_async_pool_stats,
+)
+from dependencies import verify_admin_token
+from notifications.realtime import notification_stream_hub
 from notifications.routers import router as notification_router
+from services.authorization.token_cache import verified_token_cache
+from services.hashing import password_hashing_service
+from services.metrics import MetricsMiddleware, metrics_service
+from services.profiling import ProfilerMiddleware, profile_store
+from services.redis import redis_service
 from settings import settings
+from users.cache import user_cache_service
 from users.routers import router as auth_rounter
 from utils import (
     HealthCheckResponse,
@@ -14,7 +30,32 @@ from utils import (
     get_health_check_status_for_redis,
 )
 
-app = FastAPI(openapi_url=settings.OPENAPI_URL, title="Test Spy and See")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop per-worker services.
+
+    Args:
+        app: The application
+    """
+    get_async_engine()
+    await redis_service.open()
+    password_hashing_service.start()
+    user_cache_service.start()
+    notification_stream_hub.start()
+    metrics_service.start()
+    yield
+    await metrics_service.stop()
+    await notification_stream_hub.stop()
+    await user_cache_service.stop()
+    password_hashing_service.shutdown()
+    await redis_service.close()
+    await dispose_async_engine()
+
+
+app = FastAPI(
+    openapi_url=settings.OPENAPI_URL, title="Test Spy and See", lifespan=lifespan
+)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -22,13 +63,31 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+if settings.PROFILING_SAMPLE_RATE or settings.PROFILING_SECRET:
+    app.add_middleware(
+        ProfilerMiddleware,
+        store=profile_store,
+        sample_rate=settings.PROFILING_SAMPLE_RATE,
+        secret=settings.PROFILING_SECRET,
+        signature_ttl=settings.PROFILING_SIGNATURE_TTL,
+    )
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+metrics_service.register("postgres_pool", get_async_pool_stats)
+metrics_service.register("redis_pool", redis_service.pool_stats)
+metrics_service.register("password_hashing", password_hashing_service.stats)
+metrics_service.register("user_cache", user_cache_service.stats)
+metrics_service.register("token_cache", verified_token_cache.stats)
+metrics_service.register("notification_stream", notification_stream_hub.stats)
 
 app.include_router(auth_rounter, prefix="/auth", tags=["Auth"])
 app.include_router(notification_router, prefix="/notifications", tags=["Notification"])
+app.include_router(admin_router, prefix="/admin", tags=["Admin"])
 
 
 @app.get("/health", response_model=HealthCheckResponse, status_code=status.HTTP_200_OK)
-async def healthcheck(response: Response, db: Session = Depends(get_db)):
+async def healthcheck(response: Response, db: AsyncSession = Depends(get_async_db)):
     """
     Health check endpoint.
 
@@ -39,7 +98,7 @@ async def healthcheck(response: Response, db: Session = Depends(get_db)):
     Returns:
         A JSON object with a status key and value of "ok"
     """
-    database_status = get_health_check_status_for_database(db=db)
+    database_status = await get_health_check_status_for_database(db=db)
     redis_status = await get_health_check_status_for_redis()
     if (
         database_status == HealthCheckStatus.FAIL
@@ -53,5 +112,19 @@ async def healthcheck(response: Response, db: Session = Depends(get_db)):
     )
 
 
+@app.get(
+    "/metrics", include_in_schema=False, dependencies=[Depends(verify_admin_token)]
+)
+async def metrics():
+    """
+    Prometheus metrics endpoint, it needs the X-Admin-Token header.
+
+    Returns:
+        The metrics of all workers in the Prometheus text format
+    """
+    content, content_type = metrics_service.render()
+    return Response(content=content, media_type=content_type)
+
+
 if __name__ == "__main__":
     uvicorn.run(app, host="127.0.0.1", port=settings.DEBUG_PORT)
@@ -0,0 +1,135 @@
+from sqlalchemy import Boolean, String, false, func, literal, literal_column, select
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.sql import Insert
+
+from notifications.models import Notification
+from notifications.schemas import NotificationSchema, NotificationType
+from settings import settings
+
+AGGREGATED_TYPES = frozenset({NotificationType.like, NotificationType.repost})
+
+
+def is_aggregated(notification: NotificationSchema) -> bool:
+    """Check whether the notification is merged with similar ones.
+
+    Args:
+        notification (NotificationSchema): The notification.
+
+    Returns:
+        bool: True if aggregation is enabled and the notification has an
+            aggregated type and a target.
+    """
+    return (
+        settings.NOTIFICATIONS_AGGREGATION
+        and notification.type in AGGREGATED_TYPES
+        and notification.target is not None
+    )
+
+
+def aggregation_key(notification: NotificationSchema) -> str:
+    """Build the key shared by notifications merged into one row.
+
+    Args:
+        notification (NotificationSchema): The notification.
+
+    Returns:
+        str: The aggregation key.
+    """
+    return f"{notification.user_id}:{notification.type.value}:{notification.target}"
+
+
+def window_start(created_at=None, window: int = None):
+    """Build the SQL expression of the aggregation window start.
+
+    Args:
+        created_at: Notification time, the database time if None.
+        window (int): Window size in seconds.
+
+    Returns:
+        The timestamp expression.
+    """
+    window = window or settings.NOTIFICATIONS_AGGREGATION_WINDOW
+    moment = func.now() if created_at is None else literal(created_at)
+    return func.to_timestamp(
+        func.floor(func.extract("epoch", moment) / window) * window
+    )
+
+
+def upsert_statement(
+    notification: NotificationSchema,
+    last_actors: int = None,
+) -> Insert:
+    """Build the atomic upsert merging the notification into its window row.
+
+    The row of a window keeps the window start as `created_at`, the conflict
+    on `ux_notifications_aggregation_key_created_at` bumps the actor count,
+    prepends the actor to the last actors, keeps the latest text, moves
+    `last_activity_at` up so lists show the row first and marks the row
+    unread again.
+
+    Args:
+        notification (NotificationSchema): The notification.
+        last_actors (int): Number of actors kept on the row.
+
+    Returns:
+        Insert: The statement, it returns the row, an `inserted` flag that
+            is false when an existing row was merged and a `was_read` flag
+            that is true when the merged row had been read.
+    """
+    last_actors = last_actors or settings.NOTIFICATIONS_AGGREGATION_LAST_ACTORS
+    actors = [notification.actor] if notification.actor else []
+    key = aggregation_key(notification)
+    created_at = window_start(notification.created_at)
+    last_activity_at = (
+        func.now() if notification.created_at is None else notification.created_at
+    )
+    # Keeps the read state of the row to merge from before the update, the
+    # CTE reads the statement snapshot while RETURNING sees the new values.
+    # FOR UPDATE would skip the row the statement itself updated.
+    previous = (
+        select(Notification.is_read)
+        .where(
+            Notification.aggregation_key == key,
+            Notification.created_at == created_at,
+        )
+        .cte("previous")
+    )
+    statement = insert(Notification).values(
+        user_id=notification.user_id,
+        type=notification.type.value,
+        text=notification.text,
+        target=notification.target,
+        aggregation_key=key,
+        actor_count=1,
+        last_actors=actors,
+        created_at=created_at,
+        last_activity_at=last_activity_at,
+    )
+    merged_actors = func.array_cat(
+        statement.excluded.last_actors,
+        Notification.last_actors,
+        type_=ARRAY(String(255)),
+    )
+    return (
+        statement.on_conflict_do_update(
+            index_elements=[Notification.aggregation_key, Notification.created_at],
+            set_={
+                "actor_count": Notification.actor_count + 1,
+                "last_actors": merged_actors[1:last_actors],
+                "text": statement.excluded.text,
+                "is_read": false(),
+                "last_activity_at": func.greatest(
+                    Notification.last_activity_at,
+                    statement.excluded.last_activity_at,
+                ),
+            },
+        )
+        .returning(
+            *Notification.__table__.columns,
+            literal_column("xmax = 0", Boolean).label("inserted"),
+            func.coalesce(select(previous.c.is_read).scalar_subquery(), false()).label(
+                "was_read"
+            ),
+        )
+        .add_cte(previous)
+    )
@@ -0,0 +1,175 @@
+import logging
+import uuid
+
+from database import AsyncSessionLocal
+from notifications.repostiory import NotificationRepository
+from notifications.schemas import (
+    BroadcastJobSchema,
+    BroadcastJobStatus,
+    NotificationBroadcastSchema,
+    NotificationSchema,
+)
+from services.redis import RedisService, redis_service
+from settings import settings
+from users.models import User
+
+logger = logging.getLogger(__name__)
+
+
+class BroadcastJobService:
+    JOB_PREFIX = "NOTIFICATIONS_BROADCAST_"
+
+    def __init__(self, redis: RedisService):
+        """Initialize the broadcast job service.
+
+        Args:
+            redis (RedisService): The Redis service.
+        """
+        self.redis = redis
+
+    def key(self, job_id: str) -> str:
+        """Get the redis key of a job.
+
+        Args:
+            job_id (str): The job id.
+
+        Returns:
+            str: The job key.
+        """
+        return f"{self.JOB_PREFIX}{job_id}"
+
+    async def create(self, owner_id: int, total: int | None) -> BroadcastJobSchema:
+        """Register a new pending job.
+
+        Args:
+            owner_id (int): Id of the user who started the job.
+            total (int | None): Number of requested recipients if known.
+
+        Returns:
+            BroadcastJobSchema: The job.
+        """
+        job = BroadcastJobSchema(
+            job_id=uuid.uuid4().hex, status=BroadcastJobStatus.pending, total=total
+        )
+        mapping = {
+            "owner_id": owner_id,
+            "status": job.status.value,
+            "processed": 0,
+            "inserted": 0,
+        }
+        if total is not None:
+            mapping["total"] = total
+        await self.redis.hset(
+            self.key(job.job_id),
+            mapping=mapping,
+            expire=settings.NOTIFICATIONS_BROADCAST_JOB_TTL,
+        )
+        return job
+
+    async def get(self, job_id: str, owner_id: int) -> BroadcastJobSchema | None:
+        """Get a job started by the user.
+
+        Args:
+            job_id (str): The job id.
+            owner_id (int): Id of the user who started the job.
+
+        Returns:
+            BroadcastJobSchema | None: The job, None if it does not exist.
+        """
+        data = await self.redis.hgetall(self.key(job_id))
+        if not data or int(data.pop("owner_id")) != owner_id:
+            return None
+        return BroadcastJobSchema(job_id=job_id, **data)
+
+    async def set_status(self, job_id: str, status: BroadcastJobStatus) -> None:
+        """Change the job status.
+
+        Args:
+            job_id (str): The job id.
+            status (BroadcastJobStatus): The new status.
+        """
+        await self.redis.hset(self.key(job_id), mapping={"status": status.value})
+
+    async def progress(self, job_id: str, processed: int, inserted: int) -> None:
+        """Add the result of a processed chunk to the job.
+
+        Args:
+            job_id (str): The job id.
+            processed (int): Number of processed recipients.
+            inserted (int): Number of written notifications.
+        """
+        await self.redis.hincrby(self.key(job_id), "processed", processed)
+        await self.redis.hincrby(self.key(job_id), "inserted", inserted)
+
+
+broadcast_job_service = BroadcastJobService(redis_service)
+
+
+async def _broadcast_to_ids(
+    job_id: str,
+    repository: NotificationRepository,
+    notification: NotificationSchema,
+    recipient_ids: list[int],
+) -> None:
+    chunk_size = settings.NOTIFICATIONS_INSERT_CHUNK_SIZE
+    for start in range(0, len(recipient_ids), chunk_size):
+        chunk = recipient_ids[start : start + chunk_size]
+        user_ids = await repository.add_for_users(notification, User.id.in_(chunk))
+        await broadcast_job_service.progress(job_id, len(chunk), len(user_ids))
+
+
+async def _broadcast_to_query(
+    job_id: str,
+    repository: NotificationRepository,
+    notification: NotificationSchema,
+    username_prefix: str | None,
+) -> None:
+    conditions = []
+    if username_prefix:
+        conditions.append(User.username.startswith(username_prefix, autoescape=True))
+
+    last_user_id = 0
+    while True:
+        user_ids = await repository.add_for_users(
+            notification,
+            User.id > last_user_id,
+            *conditions,
+            limit=settings.NOTIFICATIONS_INSERT_CHUNK_SIZE,
+        )
+        if not user_ids:
+            return
+        await broadcast_job_service.progress(job_id, len(user_ids), len(user_ids))
+        last_user_id = max(user_ids)
+
+
+async def run_broadcast(job_id: str, broadcast: NotificationBroadcastSchema) -> None:
+    """Write the broadcast notification for every recipient in bounded chunks.
+
+    Runs after the response is sent, with its own database session.
+
+    Args:
+        job_id: The job id.
+        broadcast: Broadcast data.
+    """
+    notification = NotificationSchema(type=broadcast.type, text=broadcast.text)
+    await broadcast_job_service.set_status(job_id, BroadcastJobStatus.running)
+    try:
+        async with AsyncSessionLocal() as db:
+            repository = NotificationRepository(db=db)
+            if broadcast.recipient_ids is not None:
+                await _broadcast_to_ids(
+                    job_id, repository, notification, broadcast.recipient_ids
+                )
+            else:
+                await _broadcast_to_query(
+                    job_id,
+                    repository,
+                    notification,
+                    broadcast.recipient_query.username_prefix,
+                )
+    except Exception:
+        logger.exception(f"Broadcast job {job_id} failed")
+        await broadcast_job_service.set_status(job_id, BroadcastJobStatus.failed)
+        return
+
+    await broadcast_job_service.set_status(job_id, BroadcastJobStatus.done)
@@ -0,0 +1,74 @@
+import asyncio
+import hashlib
+from typing import Awaitable, Callable
+
+from notifications.realtime import NotificationStreamHub, notification_stream_hub
+
+VERSION_RECHECK_INTERVAL = 1.0
+
+
+def make_etag(user_id: int, version: int, *query) -> str:
+    """Build the ETag of a notification list response.
+
+    Args:
+        user_id: Owner id.
+        version: Version of user notifications.
+        query: Parameters that select the page.
+
+    Returns:
+        str: Strong ETag, quoted.
+    """
+    query_digest = hashlib.sha1(repr(query).encode()).hexdigest()[:12]
+    return f'"{user_id}.{version}.{query_digest}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Check an If-None-Match header against the current ETag.
+
+    Args:
+        if_none_match: Header value, may list several ETags.
+        etag: Current ETag.
+
+    Returns:
+        bool: True if the client copy is still fresh.
+    """
+    if not if_none_match:
+        return False
+    candidates = {candidate.strip() for candidate in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+async def wait_for_version_change(
+    user_id: int,
+    version: int,
+    timeout: float,
+    get_version: Callable[[int], Awaitable[int]],
+    hub: NotificationStreamHub = notification_stream_hub,
+) -> int:
+    """Park a long-poll request until user notifications change.
+
+    New notifications wake the request through the stream hub at once,
+    other writes such as deletes are noticed by rechecking the version.
+
+    Args:
+        user_id: Owner id.
+        version: Version the client already has.
+        timeout: Maximum seconds to wait.
+        get_version: Reads the current version.
+        hub: Notification stream hub.
+
+    Returns:
+        int: The current version, equal to `version` on timeout.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    subscription = await hub.subscribe(user_id)
+    try:
+        while (remaining := deadline - loop.time()) > 0:
+            await subscription.get(timeout=min(remaining, VERSION_RECHECK_INTERVAL))
+            current_version = await get_version(user_id)
+            if current_version != version:
+                return current_version
+        return version
+    finally:
+        await hub.unsubscribe(subscription)
@@ -0,0 +1,169 @@
+import time
+
+from services.redis import RedisService, redis_service
+
+
+class NotificationCounterService:
+    COUNTER_PREFIX = "NOTIFICATIONS_COUNT_"
+    VERSION_PREFIX = "NOTIFICATIONS_VERSION_"
+    UNREAD_PREFIX = "NOTIFICATIONS_UNREAD_"
+
+    def __init__(self, redis: RedisService):
+        """Initialize the notification counter service.
+
+        Args:
+            redis (RedisService): The Redis service.
+        """
+        self.redis = redis
+
+    def key(self, user_id: int) -> str:
+        """Get the counter key of a user.
+
+        Args:
+            user_id (int): The user id.
+
+        Returns:
+            str: The counter key.
+        """
+        return f"{self.COUNTER_PREFIX}{user_id}"
+
+    def unread_key(self, user_id: int) -> str:
+        """Get the unread counter key of a user.
+
+        Args:
+            user_id (int): The user id.
+
+        Returns:
+            str: The unread counter key.
+        """
+        return f"{self.UNREAD_PREFIX}{user_id}"
+
+    def version_key(self, user_id: int) -> str:
+        """Get the version key of a user.
+
+        Args:
+            user_id (int): The user id.
+
+        Returns:
+            str: The version key.
+        """
+        return f"{self.VERSION_PREFIX}{user_id}"
+
+    async def get_version(self, user_id: int) -> int:
+        """Get the version of user notifications, it changes on every write.
+
+        A missing version starts from the current time, so versions never
+        repeat even if redis loses the keys.
+
+        Args:
+            user_id (int): The user id.
+
+        Returns:
+            int: The version.
+        """
+        value = await self.redis.get(key=self.version_key(user_id))
+        if value is None:
+            await self.redis.set_if_absent(
+                self.version_key(user_id), time.time_ns() // 1000
+            )
+            value = await self.redis.get(key=self.version_key(user_id))
+        return int(value)
+
+    async def get(self, user_id: int) -> int | None:
+        """Get the number of user notifications.
+
+        Args:
+            user_id (int): The user id.
+
+        Returns:
+            int | None: The counter value, None if it is not initialized yet.
+        """
+        value = await self.redis.get(key=self.key(user_id))
+        return int(value) if value is not None else None
+
+    async def get_unread(self, user_id: int) -> int | None:
+        """Get the number of unread user notifications.
+
+        Args:
+            user_id (int): The user id.
+
+        Returns:
+            int | None: The counter value, None if it is not initialized yet.
+        """
+        value = await self.redis.get(key=self.unread_key(user_id))
+        return int(value) if value is not None else None
+
+    async def initialize(self, user_id: int, total: int) -> None:
+        """Initialize the counter unless another request did it first.
+
+        Args:
+            user_id (int): The user id.
+            total (int): The number of user notifications.
+        """
+        await self.redis.set_if_absent(self.key(user_id), total)
+
+    async def initialize_unread(self, user_id: int, unread: int) -> None:
+        """Initialize the unread counter unless another request did it first.
+
+        Args:
+            user_id (int): The user id.
+            unread (int): The number of unread user notifications.
+        """
+        await self.redis.set_if_absent(self.unread_key(user_id), unread)
+
+    async def increment(
+        self, user_id: int, amount: int = 1, unread: int | None = None
+    ) -> None:
+        """Change initialized counters and bump the version.
+
+        Counters that are not initialized are left alone, they are filled
+        from the database on the next read.
+
+        Args:
+            user_id (int): The user id.
+            amount (int): The value to add, may be negative.
+            unread (int | None): The value to add to the unread counter,
+                `amount` if None since new notifications are unread.
+        """
+        await self.increment_many([user_id], amount, unread)
+
+    async def increment_many(
+        self, user_ids: list[int], amount: int = 1, unread: int | None = None
+    ) -> None:
+        """Change initialized counters and bump versions in one round trip.
+
+        Args:
+            user_ids (list[int]): The user ids.
+            amount (int): The value to add to every counter, may be negative.
+            unread (int | None): The value to add to every unread counter,
+                `amount` if None.
+        """
+        unread = amount if unread is None else unread
+        increments = {}
+        for user_id in user_ids:
+            if amount:
+                increments[self.key(user_id)] = amount
+            if unread:
+                increments[self.unread_key(user_id)] = unread
+            increments[self.version_key(user_id)] = 1
+        if increments:
+            await self.redis.incr_many_if_exists(increments)
+
+    async def set_many(
+        self, totals: dict[int, int], unread: dict[int, int] | None = None
+    ) -> None:
+        """Overwrite counters, used by the reconciliation job.
+
+        Args:
+            totals (dict[int, int]): Number of notifications by user id.
+            unread (dict[int, int] | None): Number of unread notifications
+                by user id.
+        """
+        values = {self.key(user_id): total for user_id, total in totals.items()}
+        for user_id, total in (unread or {}).items():
+            values[self.unread_key(user_id)] = total
+        if values:
+            await self.redis.mset(values)
+
+
+notification_counter_service = NotificationCounterService(redis_service)
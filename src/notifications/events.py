@@ -0,0 +1,63 @@
+import json
+
+from notifications.schemas import NotificationSchema
+from services.redis import RedisService, redis_service
+
+
+class NotificationEventPublisher:
+    CHANNEL_PREFIX = "NOTIFICATIONS_USER_"
+
+    def __init__(self, redis: RedisService):
+        """Initialize the notification event publisher.
+
+        Args:
+            redis (RedisService): The Redis service.
+        """
+        self.redis = redis
+
+    def channel(self, user_id: int) -> str:
+        """Get the channel of user events.
+
+        Args:
+            user_id (int): The user id.
+
+        Returns:
+            str: The channel name.
+        """
+        return f"{self.CHANNEL_PREFIX}{user_id}"
+
+    async def created(self, notification: NotificationSchema) -> None:
+        """Publish a committed notification to its owner.
+
+        Args:
+            notification (NotificationSchema): The notification.
+        """
+        await self.redis.publish(
+            self.channel(notification.user_id),
+            json.dumps(
+                {
+                    "event": "created",
+                    "notification": notification.model_dump(mode="json"),
+                }
+            ),
+        )
+
+    async def created_many(self, counts: dict[int, int]) -> None:
+        """Tell users how many notifications they got in a bulk write.
+
+        Args:
+            counts (dict[int, int]): Number of new notifications by user id.
+        """
+        if counts:
+            await self.redis.publish_many(
+                [
+                    (
+                        self.channel(user_id),
+                        json.dumps({"event": "created_many", "count": count}),
+                    )
+                    for user_id, count in counts.items()
+                ]
+            )
+
+
+notification_event_publisher = NotificationEventPublisher(redis_service)
@@ -0,0 +1,17 @@
+from fastapi import HTTPException, status
+
+
+class InvalidCursorHTTPException(HTTPException):
+    def __init__(self, details: str = ""):
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Bad request. {details}.",
+        )
+
+
+class BroadcastJobNotFoundHTTPException(HTTPException):
+    def __init__(self, details: str = ""):
+        super().__init__(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Not found. {details}.",
+        )
@@ -0,0 +1,86 @@
+from notifications.schemas import NotificationSchema
+from services.redis import RedisService, redis_service
+from settings import settings
+
+
+class NotificationIngestService:
+    DEAD_LETTER_SUFFIX = "_DEAD"
+
+    def __init__(self, redis: RedisService, stream: str, group: str, maxlen: int):
+        """Initialize the write-behind notification ingest service.
+
+        Args:
+            redis (RedisService): The Redis service.
+            stream (str): The ingest stream key.
+            group (str): The consumer group of the writers.
+            maxlen (int): Approximate maximum length of the stream. It only
+                caps memory when the writers are down for long, once reached
+                the oldest entries are dropped even if they were never
+                written. In normal operation `trim_acknowledged` keeps the
+                stream short.
+        """
+        self.redis = redis
+        self.stream = stream
+        self.group = group
+        self.maxlen = maxlen
+        self.dead_letter_stream = f"{stream}{self.DEAD_LETTER_SUFFIX}"
+
+    async def enqueue(self, notification: NotificationSchema) -> bytes:
+        """Append a notification to the ingest stream.
+
+        Args:
+            notification (NotificationSchema): The notification.
+
+        Returns:
+            bytes: The stream entry id.
+        """
+        return await self.redis.xadd(
+            self.stream,
+            {"payload": notification.model_dump_json(exclude_unset=True)},
+            maxlen=self.maxlen,
+        )
+
+    async def _group_info(self) -> dict | None:
+        for group in await self.redis.xinfo_groups(self.stream):
+            name = group["name"]
+            if (name.decode() if isinstance(name, bytes) else name) == self.group:
+                return group
+        return None
+
+    async def stats(self) -> dict[str, int]:
+        """Get the writers backlog.
+
+        Returns:
+            dict[str, int]: Entries not read by the group yet (lag) and
+                entries read but not acknowledged (pending).
+        """
+        group = await self._group_info()
+        if group is None:
+            return {"lag": 0, "pending": 0}
+        return {"lag": group.get("lag") or 0, "pending": group["pending"]}
+
+    async def trim_acknowledged(self) -> int:
+        """Remove the entries the writers have read and acknowledged.
+
+        Entries older than the oldest pending entry, or than the last read
+        entry when nothing is pending, are written, unread and pending
+        entries are kept.
+
+        Returns:
+            int: The number of removed entries.
+        """
+        group = await self._group_info()
+        if group is None:
+            return 0
+        oldest_pending = await self.redis.xpending_oldest(self.stream, self.group)
+        return await self.redis.xtrim_minid(
+            self.stream, oldest_pending or group["last-delivered-id"]
+        )
+
+
+notification_ingest_service = NotificationIngestService(
+    redis=redis_service,
+    stream=settings.NOTIFICATIONS_INGEST_STREAM,
+    group=settings.NOTIFICATIONS_INGEST_GROUP,
+    maxlen=settings.NOTIFICATIONS_INGEST_MAXLEN,
+)
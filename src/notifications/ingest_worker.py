@@ -0,0 +1,217 @@
+"""Drain the write-behind ingest stream into the notifications table.
+
+Entries are acknowledged only after their rows are committed, so a crash
+replays them (at-least-once). Entries that keep failing are moved to the
+dead-letter stream. Run one or more from `src`:
+
+    python -m notifications.ingest_worker
+"""
+import asyncio
+import logging
+import os
+import signal
+import socket
+import time
+
+from pydantic import ValidationError
+
+from database import AsyncSessionLocal
+from notifications.ingest import NotificationIngestService, notification_ingest_service
+from notifications.repostiory import NotificationRepository
+from notifications.schemas import NotificationSchema
+from services.metrics import INGEST_STREAM_ENTRIES
+from settings import settings
+
+STATS_INTERVAL = 30
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationIngestWorker:
+    def __init__(
+        self,
+        ingest: NotificationIngestService,
+        consumer: str,
+        batch_size: int,
+        block_ms: int,
+        claim_idle_ms: int,
+        max_deliveries: int,
+    ):
+        """Initialize a consumer of the ingest stream.
+
+        Args:
+            ingest (NotificationIngestService): The ingest service.
+            consumer (str): Unique consumer name within the group.
+            batch_size (int): Maximum entries written per transaction.
+            block_ms (int): Milliseconds to wait for new entries.
+            claim_idle_ms (int): Pending time after which entries of other
+                consumers are taken over.
+            max_deliveries (int): Deliveries before an entry is dead-lettered.
+        """
+        self.ingest = ingest
+        self.redis = ingest.redis
+        self.consumer = consumer
+        self.batch_size = batch_size
+        self.block_ms = block_ms
+        self.claim_idle_ms = claim_idle_ms
+        self.max_deliveries = max_deliveries
+        self.written = 0
+        self.dead_lettered = 0
+        self._stopping = False
+
+    def stop(self) -> None:
+        """Finish the current batch and exit."""
+        self._stopping = True
+
+    async def _write(self, notifications: list[NotificationSchema]) -> None:
+        # Only failures before the commit raise, so written rows are never
+        # retried and duplicated.
+        async with AsyncSessionLocal() as db:
+            repository = NotificationRepository(db=db)
+            changes = await repository.insert_many(notifications)
+            try:
+                await repository.publish_changes(changes)
+            except Exception as error:
+                logger.warning(
+                    f"Counters and events of {len(notifications)} written "
+                    f"notifications failed, counters are fixed by reconcile: {error}"
+                )
+
+    async def _dead_letter(self, entry_id: bytes, fields: dict, reason: str) -> None:
+        await self.redis.xadd(
+            self.ingest.dead_letter_stream,
+            {
+                "entry_id": entry_id,
+                "payload": fields.get(b"payload", b""),
+                "reason": reason,
+            },
+        )
+        await self.redis.xack(self.ingest.stream, self.ingest.group, [entry_id])
+        self.dead_lettered += 1
+        logger.warning(f"Dead-lettered ingest entry {entry_id!r}: {reason}")
+
+    async def process(self, entries: list[tuple[bytes, dict]]) -> None:
+        """Write a batch of entries and acknowledge the written ones.
+
+        Args:
+            entries: Entry ids and fields.
+        """
+        valid = []
+        for entry_id, fields in entries:
+            try:
+                notification = NotificationSchema.model_validate_json(
+                    fields[b"payload"]
+                )
+            except (KeyError, ValidationError) as error:
+                await self._dead_letter(entry_id, fields, f"invalid payload: {error}")
+                continue
+            valid.append((entry_id, notification))
+
+        if not valid:
+            return
+        try:
+            await self._write([notification for _, notification in valid])
+        except Exception as error:
+            logger.warning(f"Batch insert failed, retrying entries one by one: {error}")
+        else:
+            await self.redis.xack(
+                self.ingest.stream,
+                self.ingest.group,
+                [entry_id for entry_id, _ in valid],
+            )
+            self.written += len(valid)
+            return
+
+        # Failed entries stay pending and come back through `reclaim`.
+        for entry_id, notification in valid:
+            try:
+                await self._write([notification])
+            except Exception as error:
+                logger.warning(f"Ingest entry {entry_id!r} failed: {error}")
+                continue
+            await self.redis.xack(self.ingest.stream, self.ingest.group, [entry_id])
+            self.written += 1
+
+    async def reclaim(self) -> None:
+        """Retry entries left pending by failures or crashed consumers."""
+        entries = await self.redis.xautoclaim(
+            self.ingest.stream,
+            self.ingest.group,
+            self.consumer,
+            min_idle_time=self.claim_idle_ms,
+            count=self.batch_size,
+        )
+        if not entries:
+            return
+
+        deliveries = await self.redis.xpending_deliveries(
+            self.ingest.stream,
+            self.ingest.group,
+            min_id=entries[0][0],
+            max_id=entries[-1][0],
+            count=len(entries),
+        )
+        retry = []
+        for entry_id, fields in entries:
+            if deliveries.get(entry_id, 0) > self.max_deliveries:
+                await self._dead_letter(entry_id, fields, "too many deliveries")
+            else:
+                retry.append((entry_id, fields))
+        await self.process(retry)
+
+    async def log_stats(self) -> None:
+        """Log the consumer counters and export the group lag."""
+        stats = await self.ingest.stats()
+        for state, entries in stats.items():
+            INGEST_STREAM_ENTRIES.labels(state).set(entries)
+        logger.info(
+            f"Ingest worker {self.consumer}: written={self.written} "
+            f"dead_lettered={self.dead_lettered} lag={stats['lag']} "
+            f"pending={stats['pending']}"
+        )
+
+    async def run(self) -> None:
+        """Consume the stream until stopped."""
+        await self.redis.xgroup_create(self.ingest.stream, self.ingest.group)
+        next_maintenance = 0.0
+        while not self._stopping:
+            if time.monotonic() >= next_maintenance:
+                await self.reclaim()
+                await self.ingest.trim_acknowledged()
+                await self.log_stats()
+                next_maintenance = time.monotonic() + STATS_INTERVAL
+
+            entries = await self.redis.xreadgroup(
+                self.ingest.stream,
+                self.ingest.group,
+                self.consumer,
+                count=self.batch_size,
+                block=self.block_ms,
+            )
+            if entries:
+                await self.process(entries)
+
+
+async def main() -> None:
+    logger.setLevel(logging.INFO)
+    worker = NotificationIngestWorker(
+        ingest=notification_ingest_service,
+        consumer=f"{socket.gethostname()}-{os.getpid()}",
+        batch_size=settings.NOTIFICATIONS_INGEST_BATCH_SIZE,
+        block_ms=settings.NOTIFICATIONS_INGEST_BLOCK_MS,
+        claim_idle_ms=settings.NOTIFICATIONS_INGEST_CLAIM_IDLE_MS,
+        max_deliveries=settings.NOTIFICATIONS_INGEST_MAX_DELIVERIES,
+    )
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, worker.stop)
+
+    await worker.redis.open()
+    try:
+        await worker.run()
+    finally:
+        await worker.redis.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
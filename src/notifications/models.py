@@ -1,4 +1,15 @@
-from sqlalchemy import Column, ForeignKey, Integer, String
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    false,
+    func,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import relationship
 
 from base_model import BaseModel
@@ -6,6 +17,12 @@ from base_model import BaseModel
 
 class Notification(BaseModel):
     __tablename__ = "notifications"
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
+
+    # Monthly partitions on created_at, the primary key has to include it.
+    created_at = Column(
+        DateTime(timezone=True), primary_key=True, nullable=False, default=func.now()
+    )
 
     user_id = Column(
         Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False
@@ -13,3 +30,42 @@ class Notification(BaseModel):
     user = relationship("User", back_populates="notifications")
     type = Column(String(15), nullable=False)
     text = Column(String(255), nullable=False)
+    target = Column(String(255), nullable=True)
+    aggregation_key = Column(String(300), nullable=True)
+    actor_count = Column(Integer, nullable=False, default=1, server_default="1")
+    last_actors: Column[list[str]] = Column(
+        ARRAY(String(255)), nullable=False, default=list, server_default="{}"
+    )
+    is_read = Column(Boolean, nullable=False, default=False, server_default=false())
+    # Sort key of lists, moved up when a like or repost is merged into the row.
+    last_activity_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=func.now(),
+        server_default=func.now(),
+    )
+
+
+Index(
+    "ix_notifications_user_id_last_activity_at_id",
+    Notification.user_id,
+    Notification.last_activity_at.desc(),
+    Notification.id.desc(),
+)
+
+
+Index(
+    "ux_notifications_aggregation_key_created_at",
+    Notification.aggregation_key,
+    Notification.created_at,
+    unique=True,
+)
+
+
+Index(
+    "ix_notifications_user_id_unread",
+    Notification.user_id,
+    Notification.last_activity_at.desc(),
+    Notification.id.desc(),
+    postgresql_where=Notification.is_read.is_(False),
+)
@@ -0,0 +1,45 @@
+import base64
+import binascii
+from datetime import datetime
+from typing import NamedTuple
+
+
+class NotificationCursor(NamedTuple):
+    last_activity_at: datetime
+    id: int
+
+
+def encode_cursor(cursor: NotificationCursor) -> str:
+    """Encode a keyset position into an opaque cursor.
+
+    Args:
+        cursor: Position of the last returned notification.
+
+    Returns:
+        str: Opaque cursor.
+    """
+    raw = f"{cursor.last_activity_at.isoformat()}|{cursor.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> NotificationCursor:
+    """Decode an opaque cursor into a keyset position.
+
+    Args:
+        cursor: Opaque cursor.
+
+    Returns:
+        NotificationCursor: Position of the last returned notification.
+
+    Raises:
+        ValueError: If cursor is malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        last_activity_at, notification_id = raw.split("|")
+        return NotificationCursor(
+            last_activity_at=datetime.fromisoformat(last_activity_at),
+            id=int(notification_id),
+        )
+    except (binascii.Error, UnicodeDecodeError, ValueError) as error:
+        raise ValueError("Malformed cursor") from error
@@ -0,0 +1,210 @@
+"""Maintain the monthly partitions of the notifications table.
+
+Creates partitions for the coming months and drops the ones that fell out
+of the retention window, so pruning old notifications is a metadata change
+instead of a long DELETE. Rows that landed in the default partition are
+moved into the partition created for their month, or deleted once expired.
+Run it from `src` daily, e.g. from cron:
+
+    python -m notifications.partitions
+"""
+import asyncio
+import logging
+import re
+from datetime import date
+
+from sqlalchemy import text
+
+from database import AsyncSessionLocal
+from notifications.reconcile import reconcile_counters
+from settings import settings
+
+PARTITION_NAME = re.compile(r"^notifications_p(\d{4})(\d{2})$")
+DEFAULT_PARTITION = "notifications_default"
+LOCK_TIMEOUT = "5s"
+
+logger = logging.getLogger(__name__)
+
+
+def add_months(month: date, months: int) -> date:
+    """Move the first day of a month by a number of months.
+
+    Args:
+        month (date): First day of a month.
+        months (int): Number of months, may be negative.
+
+    Returns:
+        date: First day of the resulting month.
+    """
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    """Get the name of the partition holding a month.
+
+    Args:
+        month (date): First day of the month.
+
+    Returns:
+        str: The partition name.
+    """
+    return f"notifications_p{month:%Y%m}"
+
+
+async def get_partitions(db) -> dict[date, str]:
+    """List the monthly partitions of the notifications table.
+
+    Args:
+        db: Database session.
+
+    Returns:
+        dict[date, str]: Partition names by the first day of their month,
+            the default partition is not included.
+    """
+    names = await db.scalars(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = 'notifications'::regclass"
+        )
+    )
+    partitions = {}
+    for name in names:
+        match = PARTITION_NAME.match(name)
+        if match:
+            partitions[date(int(match[1]), int(match[2]), 1)] = name
+    return partitions
+
+
+async def set_lock_timeout(db) -> None:
+    """Bound the lock waits of the current transaction.
+
+    Attaching or dropping a partition locks the parent table, give up rather
+    than queue every query behind a long running one. `SET LOCAL` only lasts
+    until the transaction ends, run it first in every one of them.
+
+    Args:
+        db: Database session.
+    """
+    await db.execute(text(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'"))
+
+
+async def create_partition(db, start: date) -> int:
+    """Create the partition of a month, moving its rows out of the default one.
+
+    Attaching a range the default partition has rows for fails, so the rows
+    are moved into the new table before it is attached, in one transaction.
+
+    Args:
+        db: Database session.
+        start (date): First day of the month.
+
+    Returns:
+        int: Number of rows moved from the default partition.
+    """
+    name = partition_name(start)
+    end = add_months(start, 1)
+    await set_lock_timeout(db)
+    await db.execute(
+        text(
+            f"CREATE TABLE IF NOT EXISTS {name} "
+            "(LIKE notifications INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        )
+    )
+    moved = await db.scalar(
+        text(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+            "WHERE created_at >= :start AND created_at < :end RETURNING *), "
+            f"inserted AS (INSERT INTO {name} SELECT * FROM moved RETURNING 1) "
+            "SELECT count(*) FROM inserted"
+        ),
+        {"start": start, "end": end},
+    )
+    await db.execute(
+        text(
+            f"ALTER TABLE notifications ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ('{start}') TO ('{end}')"
+        )
+    )
+    await db.commit()
+    return moved
+
+
+async def maintain_partitions(
+    months_ahead: int = settings.NOTIFICATIONS_PARTITIONS_AHEAD,
+    retention_months: int = settings.NOTIFICATIONS_RETENTION_MONTHS,
+    today: date | None = None,
+) -> tuple[list[str], list[str], int]:
+    """Create the upcoming partitions and drop the expired ones.
+
+    Expired rows left in the default partition are deleted too.
+
+    Args:
+        months_ahead: Number of months after the current one to create.
+        retention_months: Number of past months to keep besides the current
+            one, 0 keeps everything.
+        today: The current date, for tests and backfills.
+
+    Returns:
+        tuple: Names of created and dropped partitions and the number of
+            rows deleted from the default partition.
+    """
+    month = (today or date.today()).replace(day=1)
+    created, dropped, purged = [], [], 0
+    async with AsyncSessionLocal() as db:
+        partitions = await get_partitions(db)
+        await db.commit()
+
+        for offset in range(months_ahead + 1):
+            start = add_months(month, offset)
+            if start in partitions:
+                continue
+            moved = await create_partition(db, start)
+            created.append(partition_name(start))
+            if moved:
+                logger.warning(
+                    f"Moved {moved} notifications from {DEFAULT_PARTITION} "
+                    f"to {partition_name(start)}"
+                )
+
+        if retention_months:
+            oldest_kept = add_months(month, -retention_months)
+            for start, name in sorted(partitions.items()):
+                if start >= oldest_kept:
+                    break
+                await set_lock_timeout(db)
+                await db.execute(text(f"DROP TABLE IF EXISTS {name}"))
+                await db.commit()
+                dropped.append(name)
+
+            await set_lock_timeout(db)
+            result = await db.execute(
+                text(
+                    f"DELETE FROM {DEFAULT_PARTITION} WHERE created_at < :oldest_kept"
+                ),
+                {"oldest_kept": oldest_kept},
+            )
+            await db.commit()
+            purged = result.rowcount
+
+    return created, dropped, purged
+
+
+async def run() -> None:
+    created, dropped, purged = await maintain_partitions()
+    logger.warning(f"Created notification partitions: {created or 'none'}")
+    logger.warning(f"Dropped notification partitions: {dropped or 'none'}")
+    logger.warning(f"Deleted {purged} expired notifications from {DEFAULT_PARTITION}")
+    if dropped or purged:
+        # Dropped rows never went through the repository.
+        reconciled = await reconcile_counters()
+        logger.warning(f"Reconciled notification counters of {reconciled} users")
+
+
+def main() -> None:
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+import asyncio
+import logging
+
+from redis.asyncio.client import PubSub
+
+from notifications.events import (
+    NotificationEventPublisher,
+    notification_event_publisher,
+)
+from services.redis import RedisService, redis_service
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationSubscription:
+    def __init__(self, user_id: int, queue_size: int):
+        """Initialize a stream subscription of one connected client.
+
+        Args:
+            user_id (int): The user id.
+            queue_size (int): Number of undelivered events kept for the client.
+        """
+        self.user_id = user_id
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize=queue_size)
+        self.overflowed = False
+
+    def push(self, message: str) -> None:
+        """Queue an event without ever blocking the shared reader.
+
+        A client that does not keep up is marked overflowed and should be
+        disconnected, it re-syncs with GET /notifications/ on reconnect.
+
+        Args:
+            message (str): The event.
+        """
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    async def get(self, timeout: float) -> str | None:
+        """Wait for the next event.
+
+        Args:
+            timeout (float): Seconds to wait.
+
+        Returns:
+            str | None: The event, None on timeout.
+        """
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class NotificationStreamHub:
+    POLL_TIMEOUT = 1.0
+    RECONNECT_DELAY = 1
+
+    def __init__(
+        self,
+        redis: RedisService,
+        events: NotificationEventPublisher,
+        queue_size: int,
+    ):
+        """Initialize the per-worker hub of notification streams.
+
+        All users connected to this worker share one pub/sub connection.
+        The lock serializes changes of the subscriber map with the matching
+        SUBSCRIBE and UNSUBSCRIBE commands, the reader does not take it
+        while it waits for messages.
+
+        Args:
+            redis (RedisService): The Redis service.
+            events (NotificationEventPublisher): The event publisher.
+            queue_size (int): Number of undelivered events kept per client.
+        """
+        self.redis = redis
+        self.events = events
+        self.queue_size = queue_size
+        self._subscriptions: dict[str, set[NotificationSubscription]] = {}
+        self._pubsub: PubSub | None = None
+        self._lock = asyncio.Lock()
+        self._reader: asyncio.Task | None = None
+
+    async def subscribe(self, user_id: int) -> NotificationSubscription:
+        """Subscribe a connected client to the user events.
+
+        Args:
+            user_id (int): The user id.
+
+        Returns:
+            NotificationSubscription: The subscription, pass it to
+                `unsubscribe` when the client goes away.
+        """
+        self.start()
+        subscription = NotificationSubscription(user_id, self.queue_size)
+        channel = self.events.channel(user_id)
+        async with self._lock:
+            subscriptions = self._subscriptions.setdefault(channel, set())
+            subscriptions.add(subscription)
+            if len(subscriptions) == 1 and self._pubsub is not None:
+                await self._pubsub.subscribe(channel)
+        return subscription
+
+    async def unsubscribe(self, subscription: NotificationSubscription) -> None:
+        """Drop the subscription of a disconnected client.
+
+        Args:
+            subscription (NotificationSubscription): The subscription.
+        """
+        channel = self.events.channel(subscription.user_id)
+        async with self._lock:
+            subscriptions = self._subscriptions.get(channel, set())
+            subscriptions.discard(subscription)
+            if subscriptions:
+                return
+            self._subscriptions.pop(channel, None)
+            if self._pubsub is not None:
+                await self._pubsub.unsubscribe(channel)
+
+    async def _get_message(self) -> dict | None:
+        # Commands only write to the connection, the read runs unlocked.
+        pubsub = self._pubsub
+        if pubsub is not None and pubsub.subscribed:
+            return await pubsub.get_message(timeout=self.POLL_TIMEOUT)
+        # Nothing to read until a client subscribes.
+        await asyncio.sleep(self.POLL_TIMEOUT)
+        return None
+
+    async def _read(self) -> None:
+        while True:
+            try:
+                message = await self._get_message()
+                if message is None:
+                    continue
+                channel = message["channel"].decode()
+                data = message["data"].decode()
+                for subscription in tuple(self._subscriptions.get(channel, ())):
+                    subscription.push(data)
+            except asyncio.CancelledError:
+                raise
+            except Exception as error:
+                logger.warning(f"Notification stream reader failed: {error}")
+                await asyncio.sleep(self.RECONNECT_DELAY)
+                await self._resubscribe()
+
+    async def _resubscribe(self) -> None:
+        async with self._lock:
+            if self._pubsub is not None:
+                await self._pubsub.aclose()
+            self._pubsub = self.redis.pubsub()
+            if self._subscriptions:
+                await self._pubsub.subscribe(*self._subscriptions)
+
+    def start(self) -> None:
+        """Open the shared pub/sub connection and start reading it."""
+        if self._reader is None:
+            self._pubsub = self.redis.pubsub()
+            self._reader = asyncio.create_task(self._read())
+
+    async def stop(self) -> None:
+        """Stop reading and close the shared pub/sub connection."""
+        if self._reader is not None:
+            self._reader.cancel()
+            try:
+                await self._reader
+            except asyncio.CancelledError:
+                pass
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+        self._reader = None
+        self._pubsub = None
+        self._subscriptions.clear()
+
+    def stats(self) -> dict[str, int]:
+        """Get the hub gauges.
+
+        Returns:
+            dict[str, int]: Subscribed users and connected clients.
+        """
+        return {
+            "users": len(self._subscriptions),
+            "clients": sum(len(clients) for clients in self._subscriptions.values()),
+        }
+
+
+notification_stream_hub = NotificationStreamHub(
+    redis=redis_service,
+    events=notification_event_publisher,
+    queue_size=settings.NOTIFICATIONS_STREAM_QUEUE_SIZE,
+)
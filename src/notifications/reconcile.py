@@ -0,0 +1,70 @@
+"""Repair drift of the per-user notification and unread counters.
+
+Counters are changed after the database commit, so a crash between the two
+steps leaves them off by a few. Run it from `src` periodically, e.g. from cron:
+
+    python -m notifications.reconcile
+"""
+import asyncio
+import logging
+
+from sqlalchemy import func, select
+
+from database import AsyncSessionLocal
+from notifications.counters import (
+    NotificationCounterService,
+    notification_counter_service,
+)
+from notifications.models import Notification
+from users.models import User
+
+BATCH_SIZE = 1000
+
+logger = logging.getLogger(__name__)
+
+
+async def reconcile_counters(
+    counter: NotificationCounterService = notification_counter_service,
+    batch_size: int = BATCH_SIZE,
+) -> int:
+    """Recount notifications of every user and overwrite the counters.
+
+    Unread counters are recounted in the same pass.
+
+    Args:
+        counter: Notification counter service.
+        batch_size: Number of counters written per redis round trip.
+
+    Returns:
+        int: Number of reconciled users.
+    """
+    query = (
+        select(
+            User.id,
+            func.count(Notification.id),
+            func.count(Notification.id).filter(Notification.is_read.is_(False)),
+        )
+        .outerjoin(Notification, Notification.user_id == User.id)
+        .group_by(User.id)
+        .execution_options(yield_per=batch_size)
+    )
+    reconciled = 0
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(query)
+        async for partition in result.partitions(batch_size):
+            await counter.set_many(
+                totals={user_id: total for user_id, total, _ in partition},
+                unread={user_id: unread for user_id, _, unread in partition},
+            )
+            reconciled += len(partition)
+
+    return reconciled
+
+
+def main() -> None:
+    reconciled = asyncio.run(reconcile_counters())
+    logger.warning(f"Reconciled notification counters of {reconciled} users")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,64 @@
+from collections import Counter
+from typing import NamedTuple
+
+from sqlalchemy import delete, func, insert, literal, select, tuple_, update
 from sqlalchemy.exc import NoResultFound
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from base_repository import BaseRepository
+from base_repository import AsyncBaseRepository
+from notifications.aggregation import is_aggregated, upsert_statement
+from notifications.counters import (
+    NotificationCounterService,
+    notification_counter_service,
+)
+from notifications.events import (
+    NotificationEventPublisher,
+    notification_event_publisher,
+)
 from notifications.models import Notification
-from notifications.schemas import NotificationSchema
+from notifications.pagination import NotificationCursor
+from notifications.schemas import (
+    NotificationSchema,
+    NotificationType,
+    notification_list_adapter,
+)
+from settings import settings
+from users.models import User
+
+# Columns of NotificationSchema, list queries fetch them as plain rows.
+LIST_COLUMNS = (
+    Notification.id,
+    Notification.user_id,
+    Notification.type,
+    Notification.text,
+    Notification.created_at,
+    Notification.last_activity_at,
+    Notification.target,
+    Notification.actor_count,
+    Notification.last_actors,
+    Notification.is_read,
+)
+
 
+# Counter changes of a committed write, by user id.
+class NotificationChanges(NamedTuple):
+    inserted: Counter[int]
+    unread: Counter[int]
+    touched: Counter[int]
 
-class NotificationRepository(BaseRepository[NotificationSchema]):
-    def get(self, notification_id: int) -> NotificationSchema:
+
+class NotificationRepository(AsyncBaseRepository[NotificationSchema]):
+    def __init__(
+        self,
+        db: AsyncSession,
+        counter: NotificationCounterService = notification_counter_service,
+        events: NotificationEventPublisher = notification_event_publisher,
+    ):
+        super().__init__(db=db)
+        self._counter = counter
+        self._events = events
+
+    async def get(self, notification_id: int) -> NotificationSchema:
         """Get a notification by id.
 
         Args:
@@ -18,10 +70,8 @@ class NotificationRepository(BaseRepository[NotificationSchema]):
         Raises:
             NoResultFound: If notification not found.
         """
-        notification = (
-            self._db.query(Notification)
-            .filter(Notification.id == notification_id)
-            .first()
+        notification = await self._db.scalar(
+            select(Notification).where(Notification.id == notification_id)
         )
 
         if not notification:
@@ -29,16 +79,53 @@ class NotificationRepository(BaseRepository[NotificationSchema]):
 
         return NotificationSchema.model_validate(notification)
 
-    def delete(self, notification_id: int) -> None:
-        """Delete a notification by id.
+    async def delete_many(
+        self,
+        user_id: int,
+        ids: list[int] | None = None,
+        cursor: NotificationCursor | None = None,
+        type: NotificationType | None = None,
+    ) -> int:
+        """Delete user notifications with one DELETE scoped to the owner.
+
+        Exactly one of `ids`, `cursor` or `type` selects the notifications.
 
         Args:
-            user_uuid: Notification id.
+            user_id: Owner id.
+            ids: Ids of the notifications to delete.
+            cursor: Position of a notification, every older one is deleted.
+            type: Type of the notifications to delete.
+
+        Returns:
+            int: Number of deleted notifications.
+
+        Raises:
+            ValueError: If none of ids, cursor or type is passed.
         """
-        self._db.query(Notification).filter(Notification.id == notification_id).delete()
-        self._db.commit()
+        query = delete(Notification).where(Notification.user_id == user_id)
+        if ids is not None:
+            query = query.where(Notification.id.in_(ids))
+        elif cursor is not None:
+            query = query.where(
+                tuple_(Notification.last_activity_at, Notification.id)
+                < tuple_(cursor.last_activity_at, cursor.id)
+            )
+        elif type is not None:
+            query = query.where(Notification.type == type.value)
+        else:
+            raise ValueError("Pass exactly one of ids, cursor or type")
+        read_flags = (
+            await self._db.scalars(query.returning(Notification.is_read))
+        ).all()
+        await self._db.commit()
+
+        deleted = len(read_flags)
+        if deleted:
+            unread = deleted - sum(read_flags)
+            await self._counter.increment(user_id, -deleted, unread=-unread)
+        return deleted
 
-    def update(self, notification: NotificationSchema) -> NotificationSchema:
+    async def update(self, notification: NotificationSchema) -> NotificationSchema:
         """Update a notification by id.
 
         Args:
@@ -47,38 +134,195 @@ class NotificationRepository(BaseRepository[NotificationSchema]):
         Returns:
             Notification: NotificationSchema.
         """
-        self._db.query(Notification).filter(Notification.id == notification.id).update(
-            values=notification.model_dump(exclude_unset=True),
+        await self._db.execute(
+            update(Notification)
+            .where(Notification.id == notification.id)
+            .values(**notification.model_dump(exclude_unset=True, exclude={"actor"}))
         )  # noqa: WPS221
-        self._db.commit()
+        await self._db.commit()
 
-        notification = (
-            self._db.query(Notification)
-            .filter(Notification.id == notification.id)
-            .first()
+        notification = await self._db.scalar(
+            select(Notification).where(Notification.id == notification.id)
         )
 
         if not notification:
             raise NoResultFound("Notification not found")
 
-        return notification
+        return NotificationSchema.model_validate(notification)
+
+    async def _merge(
+        self, notification: NotificationSchema
+    ) -> tuple[NotificationSchema, bool, bool]:
+        row = (await self._db.execute(upsert_statement(notification))).one()
+        # A merge into a row that was read makes it unread again.
+        return NotificationSchema.model_validate(row), row.inserted, row.was_read
 
-    def add(self, notification: NotificationSchema) -> NotificationSchema:
+    async def add(self, notification: NotificationSchema) -> NotificationSchema:
         """Add a notification.
 
+        With aggregation enabled a like or repost of a target is merged into
+        the row of its time window instead of adding a new one.
+
         Args:
             notification: Notification data.
 
         Returns:
-            Notification: Notification.
+            Notification: Notification, the merged row when aggregated.
         """
-        notification = Notification(**notification.model_dump(exclude_unset=True))
+        if is_aggregated(notification):
+            notification, inserted, was_read = await self._merge(notification)
+            await self._db.commit()
+            # A merge does not change the count but still bumps the version.
+            await self._counter.increment(
+                notification.user_id, int(inserted), unread=int(inserted or was_read)
+            )
+            await self._events.created(notification)
+            return notification
+
+        values = notification.model_dump(exclude_unset=True, exclude={"actor"})
+        if notification.actor:
+            values["last_actors"] = [notification.actor]
+        notification = Notification(**values)
         self._db.add(notification)
-        self._db.commit()
+        await self._db.commit()
+        await self._db.refresh(notification)
+        await self._counter.increment(notification.user_id)
 
-        return NotificationSchema.model_validate(notification)
+        notification = NotificationSchema.model_validate(notification)
+        await self._events.created(notification)
+        return notification
+
+    async def add_many(
+        self,
+        notifications: list[NotificationSchema],
+        chunk_size: int = settings.NOTIFICATIONS_INSERT_CHUNK_SIZE,
+    ) -> int:
+        """Add notifications with multi-row inserts in one transaction.
+
+        Aggregated notifications are merged one upsert at a time in the same
+        transaction.
+
+        Args:
+            notifications: Notifications data.
+            chunk_size: Number of rows per INSERT statement.
+
+        Returns:
+            int: Number of accepted notifications, merged ones included.
+        """
+        if not notifications:
+            return 0
+
+        changes = await self.insert_many(notifications, chunk_size)
+        await self.publish_changes(changes)
+        return len(notifications)
+
+    async def insert_many(
+        self,
+        notifications: list[NotificationSchema],
+        chunk_size: int = settings.NOTIFICATIONS_INSERT_CHUNK_SIZE,
+    ) -> NotificationChanges:
+        """Write notifications and commit, without touching counters or events.
+
+        Pass the result to `publish_changes` once the rows are committed.
+
+        Args:
+            notifications: Notifications data.
+            chunk_size: Number of rows per INSERT statement.
+
+        Returns:
+            NotificationChanges: Per user counter changes of the write.
+        """
+        changes = NotificationChanges(Counter(), Counter(), Counter())
+        plain = []
+        for notification in notifications:
+            if is_aggregated(notification):
+                _, is_new, was_read = await self._merge(notification)
+                changes.inserted[notification.user_id] += int(is_new)
+                changes.unread[notification.user_id] += int(is_new or was_read)
+                changes.touched[notification.user_id] += 1
+            else:
+                plain.append(notification)
+
+        for start in range(0, len(plain), chunk_size):
+            chunk = plain[start : start + chunk_size]
+            await self._db.execute(
+                insert(Notification).values(
+                    [
+                        {
+                            "user_id": notification.user_id,
+                            "type": notification.type,
+                            "text": notification.text,
+                            "created_at": notification.created_at or func.now(),
+                            "last_activity_at": notification.created_at or func.now(),
+                            "target": notification.target,
+                            "last_actors": (
+                                [notification.actor] if notification.actor else []
+                            ),
+                        }
+                        for notification in chunk
+                    ]
+                )
+            )
+        await self._db.commit()
+
+        per_user = Counter(notification.user_id for notification in plain)
+        for counter in changes:
+            counter.update(per_user)
+        return changes
+
+    async def publish_changes(self, changes: NotificationChanges) -> None:
+        """Apply committed changes to the counters and notify the users.
+
+        Args:
+            changes: Result of `insert_many`.
+        """
+        for user_id in changes.touched:
+            await self._counter.increment(
+                user_id, changes.inserted[user_id], unread=changes.unread[user_id]
+            )
+        await self._events.created_many(dict(changes.touched))
+
+    async def add_for_users(
+        self, notification: NotificationSchema, *conditions, limit: int | None = None
+    ) -> list[int]:
+        """Add a copy of the notification for every user matching conditions.
+
+        Recipients are checked and notifications are written by one
+        INSERT ... SELECT FROM users, users that do not exist are skipped.
+
+        Args:
+            notification: Notification data, user_id is ignored.
+            conditions: Filters of recipients on the users table.
+            limit: Maximum number of recipients, taken in user id order.
+
+        Returns:
+            list[int]: Ids of users that received the notification.
+        """
+        recipients = (
+            select(
+                User.id,
+                literal(notification.type.value),
+                literal(notification.text),
+                func.now(),
+            )
+            .where(*conditions)
+            .order_by(User.id)
+            .limit(limit)
+        )
+        user_ids = (
+            await self._db.scalars(
+                insert(Notification)
+                .from_select(["user_id", "type", "text", "created_at"], recipients)
+                .returning(Notification.user_id)
+            )
+        ).all()
+        await self._db.commit()
+        await self._counter.increment_many(list(user_ids))
+        await self._events.created_many({user_id: 1 for user_id in user_ids})
 
-    def find(self, **kwargs) -> NotificationSchema:
+        return list(user_ids)
+
+    async def find(self, **kwargs) -> NotificationSchema:
         """Find a notification.
 
         Args:
@@ -87,30 +331,185 @@ class NotificationRepository(BaseRepository[NotificationSchema]):
         Returns:
             Notification: Notification.
         """
-        notification = self._db.query(Notification).filter_by(**kwargs).first()
+        notification = await self._db.scalar(
+            select(Notification).filter_by(**kwargs).limit(1)
+        )
         if notification:
             return NotificationSchema.model_validate(notification)
 
-    def find_with_pagging(self, offset: int = 1, **kwargs) -> list[NotificationSchema]:
-        """Find a notification.
+    async def version(self, user_id: int) -> int:
+        """Get the version of user notifications, it changes on every write.
+
+        Args:
+            user_id: Owner id.
+
+        Returns:
+            int: The version.
+        """
+        return await self._counter.get_version(user_id)
+
+    async def count(self, user_id: int) -> int:
+        """Count user notifications.
+
+        Served from the maintained counter, the table is only scanned the
+        first time the counter of a user is requested.
+
+        Args:
+            user_id: Owner id.
+
+        Returns:
+            int: Number of user notifications.
+        """
+        total = await self._counter.get(user_id)
+        if total is not None:
+            return total
+
+        total = await self._db.scalar(
+            select(func.count())
+            .select_from(Notification)
+            .where(Notification.user_id == user_id)
+        )
+        await self._counter.initialize(user_id, total)
+        return total
+
+    async def unread_count(self, user_id: int) -> int:
+        """Count unread user notifications.
+
+        Served from the maintained counter like `count`, a miss is counted
+        on `ix_notifications_user_id_unread`.
+
+        Args:
+            user_id: Owner id.
+
+        Returns:
+            int: Number of unread user notifications.
+        """
+        unread = await self._counter.get_unread(user_id)
+        if unread is not None:
+            return unread
+
+        unread = await self._db.scalar(
+            select(func.count())
+            .select_from(Notification)
+            .where(Notification.user_id == user_id, Notification.is_read.is_(False))
+        )
+        await self._counter.initialize_unread(user_id, unread)
+        return unread
+
+    async def mark_read(
+        self,
+        user_id: int,
+        ids: list[int] | None = None,
+        cursor: NotificationCursor | None = None,
+    ) -> int:
+        """Mark user notifications read with one UPDATE.
+
+        Args:
+            user_id: Owner id.
+            ids: Ids of the notifications to mark.
+            cursor: Position of a notification, it and every older one are
+                marked. Used when `ids` is None.
+
+        Returns:
+            int: Number of notifications that were unread.
+
+        Raises:
+            ValueError: If neither ids nor cursor is passed.
+        """
+        query = update(Notification).where(
+            Notification.user_id == user_id, Notification.is_read.is_(False)
+        )
+        if ids is not None:
+            query = query.where(Notification.id.in_(ids))
+        elif cursor is not None:
+            query = query.where(
+                tuple_(Notification.last_activity_at, Notification.id)
+                <= tuple_(cursor.last_activity_at, cursor.id)
+            )
+        else:
+            raise ValueError("Pass either ids or cursor")
+        result = await self._db.execute(query.values(is_read=True))
+        await self._db.commit()
+
+        if result.rowcount:
+            await self._counter.increment(user_id, 0, unread=-result.rowcount)
+        return result.rowcount
+
+    async def find_with_pagging(
+        self, offset: int = 0, limit: int = settings.NOTIFICATIONS_PAGE_SIZE, **kwargs
+    ) -> list[NotificationSchema]:
+        """Find a page of notifications by offset.
+
+        Kept for the `page` compatibility mode, prefer `find_with_cursor`.
 
         Args:
-            offset: page number,
+            offset: Number of notifications to skip.
+            limit: Page size.
             kwargs: Filters data.
 
         Returns:
-            Notification: Notification.
+            list[Notification]: Notifications, newest first.
+        """
+        rows = (
+            await self._db.execute(
+                select(*LIST_COLUMNS)
+                .select_from(Notification)
+                .filter_by(**kwargs)
+                .order_by(Notification.last_activity_at.desc(), Notification.id.desc())
+                .offset(offset)
+                .limit(limit)
+            )
+        ).all()
+        return notification_list_adapter.validate_python(rows, from_attributes=True)
+
+    async def find_with_cursor(
+        self,
+        user_id: int,
+        cursor: NotificationCursor | None = None,
+        limit: int = settings.NOTIFICATIONS_PAGE_SIZE,
+        unread_only: bool = False,
+    ) -> tuple[list[NotificationSchema], NotificationCursor | None]:
+        """Find a page of user notifications after the cursor.
+
+        Walks `ix_notifications_user_id_last_activity_at_id`, or the partial
+        `ix_notifications_user_id_unread` for unread ones, so the cost of a
+        page does not depend on how deep it is.
+
+        Args:
+            user_id: Owner id.
+            cursor: Position of the last notification of the previous page.
+            limit: Page size.
+            unread_only: Skip notifications that were read.
+
+        Returns:
+            tuple: Notifications, newest first, and the cursor of the next
+                page or None if this page is the last one.
         """
-        notifications = (
-            self._db.query(Notification)
-            .filter_by(**kwargs)
-            .offset(offset)
-            .limit(5)
-            .all()
+        query = select(*LIST_COLUMNS).where(Notification.user_id == user_id)
+        if unread_only:
+            query = query.where(Notification.is_read.is_(False))
+        if cursor is not None:
+            query = query.where(
+                tuple_(Notification.last_activity_at, Notification.id)
+                < tuple_(cursor.last_activity_at, cursor.id)
+            )
+        rows = (
+            await self._db.execute(
+                query.order_by(
+                    Notification.last_activity_at.desc(), Notification.id.desc()
+                ).limit(limit + 1)
+            )
+        ).all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = NotificationCursor(
+                last_activity_at=last.last_activity_at, id=last.id
+            )
+
+        notifications = notification_list_adapter.validate_python(
+            rows, from_attributes=True
         )
-        if notifications:
-            return [
-                NotificationSchema.model_validate(notification)
-                for notification in notifications
-            ]
-        return []
+        return notifications, next_cursor
@@ -1,66 +1,486 @@
+import asyncio
 from math import ceil
+from typing import Any
 
-from fastapi import APIRouter, Depends, status
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Body,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    WebSocket,
+    WebSocketDisconnect,
+    status,
+)
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 
-from dependencies import get_current_user, get_notification_repository
+from dependencies import (
+    get_current_user,
+    get_notification_repository,
+    get_stream_user,
+    get_user_by_stream_token,
+    verify_admin_token,
+)
+from notifications.broadcast import broadcast_job_service, run_broadcast
+from notifications.conditional import etag_matches, make_etag, wait_for_version_change
+from notifications.exceptions import (
+    BroadcastJobNotFoundHTTPException,
+    InvalidCursorHTTPException,
+)
+from notifications.ingest import notification_ingest_service
+from notifications.pagination import NotificationCursor, decode_cursor, encode_cursor
+from notifications.realtime import notification_stream_hub
 from notifications.repostiory import NotificationRepository
 from notifications.schemas import (
+    BroadcastJobSchema,
+    NotificationBatchItemError,
+    NotificationBatchResponse,
+    NotificationBroadcastSchema,
+    NotificationBulkDeleteResponse,
+    NotificationBulkDeleteSchema,
+    NotificationCreateSchema,
     NotificationDeleteSchema,
+    NotificationMarkReadResponse,
+    NotificationMarkReadSchema,
     NotificationPagginateSchema,
     NotificationSchema,
+    NotificationUnreadCountSchema,
+    notification_page_adapter,
 )
-from users.schemas import UserSchema
+from settings import settings
+from users.schemas import UserProfileSchema
 
 router = APIRouter()
 
+HEARTBEAT_MESSAGE = '{"event": "heartbeat"}'
+
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
 async def create_notification(
-    notification_data: NotificationSchema,
+    notification_data: NotificationCreateSchema,
     notification_repository: NotificationRepository = Depends(
         get_notification_repository
     ),
-    current_user: UserSchema = Depends(get_current_user),
+    current_user: UserProfileSchema = Depends(get_current_user),
 ):
-    notification_data.user_id = current_user.id
-    notification_repository.add(notification_data)
+    notification = NotificationSchema(
+        user_id=current_user.id, **notification_data.model_dump(exclude_unset=True)
+    )
+    if settings.NOTIFICATIONS_WRITE_BEHIND:
+        await notification_ingest_service.enqueue(notification)
+        return Response(status_code=status.HTTP_202_ACCEPTED)
+
+    await notification_repository.add(notification)
+
+
+@router.post(
+    "/batch",
+    status_code=status.HTTP_201_CREATED,
+    response_model=NotificationBatchResponse,
+)
+async def create_notifications_batch(
+    items: list[dict[str, Any]] = Body(
+        ..., max_length=settings.NOTIFICATIONS_BATCH_MAX_ITEMS
+    ),
+    notification_repository: NotificationRepository = Depends(
+        get_notification_repository
+    ),
+    current_user: UserProfileSchema = Depends(get_current_user),
+):
+    """Create many notifications at once.
+
+    Valid items are written in one transaction, invalid ones are reported
+    back by their index and do not prevent the rest from being written.
+
+    Args:
+        items: Notifications data.
+        notification_repository: Notification repository.
+        current_user: Current user.
+
+    Returns:
+        NotificationBatchResponse: Number of created notifications and errors.
+    """
+    notifications = []
+    failed = []
+    for index, item in enumerate(items):
+        try:
+            notification_data = NotificationCreateSchema.model_validate(item)
+        except ValidationError as error:
+            failed.append(
+                NotificationBatchItemError(
+                    index=index,
+                    errors=error.errors(include_url=False, include_context=False),
+                )
+            )
+            continue
+        notifications.append(
+            NotificationSchema(
+                user_id=current_user.id,
+                **notification_data.model_dump(exclude_unset=True),
+            )
+        )
+
+    inserted = await notification_repository.add_many(notifications)
+    return NotificationBatchResponse(inserted=inserted, failed=failed)
+
+
+@router.post(
+    "/broadcast",
+    status_code=status.HTTP_202_ACCEPTED,
+    response_model=BroadcastJobSchema,
+    dependencies=[Depends(verify_admin_token)],
+)
+async def create_broadcast(
+    broadcast: NotificationBroadcastSchema,
+    background_tasks: BackgroundTasks,
+    current_user: UserProfileSchema = Depends(get_current_user),
+):
+    """Send one notification to many recipients.
+
+    Requires the X-Admin-Token header, since a query without a username
+    prefix reaches every user. The notifications are written in the
+    background, poll the returned job to follow the progress.
+
+    Args:
+        broadcast: Notification data and recipients.
+        background_tasks: Background tasks.
+        current_user: Current user.
+
+    Returns:
+        BroadcastJobSchema: The started job.
+    """
+    total = (
+        len(broadcast.recipient_ids) if broadcast.recipient_ids is not None else None
+    )
+    job = await broadcast_job_service.create(owner_id=current_user.id, total=total)
+    background_tasks.add_task(run_broadcast, job.job_id, broadcast)
+    return job
+
+
+@router.get(
+    "/broadcast/{job_id}",
+    status_code=status.HTTP_200_OK,
+    response_model=BroadcastJobSchema,
+)
+async def get_broadcast(
+    job_id: str,
+    current_user: UserProfileSchema = Depends(get_current_user),
+):
+    """Get the progress of a broadcast job.
+
+    Args:
+        job_id: The job id.
+        current_user: Current user.
+
+    Returns:
+        BroadcastJobSchema: The job.
+
+    Raises:
+        BroadcastJobNotFoundHTTPException: If job does not exist.
+    """
+    job = await broadcast_job_service.get(job_id=job_id, owner_id=current_user.id)
+    if job is None:
+        raise BroadcastJobNotFoundHTTPException("Broadcast job not found")
+    return job
 
 
 @router.get(
     "/", status_code=status.HTTP_200_OK, response_model=NotificationPagginateSchema
 )
 async def get_user_notifications(
-    page: int = 1,
-    current_user: UserSchema = Depends(get_current_user),
+    page: int | None = None,
+    cursor: str | None = None,
+    limit: int = Query(
+        default=settings.NOTIFICATIONS_PAGE_SIZE,
+        ge=1,
+        le=settings.NOTIFICATIONS_MAX_PAGE_SIZE,
+    ),
+    wait: float = Query(default=0, ge=0, le=settings.NOTIFICATIONS_LONG_POLL_MAX),
+    unread: bool = False,
+    if_none_match: str | None = Header(default=None),
+    current_user: UserProfileSchema = Depends(get_current_user),
     notification_repository: NotificationRepository = Depends(
         get_notification_repository
     ),
 ):
-    if page < 1:
-        page = 1
+    """Get user notifications, newest first.
+
+    Pass `next_cursor` from the previous response as `cursor` to get the next
+    page. `page` is kept for old clients and falls back to offset pagination.
+
+    Responses carry an ETag. A request with a matching If-None-Match gets 304
+    without touching the database, and with `wait` it is held until the
+    notifications change or `wait` seconds pass.
+
+    Args:
+        page: Page number, compatibility mode.
+        cursor: Opaque cursor of the previous page.
+        limit: Page size.
+        wait: Seconds to wait for changes when the client copy is fresh.
+        unread: Only unread notifications, cursor mode only.
+        if_none_match: ETag of the client copy.
+        current_user: Current user.
+        notification_repository: Notification repository.
+
+    Returns:
+        NotificationPagginateSchema: Notifications page.
+
+    Raises:
+        InvalidCursorHTTPException: If cursor is malformed.
+    """
+    version = await notification_repository.version(user_id=current_user.id)
+    etag = make_etag(current_user.id, version, page, cursor, limit, unread)
+    if etag_matches(if_none_match, etag) and wait:
+        await notification_repository.release()
+        version = await wait_for_version_change(
+            user_id=current_user.id,
+            version=version,
+            timeout=wait,
+            get_version=notification_repository.version,
+        )
+        etag = make_etag(current_user.id, version, page, cursor, limit, unread)
+    if etag_matches(if_none_match, etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers={"ETag": etag, "Cache-Control": "private, no-cache"},
+        )
 
-    offset = (page - 1) * 5
-    notifications = notification_repository.find_with_pagging(
-        offset=offset, user_id=current_user.id
+    if page is not None and cursor is None:
+        page = max(page, 1)
+        notifications = await notification_repository.find_with_pagging(
+            offset=(page - 1) * limit, limit=limit, user_id=current_user.id
+        )
+        next_cursor = None
+        if len(notifications) == limit:
+            last = notifications[-1]
+            next_cursor = NotificationCursor(
+                last_activity_at=last.last_activity_at, id=last.id
+            )
+    else:
+        try:
+            position = decode_cursor(cursor) if cursor else None
+        except ValueError:
+            raise InvalidCursorHTTPException("Malformed cursor")
+        notifications, next_cursor = await notification_repository.find_with_cursor(
+            user_id=current_user.id,
+            cursor=position,
+            limit=limit,
+            unread_only=unread,
+        )
+
+    total = await notification_repository.count(user_id=current_user.id)
+    # Items are validated by the repository, the page is encoded to JSON bytes
+    # once instead of being validated again by `response_model`.
+    content = notification_page_adapter.dump_json(
+        NotificationPagginateSchema.model_construct(
+            items=notifications,
+            total=total,
+            pages=ceil(total / limit),
+            current_page=page or 1,
+            next_cursor=encode_cursor(next_cursor) if next_cursor else None,
+        )
+    )
+    return Response(
+        content=content,
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": "private, no-cache"},
     )
-    total_pages = ceil(len(notifications) / 5)
-    return NotificationPagginateSchema(
-        items=notifications,
-        pages=total_pages,
-        current_page=page,
+
+
+@router.post(
+    "/read", status_code=status.HTTP_200_OK, response_model=NotificationMarkReadResponse
+)
+async def mark_notifications_read(
+    selection: NotificationMarkReadSchema,
+    current_user: UserProfileSchema = Depends(get_current_user),
+    notification_repository: NotificationRepository = Depends(
+        get_notification_repository
+    ),
+):
+    """Mark user notifications read.
+
+    Pass `ids` to mark these notifications, or a `cursor` to mark the
+    notification it points to and every older one.
+
+    Args:
+        selection: Notification ids or cursor.
+        current_user: Current user.
+        notification_repository: Notification repository.
+
+    Returns:
+        NotificationMarkReadResponse: Number of marked and still unread
+            notifications.
+
+    Raises:
+        InvalidCursorHTTPException: If cursor is malformed.
+    """
+    position = None
+    if selection.cursor is not None:
+        try:
+            position = decode_cursor(selection.cursor)
+        except ValueError:
+            raise InvalidCursorHTTPException("Malformed cursor")
+
+    marked = await notification_repository.mark_read(
+        user_id=current_user.id, ids=selection.ids, cursor=position
     )
+    unread = await notification_repository.unread_count(user_id=current_user.id)
+    return NotificationMarkReadResponse(marked=marked, unread=unread)
+
+
+@router.get(
+    "/unread_count",
+    status_code=status.HTTP_200_OK,
+    response_model=NotificationUnreadCountSchema,
+)
+async def get_unread_count(
+    current_user: UserProfileSchema = Depends(get_current_user),
+    notification_repository: NotificationRepository = Depends(
+        get_notification_repository
+    ),
+):
+    """Get the number of unread user notifications.
+
+    Args:
+        current_user: Current user.
+        notification_repository: Notification repository.
+
+    Returns:
+        NotificationUnreadCountSchema: Number of unread notifications.
+    """
+    unread = await notification_repository.unread_count(user_id=current_user.id)
+    return NotificationUnreadCountSchema(unread=unread)
 
 
 @router.delete("/", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_user_notification(
     notification_id: NotificationDeleteSchema,
-    current_user: UserSchema = Depends(get_current_user),
+    current_user: UserProfileSchema = Depends(get_current_user),
     notification_repository: NotificationRepository = Depends(
         get_notification_repository
     ),
 ):
-    notification = notification_repository.find(
-        user_id=current_user.id, id=notification_id.id
+    await notification_repository.delete_many(
+        user_id=current_user.id, ids=[notification_id.id]
+    )
+
+
+@router.delete(
+    "/bulk",
+    status_code=status.HTTP_200_OK,
+    response_model=NotificationBulkDeleteResponse,
+)
+async def delete_user_notifications(
+    selection: NotificationBulkDeleteSchema,
+    current_user: UserProfileSchema = Depends(get_current_user),
+    notification_repository: NotificationRepository = Depends(
+        get_notification_repository
+    ),
+):
+    """Delete many user notifications at once.
+
+    Pass `ids` to delete these notifications, a `cursor` to delete every
+    notification older than the one it points to, or a `type` to delete
+    every notification of that type.
+
+    Args:
+        selection: Notification ids, cursor or type.
+        current_user: Current user.
+        notification_repository: Notification repository.
+
+    Returns:
+        NotificationBulkDeleteResponse: Number of deleted notifications.
+
+    Raises:
+        InvalidCursorHTTPException: If cursor is malformed.
+    """
+    position = None
+    if selection.cursor is not None:
+        try:
+            position = decode_cursor(selection.cursor)
+        except ValueError:
+            raise InvalidCursorHTTPException("Malformed cursor")
+
+    deleted = await notification_repository.delete_many(
+        user_id=current_user.id,
+        ids=selection.ids,
+        cursor=position,
+        type=selection.type,
+    )
+    return NotificationBulkDeleteResponse(deleted=deleted)
+
+
+@router.websocket("/ws")
+async def notifications_websocket(websocket: WebSocket, token: str):
+    """Push new notifications of the user over a WebSocket.
+
+    Every message is a JSON event, a heartbeat is sent when there is nothing
+    to push. Clients that fall behind are closed with 1013 and should re-sync
+    with GET /notifications/ after reconnecting.
+
+    Args:
+        websocket: The WebSocket.
+        token: JWT access token.
+    """
+    try:
+        user = await get_user_by_stream_token(token=token)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    heartbeat = settings.NOTIFICATIONS_STREAM_HEARTBEAT
+    subscription = await notification_stream_hub.subscribe(user.id)
+    try:
+        while True:
+            message = await subscription.get(timeout=heartbeat)
+            if subscription.overflowed:
+                await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+                return
+            await asyncio.wait_for(
+                websocket.send_text(message or HEARTBEAT_MESSAGE), timeout=heartbeat
+            )
+    except (WebSocketDisconnect, asyncio.TimeoutError, RuntimeError):
+        pass
+    finally:
+        await notification_stream_hub.unsubscribe(subscription)
+
+
+@router.get("/stream", status_code=status.HTTP_200_OK)
+async def notifications_event_stream(
+    request: Request,
+    current_user: UserProfileSchema = Depends(get_stream_user),
+):
+    """Push new notifications of the user as server-sent events.
+
+    Args:
+        request: The request object.
+        current_user: Current user.
+
+    Returns:
+        StreamingResponse: The event stream.
+    """
+    heartbeat = settings.NOTIFICATIONS_STREAM_HEARTBEAT
+
+    async def events():
+        subscription = await notification_stream_hub.subscribe(current_user.id)
+        try:
+            while not await request.is_disconnected():
+                message = await subscription.get(timeout=heartbeat)
+                if subscription.overflowed:
+                    yield "event: overflow\ndata: {}\n\n"
+                    return
+                yield f"data: {message}\n\n" if message else ": heartbeat\n\n"
+        finally:
+            await notification_stream_hub.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
-    if notification:
-        notification_repository.delete(notification_id=notification.id)
@@ -1,8 +1,11 @@
 from datetime import datetime
 from enum import Enum
-from typing import Optional
+from typing import Any, Optional
+
+from pydantic import Field, TypeAdapter, field_validator, model_validator
 
 from base_schema import BaseSchema, Pagginate
+from settings import settings
 
 
 class NotificationType(str, Enum):
@@ -15,13 +18,129 @@ class NotificationSchema(BaseSchema):
     id: Optional[int] = None
     user_id: Optional[int] = None
     type: NotificationType
-    text: str
+    text: str = Field(max_length=255)
     created_at: Optional[datetime] = None
+    last_activity_at: Optional[datetime] = None
+    target: Optional[str] = Field(default=None, max_length=255)
+    actor: Optional[str] = Field(default=None, max_length=255)
+    actor_count: int = 1
+    last_actors: list[str] = []
+    is_read: bool = False
+
+
+# Notification data accepted from clients, the owner, time, read state and
+# aggregation counters are set by the server and rejected when passed.
+class NotificationCreateSchema(BaseSchema):
+    type: NotificationType
+    text: str = Field(max_length=255)
+    target: Optional[str] = Field(default=None, max_length=255)
+    actor: Optional[str] = Field(default=None, max_length=255)
+
+    class Config:
+        extra = "forbid"
 
 
 class NotificationPagginateSchema(Pagginate):
     items: list[NotificationSchema] = []
+    total: int = 0
+    next_cursor: Optional[str] = None
+
+
+# Built once, list responses validate rows and encode pages through them.
+notification_list_adapter = TypeAdapter(list[NotificationSchema])
+notification_page_adapter = TypeAdapter(NotificationPagginateSchema)
 
 
 class NotificationDeleteSchema(BaseSchema):
     id: int
+
+
+class NotificationBulkDeleteSchema(BaseSchema):
+    ids: Optional[list[int]] = Field(
+        default=None, max_length=settings.NOTIFICATIONS_BATCH_MAX_ITEMS
+    )
+    cursor: Optional[str] = None
+    type: Optional[NotificationType] = None
+
+    @model_validator(mode="after")
+    def check_selection(self) -> "NotificationBulkDeleteSchema":
+        selected = [self.ids, self.cursor, self.type]
+        if sum(value is not None for value in selected) != 1:
+            raise ValueError("Pass exactly one of ids, cursor or type")
+        return self
+
+
+class NotificationBulkDeleteResponse(BaseSchema):
+    deleted: int = 0
+
+
+class NotificationMarkReadSchema(BaseSchema):
+    ids: Optional[list[int]] = Field(
+        default=None, max_length=settings.NOTIFICATIONS_MAX_PAGE_SIZE
+    )
+    cursor: Optional[str] = None
+
+    @model_validator(mode="after")
+    def check_selection(self) -> "NotificationMarkReadSchema":
+        if (self.ids is None) == (self.cursor is None):
+            raise ValueError("Pass either ids or cursor")
+        return self
+
+
+class NotificationMarkReadResponse(BaseSchema):
+    marked: int = 0
+    unread: int = 0
+
+
+class NotificationUnreadCountSchema(BaseSchema):
+    unread: int = 0
+
+
+class NotificationBatchItemError(BaseSchema):
+    index: int
+    errors: list[dict[str, Any]]
+
+
+class NotificationBatchResponse(BaseSchema):
+    inserted: int = 0
+    failed: list[NotificationBatchItemError] = []
+
+
+class NotificationRecipientQuery(BaseSchema):
+    username_prefix: Optional[str] = None
+
+
+class NotificationBroadcastSchema(BaseSchema):
+    type: NotificationType
+    text: str = Field(max_length=255)
+    recipient_ids: Optional[list[int]] = Field(
+        default=None, max_length=settings.NOTIFICATIONS_BROADCAST_MAX_RECIPIENTS
+    )
+    recipient_query: Optional[NotificationRecipientQuery] = None
+
+    @field_validator("recipient_ids")
+    @classmethod
+    def dedupe_recipient_ids(cls, value: list[int] | None) -> list[int] | None:
+        # The job total must match the processed count of unique recipients.
+        return None if value is None else list(dict.fromkeys(value))
+
+    @model_validator(mode="after")
+    def check_recipients(self) -> "NotificationBroadcastSchema":
+        if (self.recipient_ids is None) == (self.recipient_query is None):
+            raise ValueError("Pass either recipient_ids or recipient_query")
+        return self
+
+
+class BroadcastJobStatus(str, Enum):
+    pending = "pending"
+    running = "running"
+    done = "done"
+    failed = "failed"
+
+
+class BroadcastJobSchema(BaseSchema):
+    job_id: str
+    status: BroadcastJobStatus
+    total: Optional[int] = None
+    processed: int = 0
+    inserted: int = 0
@@ -4,11 +4,12 @@ from datetime import datetime, timedelta
 from typing import Any
 
 from jose import JWTError, jwt
-from passlib.handlers.pbkdf2 import pbkdf2_sha256
 
 from services.authorization.authorization import TokenType, token_whitelist_service
 from services.authorization.exceptions import TokenHTTPException
-from services.authorization.schemas import Token, TypeOfToken
+from services.authorization.schemas import Token, TokenPair, TypeOfToken
+from services.authorization.token_cache import verified_token_cache
+from services.hashing import password_hashing_service
 from settings import settings
 
 
@@ -40,10 +41,10 @@ def decode_private_public_key_for_jwt(encoded_key: str):
     return base64.b64decode(encoded_key).decode("utf-8")
 
 
-async def create_access_token(
+def encode_token(
     username: str, delta: timedelta = None, is_refresh: bool = False
 ) -> str:
-    """Create access token.
+    """Encode a JWT token without whitelisting it.
 
     Args:
         username: User name.
@@ -51,21 +52,36 @@ async def create_access_token(
         is_refresh: Is refresh token.
 
     Returns:
-        str: Access token.
+        str: Encoded token.
     """
-    expiration_time = get_expiration_time(delta=delta)
-    refresh_token_expiration_in_seconds = settings.REFRESH_TOKEN_EXPIRE_MINUTES * 60
-    access_token_expiration_in_seconds = settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
-
-    token = jwt.encode(
+    return jwt.encode(
         claims=Token(
             sub=username,
-            exp=expiration_time,
+            exp=get_expiration_time(delta=delta),
             type=TypeOfToken.refresh if is_refresh else TypeOfToken.access,
         ).model_dump(),
         key=settings.SECRET_KEY,
         algorithm=settings.ALGORITHM,
     )
+
+
+async def create_access_token(
+    username: str, delta: timedelta = None, is_refresh: bool = False
+) -> str:
+    """Create access token.
+
+    Args:
+        username: User name.
+        delta: Time delta to expire.
+        is_refresh: Is refresh token.
+
+    Returns:
+        str: Access token.
+    """
+    refresh_token_expiration_in_seconds = settings.REFRESH_TOKEN_EXPIRE_MINUTES * 60
+    access_token_expiration_in_seconds = settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
+    token = encode_token(username=username, delta=delta, is_refresh=is_refresh)
     await token_whitelist_service.add(
         token=token,
         username=username,
@@ -78,6 +94,31 @@ async def create_access_token(
     return token
 
 
+async def create_token_pair(username: str, delta: timedelta = None) -> TokenPair:
+    """Create access and refresh tokens and whitelist both in one round trip.
+
+    Args:
+        username: User name.
+        delta: Time delta to expire.
+
+    Returns:
+        TokenPair: Access and refresh tokens.
+    """
+    token_pair = TokenPair(
+        access_token=encode_token(username=username, delta=delta, is_refresh=False),
+        refresh_token=encode_token(username=username, delta=delta, is_refresh=True),
+    )
+    await token_whitelist_service.add_pair(
+        access_token=token_pair.access_token,
+        refresh_token=token_pair.refresh_token,
+        username=username,
+        access_expiration_time=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        refresh_expiration_time=settings.REFRESH_TOKEN_EXPIRE_MINUTES * 60,
+    )
+
+    return token_pair
+
+
 def decode_token(token: str) -> dict[str, Any]:
     """Decode JWT token.
 
@@ -106,6 +147,10 @@ def get_token_data(token: str) -> Token:
     Raises:
         WrongCredentialsHTTPException: If token is invalid.
     """
+    token_data = verified_token_cache.get(token)
+    if token_data is not None:
+        return token_data
+
     try:
         payload = decode_token(token=token)
     except JWTError:  # noqa: WPS329
@@ -114,11 +159,13 @@ def get_token_data(token: str) -> Token:
     if username is None:
         raise TokenHTTPException("Token is not in the whitelist")
 
-    return Token(sub=username, exp=payload.get("exp"), type=payload.get("type"))
+    token_data = Token(sub=username, exp=payload.get("exp"), type=payload.get("type"))
+    verified_token_cache.set(token, token_data)
+    return token_data
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify password.
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verify password in the hashing workers.
 
     Args:
         plain_password: Plain password.
@@ -127,11 +174,11 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     Returns:
         bool: True if password is correct, False otherwise.
     """
-    return pbkdf2_sha256.verify(plain_password, hashed_password)
+    return await password_hashing_service.verify(plain_password, hashed_password)
 
 
-def get_password_hash(password: str) -> str:
-    """Get password hash.
+async def get_password_hash(password: str) -> str:
+    """Get password hash from the hashing workers.
 
     Args:
         password: Password.
@@ -139,4 +186,16 @@ def get_password_hash(password: str) -> str:
     Returns:
         str: Password hash.
     """
-    return pbkdf2_sha256.hash(password)
+    return await password_hashing_service.hash(password)
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Check if the password hash was made with an outdated cost.
+
+    Args:
+        hashed_password: Hashed password.
+
+    Returns:
+        bool: True if password should be hashed again.
+    """
+    return password_hashing_service.needs_rehash(hashed_password)
@@ -1,5 +1,6 @@
 from enum import Enum, auto
 
+from services.authorization.token_cache import verified_token_cache
 from services.redis import RedisService, redis_service
 
 
@@ -21,6 +22,18 @@ class TokenWhitelistService:
         """
         self.redis = redis
 
+    def key(self, token_type: TokenType, username: str) -> str:
+        """Get the whitelist key of a user token.
+
+        Args:
+            token_type (TokenType): The token type.
+            username (str): The user name.
+
+        Returns:
+            str: The whitelist key.
+        """
+        return f"{self.TOKEN_PREFIX}{token_type}_{username}"
+
     async def add(
         self, token: str, username: str, expiration_time: int, token_type: TokenType
     ) -> None:
@@ -33,21 +46,56 @@ class TokenWhitelistService:
             token_type (TokenType): The token type.
         """
         await self.redis.set(
-            f"{self.TOKEN_PREFIX}{token_type}_{username}",
+            self.key(token_type, username),
             token,
             expire=expiration_time,
         )
 
+    async def add_pair(
+        self,
+        access_token: str,
+        refresh_token: str,
+        username: str,
+        access_expiration_time: int,
+        refresh_expiration_time: int,
+    ) -> None:
+        """Add an access and refresh token pair to the whitelist at once.
+
+        Args:
+            access_token (str): The access token.
+            refresh_token (str): The refresh token.
+            username (str): The user name.
+            access_expiration_time (int): The access token expiration in seconds.
+            refresh_expiration_time (int): The refresh token expiration in seconds.
+        """
+        await self.redis.set_many_with_expire(
+            [
+                (
+                    self.key(TokenType.ACCESS, username),
+                    access_token,
+                    access_expiration_time,
+                ),
+                (
+                    self.key(TokenType.REFRESH, username),
+                    refresh_token,
+                    refresh_expiration_time,
+                ),
+            ]
+        )
+
     async def clear_user_tokens(self, username: str) -> None:
         """Clear all tokens for a user.
 
         Args:
             username (str): The user name.
         """
-        access_token_key = f"{self.TOKEN_PREFIX}{TokenType.ACCESS}_{username}"
-        refresh_token_key = f"{self.TOKEN_PREFIX}{TokenType.REFRESH}_{username}"
-        await self.redis.delete(access_token_key)
-        await self.redis.delete(refresh_token_key)
+        verified_token_cache.evict_user(username)
+        await self.redis.delete_many(
+            [
+                self.key(TokenType.ACCESS, username),
+                self.key(TokenType.REFRESH, username),
+            ]
+        )
 
     async def check_token_on_the_whitelist(self, token: str, username: str) -> bool:
         """Check token on the whitelist.
@@ -59,8 +107,12 @@ class TokenWhitelistService:
         Returns:
             bool: True if token is on the whitelist.
         """
-        access_token = await self.redis.get(key=f"JWT_{TokenType.ACCESS}_{username}")
-        refresh_token = await self.redis.get(key=f"JWT_{TokenType.REFRESH}_{username}")
+        access_token, refresh_token = await self.redis.mget(
+            [
+                self.key(TokenType.ACCESS, username),
+                self.key(TokenType.REFRESH, username),
+            ]
+        )
 
         access_token_decoded = access_token.decode() if access_token else None
         refresh_token_decoded = refresh_token.decode() if refresh_token else None
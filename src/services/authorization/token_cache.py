@@ -0,0 +1,86 @@
+import hashlib
+import time
+
+from services.authorization.schemas import Token
+from services.cache import TTLCache
+from settings import settings
+
+
+class VerifiedTokenCache:
+    def __init__(self, max_size: int):
+        """Initialize the per-worker cache of verified tokens.
+
+        Args:
+            max_size (int): Maximum number of cached tokens.
+        """
+        self._cache: TTLCache[str, Token] = TTLCache(
+            max_size=max_size, ttl=0, on_evict=self._forget_digest
+        )
+        # Holds only digests that are in the cache, so it is bounded by it.
+        self._digests_by_user: dict[str, set[str]] = {}
+
+    @staticmethod
+    def digest(token: str) -> str:
+        """Get the cache key of a token.
+
+        Args:
+            token (str): The token.
+
+        Returns:
+            str: SHA-256 digest of the token.
+        """
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Token | None:
+        """Get the verified data of a token.
+
+        Args:
+            token (str): The token.
+
+        Returns:
+            Token | None: Token data, None if it is not cached or expired.
+        """
+        return self._cache.get(self.digest(token))
+
+    def set(self, token: str, token_data: Token) -> None:
+        """Cache the verified data of a token until the token expires.
+
+        Args:
+            token (str): The token.
+            token_data (Token): Verified token data.
+        """
+        ttl = token_data.exp.timestamp() - time.time()
+        if ttl <= 0:
+            return
+
+        digest = self.digest(token)
+        self._digests_by_user.setdefault(token_data.sub, set()).add(digest)
+        self._cache.set(digest, token_data, ttl=ttl)
+
+    def _forget_digest(self, digest: str, token_data: Token) -> None:
+        digests = self._digests_by_user.get(token_data.sub)
+        if digests is None:
+            return
+        digests.discard(digest)
+        if not digests:
+            del self._digests_by_user[token_data.sub]
+
+    def evict_user(self, username: str) -> None:
+        """Drop every cached token of a user.
+
+        Args:
+            username (str): The user name.
+        """
+        for digest in self._digests_by_user.pop(username, ()):
+            self._cache.delete(digest)
+
+    def stats(self) -> dict[str, int]:
+        """Get the cache counters.
+
+        Returns:
+            dict[str, int]: Size, hits and misses.
+        """
+        return self._cache.stats()
+
+
+verified_token_cache = VerifiedTokenCache(max_size=settings.TOKEN_CACHE_SIZE)
@@ -0,0 +1,104 @@
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, TypeVar
+
+KeyT = TypeVar("KeyT", bound=Hashable)
+ValueT = TypeVar("ValueT")
+
+
+class TTLCache(Generic[KeyT, ValueT]):
+    def __init__(
+        self,
+        max_size: int,
+        ttl: float,
+        on_evict: Callable[[KeyT, ValueT], None] | None = None,
+    ):
+        """Initialize a bounded in-process LRU cache with expiring entries.
+
+        Args:
+            max_size (int): Maximum number of entries.
+            ttl (float): Default entry time to live in seconds.
+            on_evict (Callable | None): Called with the key and value of
+                entries dropped as expired or least recently used.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.on_evict = on_evict
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[KeyT, tuple[float, ValueT]] = OrderedDict()
+
+    def get(self, key: KeyT) -> ValueT | None:
+        """Get a live entry and mark it as recently used.
+
+        Args:
+            key (KeyT): The key.
+
+        Returns:
+            ValueT | None: The value, None if it is missing or expired.
+        """
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+                self._evicted(key, entry[1])
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: KeyT, value: ValueT, ttl: float | None = None) -> None:
+        """Add an entry, evicting the least recently used one when full.
+
+        Args:
+            key (KeyT): The key.
+            value (ValueT): The value.
+            ttl (float | None): Entry time to live in seconds.
+        """
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            evicted_key, (_, evicted_value) = self._entries.popitem(last=False)
+            self._evicted(evicted_key, evicted_value)
+
+    def _evicted(self, key: KeyT, value: ValueT) -> None:
+        if self.on_evict is not None:
+            self.on_evict(key, value)
+
+    def peek(self, key: KeyT) -> ValueT | None:
+        """Get an entry without touching counters or recency.
+
+        Args:
+            key (KeyT): The key.
+
+        Returns:
+            ValueT | None: The value, None if it is missing.
+        """
+        entry = self._entries.get(key)
+        return entry[1] if entry is not None else None
+
+    def delete(self, key: KeyT) -> None:
+        """Drop an entry.
+
+        Args:
+            key (KeyT): The key.
+        """
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict[str, int]:
+        """Get the cache counters.
+
+        Returns:
+            dict[str, int]: Size, hits and misses.
+        """
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,139 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+from passlib.handlers.pbkdf2 import pbkdf2_sha256
+
+from settings import settings
+
+
+def _hash_password(password: str, rounds: int) -> str:
+    return pbkdf2_sha256.using(rounds=rounds).hash(password)
+
+
+def _verify_password(password: str, hashed_password: str) -> bool:
+    return pbkdf2_sha256.verify(password, hashed_password)
+
+
+class PasswordHashingService:
+    def __init__(
+        self,
+        rounds: int,
+        executor_type: str = "process",
+        max_workers: int = 2,
+        max_pending: int = 64,
+    ):
+        """Initialize the password hashing service.
+
+        Args:
+            rounds (int): PBKDF2 rounds of new hashes.
+            executor_type (str): "process" or "thread".
+            max_workers (int): Number of hashing workers.
+            max_pending (int): Number of calls submitted to the workers at
+                once, the rest wait in the event loop.
+        """
+        self.rounds = rounds
+        self.executor_type = executor_type
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor: Executor | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+        self._submitted = 0
+        self._waiting = 0
+        self._completed = 0
+
+    def start(self) -> None:
+        """Start the workers, called from the app lifespan."""
+        if self._executor is not None:
+            return
+        if self.executor_type == "thread":
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="password-hashing"
+            )
+        else:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        self._semaphore = asyncio.Semaphore(self.max_pending)
+
+    def shutdown(self) -> None:
+        """Stop the workers, called from the app lifespan."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+        self._semaphore = None
+
+    async def _run(self, func, *args):
+        self.start()
+        self._waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+
+        self._submitted += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._executor, func, *args
+            )
+        finally:
+            self._submitted -= 1
+            self._completed += 1
+            self._semaphore.release()
+
+    async def hash(self, password: str) -> str:
+        """Hash a password with the configured cost.
+
+        Args:
+            password (str): Plain password.
+
+        Returns:
+            str: Password hash.
+        """
+        return await self._run(_hash_password, password, self.rounds)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        """Verify a password against its hash.
+
+        Args:
+            password (str): Plain password.
+            hashed_password (str): Password hash.
+
+        Returns:
+            bool: True if password is correct, False otherwise.
+        """
+        return await self._run(_verify_password, password, hashed_password)
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        """Check if the hash was made with a different cost.
+
+        Args:
+            hashed_password (str): Password hash.
+
+        Returns:
+            bool: True if the password should be hashed again.
+        """
+        return pbkdf2_sha256.using(rounds=self.rounds).needs_update(hashed_password)
+
+    def stats(self) -> dict[str, int]:
+        """Get the queue metrics.
+
+        Returns:
+            dict[str, int]: Calls running or queued in the workers, calls
+                waiting for a free slot and completed calls.
+        """
+        return {
+            "workers": self.max_workers,
+            "submitted": self._submitted,
+            "waiting": self._waiting,
+            "completed": self._completed,
+        }
+
+
+password_hashing_service = PasswordHashingService(
+    rounds=settings.PASSWORD_HASH_ROUNDS,
+    executor_type=settings.PASSWORD_HASH_EXECUTOR,
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
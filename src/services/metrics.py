@@ -0,0 +1,214 @@
+"""Prometheus metrics of the service.
+
+With PROMETHEUS_MULTIPROC_DIR set in the environment of gunicorn, every
+worker writes its samples to that directory and `/metrics` aggregates all of
+them, whichever worker serves the scrape.
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Callable
+
+# Scripts and the ingest worker share the environment but not gunicorn hooks.
+if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+    os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+from prometheus_client import (  # noqa: E402
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from services.sql import fingerprint_sql
+from settings import settings
+
+LATENCY_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+DB_STATEMENT_DURATION = Histogram(
+    "db_statement_duration_seconds",
+    "SQL statement execution time by statement fingerprint.",
+    ["operation", "table", "fingerprint"],
+    buckets=LATENCY_BUCKETS,
+)
+REDIS_COMMAND_DURATION = Histogram(
+    "redis_command_duration_seconds",
+    "Redis command latency, pipelines are timed as a whole.",
+    ["command"],
+    buckets=LATENCY_BUCKETS,
+)
+COMPONENT_STAT = Gauge(
+    "app_component_stat",
+    "Pool, queue and cache gauges of the workers.",
+    ["component", "stat"],
+    multiprocess_mode="livesum",
+)
+# Set by the ingest worker, `/metrics` exports it with PROMETHEUS_MULTIPROC_DIR.
+INGEST_STREAM_ENTRIES = Gauge(
+    "notification_ingest_entries",
+    "Ingest stream entries not read by the group yet (lag) or not acknowledged.",
+    ["state"],
+    multiprocess_mode="mostrecent",
+)
+
+logger = logging.getLogger(__name__)
+
+
+def observe_redis_command(command: str, started: float) -> None:
+    """Record the latency of a redis command.
+
+    Args:
+        command (str): The command name.
+        started (float): `time.perf_counter()` before the command was sent.
+    """
+    REDIS_COMMAND_DURATION.labels(command).observe(time.perf_counter() - started)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Time every statement executed by the engine.
+
+    Args:
+        engine (Engine): The engine, `sync_engine` of an async engine.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        context._metrics_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, many):
+        fingerprint = fingerprint_sql(statement)
+        DB_STATEMENT_DURATION.labels(
+            fingerprint.operation, fingerprint.table, fingerprint.id
+        ).observe(time.perf_counter() - context._metrics_started)
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        """Initialize the ASGI middleware timing HTTP requests.
+
+        The route label is the template of the matched route, e.g.
+        `/notifications/broadcast/{job_id}` rather than the requested path,
+        and `unmatched` for unknown paths, so its cardinality stays bounded.
+
+        Args:
+            app: The ASGI application.
+        """
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router stores the matched route in the shared scope.
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_REQUEST_DURATION.labels(
+                scope["method"], route, str(status_code)
+            ).observe(time.perf_counter() - started)
+
+
+class MetricsService:
+    def __init__(self, interval: int):
+        """Initialize the gauge collector and exporter.
+
+        Args:
+            interval (int): Seconds between gauge updates of a worker.
+        """
+        self.interval = interval
+        self._sources: dict[str, Callable[[], dict[str, float]]] = {}
+        self._updater: asyncio.Task | None = None
+
+    def register(self, component: str, stats: Callable[[], dict[str, float]]) -> None:
+        """Export the stats of a component as gauges.
+
+        Args:
+            component (str): The component label.
+            stats (Callable): Returns the current stats by name.
+        """
+        self._sources[component] = stats
+
+    def update_gauges(self) -> None:
+        """Copy the current stats of every component to the gauges."""
+        for component, stats in self._sources.items():
+            try:
+                values = stats()
+            except Exception as error:
+                logger.warning(f"Failed to collect {component} stats: {error}")
+                continue
+            for stat, value in values.items():
+                COMPONENT_STAT.labels(component, stat).set(value)
+
+    async def _update(self) -> None:
+        while True:
+            self.update_gauges()
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """Start updating the gauges of this worker."""
+        if self._updater is None:
+            self._updater = asyncio.create_task(self._update())
+
+    async def stop(self) -> None:
+        """Stop updating the gauges."""
+        if self._updater is not None:
+            self._updater.cancel()
+            try:
+                await self._updater
+            except asyncio.CancelledError:
+                pass
+        self._updater = None
+
+    def render(self) -> tuple[bytes, str]:
+        """Render the metrics of all workers in the text format.
+
+        Returns:
+            tuple[bytes, str]: The exposition and its content type.
+        """
+        self.update_gauges()
+        registry = REGISTRY
+        if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+metrics_service = MetricsService(interval=settings.METRICS_GAUGE_INTERVAL)
@@ -0,0 +1,260 @@
+"""Opt-in profiling of single requests in production.
+
+A request is profiled when it is sampled or carries a valid X-Profile
+header. To get a header value valid for PROFILING_SIGNATURE_TTL seconds run
+from `src`:
+
+    python -m services.profiling
+"""
+import asyncio
+import cProfile
+import hashlib
+import hmac
+import io
+import json
+import logging
+import os
+import pstats
+import random
+import re
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from settings import settings
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID_HEADER = b"x-profile-id"
+PROFILE_ID = re.compile(r"^\d+-\d+$")
+# Long-lived responses would keep the only profiler slot for their lifetime.
+EXCLUDED_PATHS = ("/metrics", "/admin", "/notifications/stream")
+
+logger = logging.getLogger(__name__)
+
+
+def sign_profile_request(secret: str, timestamp: int | None = None) -> str:
+    """Build a value of the X-Profile header.
+
+    Args:
+        secret (str): The shared profiling secret.
+        timestamp (int | None): Unix time of signing, now if None.
+
+    Returns:
+        str: `<timestamp>:<hex HMAC-SHA256 of timestamp>`.
+    """
+    timestamp = int(time.time()) if timestamp is None else timestamp
+    signature = hmac.new(
+        secret.encode(), str(timestamp).encode(), hashlib.sha256
+    ).hexdigest()
+    return f"{timestamp}:{signature}"
+
+
+def verify_profile_request(value: str, secret: str, ttl: int) -> bool:
+    """Check an X-Profile header value.
+
+    Args:
+        value (str): The header value.
+        secret (str): The shared profiling secret.
+        ttl (int): Seconds a signature stays valid.
+
+    Returns:
+        bool: True if the signature matches and has not expired.
+    """
+    timestamp, _, _ = value.partition(":")
+    if not secret or not timestamp.isdigit():
+        return False
+    if abs(time.time() - int(timestamp)) > ttl:
+        return False
+    expected = sign_profile_request(secret, int(timestamp))
+    return hmac.compare_digest(value, expected)
+
+
+class ProfileStore:
+    def __init__(self, directory: str, max_profiles: int):
+        """Initialize the on-disk ring buffer of profiles.
+
+        Workers share the directory, the oldest profiles are removed once
+        there are more than `max_profiles`.
+
+        Args:
+            directory (str): Directory of the profiles.
+            max_profiles (int): Number of profiles kept.
+        """
+        self.directory = Path(directory)
+        self.max_profiles = max_profiles
+
+    @staticmethod
+    def new_id() -> str:
+        """Generate a profile id, ids sort by creation time.
+
+        Returns:
+            str: The profile id.
+        """
+        return f"{time.time_ns()}-{os.getpid()}"
+
+    def path(self, profile_id: str) -> Path | None:
+        """Get the pstats file of a profile.
+
+        Args:
+            profile_id (str): The profile id.
+
+        Returns:
+            Path | None: The file, None if the profile does not exist.
+        """
+        if not PROFILE_ID.match(profile_id):
+            return None
+        path = self.directory / f"{profile_id}.prof"
+        return path if path.exists() else None
+
+    def save(self, profile_id: str, profiler: cProfile.Profile, metadata: dict) -> None:
+        """Write a profile and drop the oldest ones, blocking.
+
+        Args:
+            profile_id (str): The profile id.
+            profiler (cProfile.Profile): The stopped profiler.
+            metadata (dict): Request details stored next to the profile.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(self.directory / f"{profile_id}.prof")
+        (self.directory / f"{profile_id}.json").write_text(
+            json.dumps({"id": profile_id, **metadata})
+        )
+
+        expired = sorted(self.directory.glob("*.prof"))[: -self.max_profiles]
+        for path in expired:
+            path.unlink(missing_ok=True)
+            path.with_suffix(".json").unlink(missing_ok=True)
+
+    def list(self) -> list[dict]:
+        """List the stored profiles, newest first.
+
+        Returns:
+            list[dict]: Request details of every profile.
+        """
+        profiles = []
+        for path in sorted(self.directory.glob("*.json"), reverse=True):
+            try:
+                profiles.append(json.loads(path.read_text()))
+            except (OSError, ValueError):
+                continue  # Removed by another worker or partially written.
+        return profiles
+
+    def render(self, profile_id: str, sort: str = "cumulative", limit: int = 50) -> str:
+        """Render the top functions of a profile as text.
+
+        Args:
+            profile_id (str): The profile id.
+            sort (str): pstats sort key.
+            limit (int): Number of functions.
+
+        Returns:
+            str: The report, empty if the profile does not exist.
+        """
+        path = self.path(profile_id)
+        if path is None:
+            return ""
+        output = io.StringIO()
+        stats = pstats.Stats(str(path), stream=output)
+        stats.strip_dirs().sort_stats(sort).print_stats(limit)
+        return output.getvalue()
+
+
+class ProfilerMiddleware:
+    def __init__(
+        self,
+        app,
+        store: ProfileStore,
+        sample_rate: float,
+        secret: str,
+        signature_ttl: int,
+    ):
+        """Initialize the ASGI middleware profiling selected requests.
+
+        cProfile sees every coroutine of the worker thread, so only one
+        request is profiled at a time and the profile may include work of
+        concurrent requests. Requests arriving meanwhile are not profiled.
+
+        Args:
+            app: The ASGI application.
+            store (ProfileStore): Where profiles are written.
+            sample_rate (float): Fraction of requests profiled.
+            secret (str): Secret of the X-Profile header, empty disables it.
+            signature_ttl (int): Seconds an X-Profile signature stays valid.
+        """
+        self.app = app
+        self.store = store
+        self.sample_rate = sample_rate
+        self.secret = secret
+        self.signature_ttl = signature_ttl
+        self._busy = False
+
+    def _trigger(self, scope) -> str | None:
+        if scope["path"].startswith(EXCLUDED_PATHS):
+            return None
+        header = dict(scope["headers"]).get(PROFILE_HEADER)
+        if header is not None and verify_profile_request(
+            header.decode("latin-1"), self.secret, self.signature_ttl
+        ):
+            return "header"
+        if self.sample_rate and random.random() < self.sample_rate:
+            return "sample"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        trigger = None
+        if scope["type"] == "http" and not self._busy:
+            trigger = self._trigger(scope)
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is attached to the interpreter.
+            await self.app(scope, receive, send)
+            return
+
+        self._busy = True
+        profile_id = self.store.new_id()
+        status_code = 500
+
+        async def send_with_profile_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (PROFILE_ID_HEADER, profile_id.encode()),
+                ]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            profiler.disable()
+            self._busy = False
+            metadata = {
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": getattr(scope.get("route"), "path", None),
+                "status": status_code,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+                "trigger": trigger,
+                "created_at": datetime.now(timezone.utc).isoformat(),
+            }
+            try:
+                await asyncio.to_thread(self.store.save, profile_id, profiler, metadata)
+            except OSError as error:
+                logger.warning(f"Failed to store profile {profile_id}: {error}")
+
+
+profile_store = ProfileStore(
+    directory=settings.PROFILING_DIR, max_profiles=settings.PROFILING_MAX_PROFILES
+)
+
+
+if __name__ == "__main__":
+    print(sign_profile_request(settings.PROFILING_SECRET))
@@ -1,17 +1,180 @@
+import asyncio
+import time
+from typing import Awaitable, cast
+
 from redis import asyncio as redis
+from redis.commands.core import AsyncScript
+from redis.typing import EncodableT, FieldT
+
+from services.metrics import observe_redis_command
+from settings import RedisSettings, redis_settings, settings
+
+# Increments every key that exists, missing ones give a nil reply.
+INCR_IF_EXISTS_SCRIPT = """
+local values = {}
+for index, key in ipairs(KEYS) do
+    if redis.call('EXISTS', key) == 1 then
+        values[index] = redis.call('INCRBY', key, ARGV[index])
+    else
+        values[index] = false
+    end
+end
+return values
+"""
+
+
+class CountingConnectionPool(redis.BlockingConnectionPool):
+    """Connection pool counting its connections for `pool_stats`."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.created_connections = 0
+        self._checked_out: set = set()
+
+    @property
+    def in_use_connections(self) -> int:
+        return len(self._checked_out)
+
+    def make_connection(self):
+        self.created_connections += 1
+        return super().make_connection()
+
+    async def get_connection(self, *args, **kwargs):
+        connection = await super().get_connection(*args, **kwargs)
+        self._checked_out.add(connection)
+        return connection
+
+    async def release(self, connection) -> None:
+        self._checked_out.discard(connection)
+        await super().release(connection)
+
 
-from settings import redis_settings
+class InstrumentedPipeline(redis.client.Pipeline):
+    async def execute(self, raise_on_error: bool = True):
+        started = time.perf_counter()
+        try:
+            return await super().execute(raise_on_error)
+        finally:
+            command = "MULTI" if self.is_transaction else "PIPELINE"
+            observe_redis_command(command, started)
+
+
+class InstrumentedRedis(redis.Redis):
+    """Redis client recording the latency of every command."""
+
+    async def execute_command(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            observe_redis_command(str(args[0]).upper(), started)
+
+    def pipeline(self, transaction: bool = True, shard_hint=None):
+        return InstrumentedPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint
+        )
 
 
 class RedisService:
-    def __init__(self):
-        self._redis = redis.Redis(
-            host=redis_settings.REDIS_HOST,
-            port=redis_settings.REDIS_PORT,
-            db=redis_settings.REDIS_DB,
-            password=redis_settings.REDIS_PASSWORD,
-            ssl=redis_settings.REDIS_SSL,
+    def __init__(self, settings: RedisSettings = redis_settings):
+        self._settings = settings
+        self._pool: CountingConnectionPool | None = None
+        self._redis: redis.Redis | None = None
+        self._incr_if_exists_script: AsyncScript | None = None
+
+    def connect(self) -> redis.Redis:
+        """Create the bounded connection pool and client if they do not exist.
+
+        Connections themselves are opened on demand or by `open`.
+
+        Returns:
+            The redis client
+        """
+        if self._redis is None:
+            self._pool = CountingConnectionPool(
+                connection_class=redis.SSLConnection
+                if self._settings.REDIS_SSL
+                else redis.Connection,
+                host=self._settings.REDIS_HOST,
+                port=self._settings.REDIS_PORT,
+                db=self._settings.REDIS_DB,
+                password=self._settings.REDIS_PASSWORD,
+                max_connections=self._settings.REDIS_MAX_CONNECTIONS,
+                timeout=self._settings.REDIS_POOL_TIMEOUT,
+                socket_timeout=self._settings.REDIS_SOCKET_TIMEOUT,
+                socket_connect_timeout=self._settings.REDIS_SOCKET_CONNECT_TIMEOUT,
+                health_check_interval=self._settings.REDIS_HEALTH_CHECK_INTERVAL,
+            )
+            client_class = redis.Redis
+            if settings.METRICS_ENABLED:
+                client_class = InstrumentedRedis
+            self._redis = client_class(connection_pool=self._pool)
+            self._incr_if_exists_script = self._redis.register_script(
+                INCR_IF_EXISTS_SCRIPT
+            )
+        return self._redis
+
+    async def open(self) -> None:
+        """Create the pool and warm it up, called from the app lifespan."""
+        client = self.connect()
+        warm_connections = min(
+            self._settings.REDIS_WARM_CONNECTIONS,
+            self._settings.REDIS_MAX_CONNECTIONS,
         )
+        # Concurrent pings check out distinct connections, opening each of them.
+        await asyncio.gather(*(client.ping() for _ in range(warm_connections)))
+
+    async def close(self) -> None:
+        """Close every pooled connection, called from the app lifespan."""
+        if self._redis is not None:
+            await self._redis.aclose()
+        if self._pool is not None:
+            await self._pool.disconnect()
+        self._pool = None
+        self._redis = None
+        self._incr_if_exists_script = None
+
+    def reset_after_fork(self) -> None:
+        """Forget the pool inherited from the parent process without closing it.
+
+        The next command creates a fresh pool in this process.
+        """
+        self._pool = None
+        self._redis = None
+        self._incr_if_exists_script = None
+
+    @property
+    def client(self) -> redis.Redis:
+        """Get the redis client, creating the pool on first use."""
+        return self.connect()
+
+    @property
+    def _incr_if_exists(self):
+        self.connect()
+        return self._incr_if_exists_script
+
+    def pool_stats(self) -> dict[str, int]:
+        """Get the connection pool utilization.
+
+        Returns:
+            Maximum, open, in-use and idle connections of this worker
+        """
+        if self._pool is None:
+            return {
+                "max": self._settings.REDIS_MAX_CONNECTIONS,
+                "open": 0,
+                "in_use": 0,
+                "idle": 0,
+            }
+
+        created = self._pool.created_connections
+        in_use = self._pool.in_use_connections
+        return {
+            "max": self._pool.max_connections,
+            "open": created,
+            "in_use": in_use,
+            "idle": created - in_use,
+        }
 
     async def get(self, key: str) -> bytes:
         """Get value from redis.
@@ -22,7 +185,7 @@ class RedisService:
         Returns:
             The value for the key
         """
-        return await self._redis.get(key)
+        return await self.client.get(key)
 
     async def set(self, key: str, value: str, expire: int) -> bool:
         """Set a value in redis.
@@ -35,7 +198,119 @@ class RedisService:
         Returns:
             True if the value was set, False otherwise
         """
-        return await self._redis.set(key, value, ex=expire)
+        return await self.client.set(key, value, ex=expire)
+
+    async def mget(self, keys: list[str]) -> list[bytes | None]:
+        """Get several values from redis in one round trip.
+
+        Args:
+            keys: The keys to get the values for
+
+        Returns:
+            The values in the order of keys, None for missing keys
+        """
+        return await self.client.mget(keys)
+
+    async def set_many_with_expire(self, items: list[tuple[str, str, int]]) -> None:
+        """Set several expiring values in one MULTI/EXEC round trip.
+
+        Args:
+            items: Keys, values and expire times in seconds
+        """
+        async with self.client.pipeline(transaction=True) as pipe:
+            for key, value, expire in items:
+                pipe.set(key, value, ex=expire)
+            await pipe.execute()
+
+    async def set_if_absent(self, key: str, value: str | int) -> bool:
+        """Set a value in redis only if the key does not exist.
+
+        Args:
+            key: The key to set the value for
+            value: The value to set
+
+        Returns:
+            True if the value was set, False otherwise
+        """
+        return bool(await self.client.set(key, value, nx=True))
+
+    async def mset(self, mapping: dict[str, str | int]) -> bool:
+        """Set several values in redis in one round trip.
+
+        Args:
+            mapping: Keys and values to set
+
+        Returns:
+            True if the values were set
+        """
+        return await self.client.mset(mapping)
+
+    async def incr_if_exists(self, key: str, amount: int = 1) -> int | None:
+        """Atomically increment a counter only if it is already initialized.
+
+        Args:
+            key: The counter key
+            amount: The value to add, may be negative
+
+        Returns:
+            The new value, or None if the key does not exist
+        """
+        [value] = await self._incr_if_exists(keys=[key], args=[amount])
+        return value
+
+    async def incr_many_if_exists(self, increments: dict[str, int]) -> None:
+        """Atomically increment several initialized counters in one round trip.
+
+        One script call checks and increments every key, no other client runs
+        in between.
+
+        Args:
+            increments: The counter keys and values to add, may be negative
+        """
+        await self._incr_if_exists(
+            keys=list(increments), args=list(increments.values())
+        )
+
+    async def hset(
+        self, key: str, mapping: dict[str, str | int], expire: int | None = None
+    ) -> None:
+        """Set hash fields in redis.
+
+        Args:
+            key: The hash key
+            mapping: The fields and values to set
+            expire: The time in seconds to expire the key
+        """
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping=mapping)
+            if expire:
+                pipe.expire(key, expire)
+            await pipe.execute()
+
+    async def hgetall(self, key: str) -> dict[str, str]:
+        """Get all hash fields from redis.
+
+        Args:
+            key: The hash key
+
+        Returns:
+            The fields and values, empty if the key does not exist
+        """
+        data = await cast(Awaitable[dict], self.client.hgetall(key))
+        return {field.decode(): value.decode() for field, value in data.items()}
+
+    async def hincrby(self, key: str, field: str, amount: int = 1) -> int:
+        """Increment a hash field in redis.
+
+        Args:
+            key: The hash key
+            field: The field to increment
+            amount: The value to add
+
+        Returns:
+            The new value of the field
+        """
+        return await cast(Awaitable[int], self.client.hincrby(key, field, amount))
 
     async def delete(self, key: str) -> bool:
         """Delete a key from redis.
@@ -46,7 +321,194 @@ class RedisService:
         Returns:
             True if the key was deleted, False otherwise
         """
-        return bool(await self._redis.delete(key))
+        return bool(await self.client.delete(key))
+
+    async def delete_many(self, keys: list[str]) -> int:
+        """Delete several keys from redis with one DEL.
+
+        Args:
+            keys: The keys to delete
+
+        Returns:
+            The number of deleted keys
+        """
+        return await self.client.delete(*keys)
+
+    async def publish(self, channel: str, message: str) -> int:
+        """Publish a message to a redis channel.
+
+        Args:
+            channel: The channel
+            message: The message
+
+        Returns:
+            The number of subscribers that received the message
+        """
+        return await self.client.publish(channel, message)
+
+    async def publish_many(self, messages: list[tuple[str, str]]) -> None:
+        """Publish several messages in one round trip.
+
+        Args:
+            messages: Channels and messages
+        """
+        async with self.client.pipeline(transaction=False) as pipe:
+            for channel, message in messages:
+                pipe.publish(channel, message)
+            await pipe.execute()
+
+    def pubsub(self) -> redis.client.PubSub:
+        """Get a new pub/sub connection.
+
+        Returns:
+            The pub/sub object, the caller closes it
+        """
+        return self.client.pubsub(ignore_subscribe_messages=True)
+
+    async def xadd(
+        self,
+        stream: str,
+        fields: dict[FieldT, EncodableT],
+        maxlen: int | None = None,
+    ) -> bytes:
+        """Append an entry to a redis stream.
+
+        Args:
+            stream: The stream key
+            fields: The entry fields
+            maxlen: Approximate stream length to trim to
+
+        Returns:
+            The entry id
+        """
+        return await self.client.xadd(stream, fields, maxlen=maxlen, approximate=True)
+
+    async def xgroup_create(self, stream: str, group: str) -> None:
+        """Create a consumer group reading the stream from the start.
+
+        Args:
+            stream: The stream key
+            group: The group name
+        """
+        try:
+            await self.client.xgroup_create(stream, group, id="0", mkstream=True)
+        except redis.ResponseError as error:
+            if "BUSYGROUP" not in str(error):
+                raise
+
+    async def xreadgroup(
+        self, stream: str, group: str, consumer: str, count: int, block: int
+    ) -> list[tuple[bytes, dict[bytes, bytes]]]:
+        """Read new entries of a stream as a group consumer.
+
+        Args:
+            stream: The stream key
+            group: The group name
+            consumer: The consumer name
+            count: Maximum number of entries
+            block: Milliseconds to wait for entries
+
+        Returns:
+            Entry ids and fields
+        """
+        response = await self.client.xreadgroup(
+            group, consumer, {stream: ">"}, count=count, block=block
+        )
+        return response[0][1] if response else []
+
+    async def xautoclaim(
+        self, stream: str, group: str, consumer: str, min_idle_time: int, count: int
+    ) -> list[tuple[bytes, dict[bytes, bytes]]]:
+        """Take over entries other consumers did not acknowledge in time.
+
+        Args:
+            stream: The stream key
+            group: The group name
+            consumer: The consumer name
+            min_idle_time: Milliseconds an entry must be pending
+            count: Maximum number of entries
+
+        Returns:
+            Entry ids and fields
+        """
+        response = await self.client.xautoclaim(
+            stream, group, consumer, min_idle_time, start_id="0-0", count=count
+        )
+        return [entry for entry in response[1] if entry[1] is not None]
+
+    async def xpending_deliveries(
+        self, stream: str, group: str, min_id: bytes, max_id: bytes, count: int
+    ) -> dict[bytes, int]:
+        """Get delivery counts of pending entries.
+
+        Args:
+            stream: The stream key
+            group: The group name
+            min_id: The smallest entry id
+            max_id: The largest entry id
+            count: Maximum number of entries
+
+        Returns:
+            Number of deliveries by entry id
+        """
+        pending = await self.client.xpending_range(
+            stream, group, min=min_id, max=max_id, count=count
+        )
+        return {entry["message_id"]: entry["times_delivered"] for entry in pending}
+
+    async def xpending_oldest(self, stream: str, group: str) -> bytes | None:
+        """Get the oldest entry read by a group but not acknowledged.
+
+        Args:
+            stream: The stream key
+            group: The group name
+
+        Returns:
+            The entry id, None if nothing is pending
+        """
+        summary = await self.client.xpending(stream, group)
+        return summary["min"]
+
+    async def xtrim_minid(self, stream: str, min_id: bytes) -> int:
+        """Remove the stream entries older than an entry id.
+
+        Args:
+            stream: The stream key
+            min_id: The oldest entry id to keep
+
+        Returns:
+            The number of removed entries
+        """
+        return await self.client.xtrim(stream, minid=min_id, approximate=False)
+
+    async def xack(self, stream: str, group: str, entry_ids: list[bytes]) -> int:
+        """Acknowledge processed stream entries.
+
+        Args:
+            stream: The stream key
+            group: The group name
+            entry_ids: The entry ids
+
+        Returns:
+            The number of acknowledged entries
+        """
+        if not entry_ids:
+            return 0
+        return await self.client.xack(stream, group, *entry_ids)
+
+    async def xinfo_groups(self, stream: str) -> list[dict]:
+        """Get consumer groups of a stream with their pending entries and lag.
+
+        Args:
+            stream: The stream key
+
+        Returns:
+            The groups info, empty if the stream does not exist
+        """
+        try:
+            return await self.client.xinfo_groups(stream)
+        except redis.ResponseError:
+            return []
 
     async def exists(self, key: str) -> bool:
         """Check if a key exists in redis.
@@ -57,7 +519,7 @@ class RedisService:
         Returns:
             True if the key exists, False otherwise
         """
-        return bool(await self._redis.exists(key))
+        return bool(await self.client.exists(key))
 
     async def ttl(self, key: str) -> int:
         """Get the time to live for a key in redis.
@@ -68,7 +530,7 @@ class RedisService:
         Returns:
             The time to live for the key
         """
-        return await self._redis.ttl(key)
+        return await self.client.ttl(key)
 
     async def ping(self) -> bool:
         """Ping redis.
@@ -76,7 +538,7 @@ class RedisService:
         Returns:
             True if redis is up, False otherwise
         """
-        return bool(await self._redis.ping())
+        return bool(await self.client.ping())
 
 
 redis_service = RedisService()
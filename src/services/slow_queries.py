@@ -0,0 +1,215 @@
+"""Log statements slower than SLOW_QUERY_THRESHOLD_MS.
+
+Every record holds the normalized SQL, the redacted parameters and the
+repository method that issued the statement. The plan of the statement is
+captured by an EXPLAIN in a background task on its own connection, outside
+the request pool, at most once per explain interval for a fingerprint, so
+the slow request neither waits for it nor shares its pool with it.
+"""
+import asyncio
+import functools
+import json
+import logging
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from services.sql import fingerprint_sql
+from settings import settings
+
+EXPLAINED_OPERATIONS = frozenset({"SELECT", "INSERT", "UPDATE", "DELETE", "WITH"})
+MAX_LOGGED_PARAMETERS = 20
+
+# SQLAlchemy runs statements in greenlets that inherit the caller context.
+current_repository_method: ContextVar[str | None] = ContextVar(
+    "current_repository_method", default=None
+)
+
+logger = logging.getLogger(__name__)
+
+
+def track_repository_method(method):
+    """Make statements of a repository coroutine carry its qualified name.
+
+    Args:
+        method: Repository coroutine function.
+
+    Returns:
+        The wrapped coroutine function.
+    """
+
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs):
+        token = current_repository_method.set(method.__qualname__)
+        try:
+            return await method(*args, **kwargs)
+        finally:
+            current_repository_method.reset(token)
+
+    return wrapper
+
+
+def redact_parameter(value):
+    """Hide a bind parameter that may hold user data.
+
+    Numbers, dates and flags are kept since they explain plans, e.g. a huge
+    OFFSET, strings and binary values are replaced by their type and size.
+
+    Args:
+        value: The parameter.
+
+    Returns:
+        A JSON serializable placeholder or the value.
+    """
+    if value is None or isinstance(value, (bool, int, float, Decimal)):
+        return value if not isinstance(value, Decimal) else str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (list, tuple)):
+        return [redact_parameter(item) for item in value[:MAX_LOGGED_PARAMETERS]]
+    size = len(value) if hasattr(value, "__len__") else None
+    return f"<{type(value).__name__}:{size}>" if size is not None else "<redacted>"
+
+
+class SlowQueryLog:
+    def __init__(
+        self,
+        threshold_ms: float,
+        max_records: int,
+        explain: bool = True,
+        explain_interval: int = 300,
+    ):
+        """Initialize the per-worker slow query log.
+
+        Args:
+            threshold_ms (float): Statements taking longer are recorded.
+            max_records (int): Number of records kept in memory.
+            explain (bool): Capture plans of slow statements.
+            explain_interval (int): Seconds before the same statement is
+                explained again.
+        """
+        self.threshold = threshold_ms / 1000
+        self.explain = explain
+        self.explain_interval = explain_interval
+        self._records: deque[dict] = deque(maxlen=max_records)
+        self._explained: dict[str, float] = {}
+        self._explaining: set[asyncio.Task] = set()
+        self._explain_engine: AsyncEngine | None = None
+
+    def instrument(
+        self, engine: AsyncEngine, explain_engine: AsyncEngine | None = None
+    ) -> None:
+        """Time the statements of the engine.
+
+        Args:
+            engine (AsyncEngine): The engine.
+            explain_engine (AsyncEngine | None): The engine running EXPLAIN,
+                it should not pool connections. Plans are not captured
+                without it.
+        """
+        self._explain_engine = explain_engine
+        sync_engine = engine.sync_engine
+
+        @event.listens_for(sync_engine, "before_cursor_execute")
+        def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+            context._slow_query_started = time.perf_counter()
+
+        @event.listens_for(sync_engine, "after_cursor_execute")
+        def after_cursor_execute(conn, cursor, statement, parameters, context, many):
+            duration = time.perf_counter() - context._slow_query_started
+            if duration >= self.threshold and not context.execution_options.get(
+                "skip_slow_query_log"
+            ):
+                self.record(statement, parameters, duration, many)
+
+    def record(self, statement: str, parameters, duration: float, many: bool) -> None:
+        """Store and log a slow statement and schedule its EXPLAIN.
+
+        Args:
+            statement (str): The SQL statement.
+            parameters: Its bind parameters.
+            duration (float): Execution time in seconds.
+            many (bool): Whether it was an executemany.
+        """
+        fingerprint = fingerprint_sql(statement)
+        record = {
+            "event": "slow_query",
+            "fingerprint": fingerprint.id,
+            "sql": fingerprint.normalized,
+            "parameters": redact_parameter(
+                parameters[0] if many and parameters else parameters
+            ),
+            "duration_ms": round(duration * 1000, 3),
+            "repository_method": current_repository_method.get(),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "plan": None,
+        }
+        self._records.append(record)
+        logger.warning(json.dumps(record))
+
+        if self._should_explain(fingerprint, many):
+            self._explained[fingerprint.id] = time.monotonic()
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                return
+            task = loop.create_task(self._capture_plan(record, statement, parameters))
+            self._explaining.add(task)
+            task.add_done_callback(self._explaining.discard)
+
+    def _should_explain(self, fingerprint, many: bool) -> bool:
+        if not self.explain or many or self._explain_engine is None:
+            return False
+        if fingerprint.operation not in EXPLAINED_OPERATIONS or self._explaining:
+            return False
+        explained_at = self._explained.get(fingerprint.id)
+        return (
+            explained_at is None
+            or time.monotonic() - explained_at > self.explain_interval
+        )
+
+    async def _capture_plan(self, record: dict, statement: str, parameters) -> None:
+        if self._explain_engine is None:
+            return
+        # Without ANALYZE the statement is only planned, never executed.
+        try:
+            async with self._explain_engine.connect() as conn:
+                conn = await conn.execution_options(skip_slow_query_log=True)
+                result = await conn.exec_driver_sql(
+                    f"EXPLAIN (ANALYZE off, FORMAT JSON) {statement}", parameters
+                )
+                plan = result.scalar()
+        except Exception as error:
+            logger.warning(f"Failed to explain {record['fingerprint']}: {error}")
+            return
+        record["plan"] = json.loads(plan) if isinstance(plan, str) else plan
+        logger.warning(
+            json.dumps(
+                {
+                    "event": "slow_query_plan",
+                    "fingerprint": record["fingerprint"],
+                    "plan": record["plan"],
+                }
+            )
+        )
+
+    def records(self) -> list[dict]:
+        """Get the recorded slow statements of this worker, newest first.
+
+        Returns:
+            list[dict]: The records.
+        """
+        return list(reversed(self._records))
+
+
+slow_query_log = SlowQueryLog(
+    threshold_ms=settings.SLOW_QUERY_THRESHOLD_MS,
+    max_records=settings.SLOW_QUERY_LOG_SIZE,
+    explain=settings.SLOW_QUERY_EXPLAIN,
+    explain_interval=settings.SLOW_QUERY_EXPLAIN_INTERVAL,
+)
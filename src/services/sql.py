@@ -0,0 +1,48 @@
+import hashlib
+import re
+from functools import lru_cache
+from typing import NamedTuple
+
+STRING = re.compile(r"'(?:[^']|'')*'")
+PARAMETER = re.compile(r"\$\d+|%\(\w+\)s|%s")
+NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+PARAMETER_GROUP = r"\(\s*\?(?:\s*,\s*\?)*\s*\)"
+VALUES_LIST = re.compile(rf"{PARAMETER_GROUP}(?:\s*,\s*{PARAMETER_GROUP})*")
+WHITESPACE = re.compile(r"\s+")
+TABLE = re.compile(r"\b(?:FROM|INTO|UPDATE|JOIN)\s+\"?(\w+)", re.IGNORECASE)
+
+
+class SQLFingerprint(NamedTuple):
+    id: str
+    operation: str
+    table: str
+    normalized: str
+
+
+@lru_cache(maxsize=2048)
+def fingerprint_sql(statement: str) -> SQLFingerprint:
+    """Normalize a SQL statement so its executions can be grouped.
+
+    Literals and bind parameters become `?` and lists of them, e.g. from
+    `IN` or multi-row `VALUES`, collapse to one `(...)`, so statements that
+    only differ by their arguments share a fingerprint.
+
+    Args:
+        statement (str): The SQL statement.
+
+    Returns:
+        SQLFingerprint: Short id, operation, first table and normalized SQL.
+    """
+    normalized = STRING.sub("?", statement)
+    normalized = PARAMETER.sub("?", normalized)
+    normalized = NUMBER.sub("?", normalized)
+    normalized = VALUES_LIST.sub("(...)", normalized)
+    normalized = WHITESPACE.sub(" ", normalized).strip()
+
+    table = TABLE.search(normalized)
+    return SQLFingerprint(
+        id=hashlib.sha1(normalized.encode()).hexdigest()[:12],
+        operation=normalized.split(" ", 1)[0].upper() if normalized else "",
+        table=table.group(1) if table else "",
+        normalized=normalized,
+    )
@@ -1,4 +1,6 @@
 # type: ignore
+import multiprocessing
+
 from pydantic import Field
 from pydantic_settings import BaseSettings
 
@@ -18,6 +20,15 @@ class PostgresSettings(BaseEnvSettings):
     POSTGRES_PASSWORD: str = Field(..., env="POSTGRES_PASSWORD")
     POSTGRES_PORT: int = Field(..., env="POSTGRES_PORT")
 
+    POSTGRES_CONNECTION_BUDGET: int = Field(
+        default=90, env="POSTGRES_CONNECTION_BUDGET"
+    )
+    POSTGRES_RESERVED_CONNECTIONS: int = Field(
+        default=10, env="POSTGRES_RESERVED_CONNECTIONS"
+    )
+    POSTGRES_POOL_TIMEOUT: float = Field(default=10, env="POSTGRES_POOL_TIMEOUT")
+    POSTGRES_PGBOUNCER: bool = Field(default=False, env="POSTGRES_PGBOUNCER")
+
 
 class RedisSettings(BaseEnvSettings):
     REDIS_HOST: str = Field(..., env="REDIS_HOST")
@@ -26,11 +37,24 @@ class RedisSettings(BaseEnvSettings):
     REDIS_PASSWORD: str = Field(..., env="REDIS_PASSWORD")
     REDIS_SSL: bool = Field(..., env="REDIS_SSL")
 
+    REDIS_MAX_CONNECTIONS: int = Field(default=50, env="REDIS_MAX_CONNECTIONS")
+    REDIS_POOL_TIMEOUT: float = Field(default=5, env="REDIS_POOL_TIMEOUT")
+    REDIS_SOCKET_TIMEOUT: float = Field(default=5, env="REDIS_SOCKET_TIMEOUT")
+    REDIS_SOCKET_CONNECT_TIMEOUT: float = Field(
+        default=2, env="REDIS_SOCKET_CONNECT_TIMEOUT"
+    )
+    REDIS_HEALTH_CHECK_INTERVAL: int = Field(
+        default=30, env="REDIS_HEALTH_CHECK_INTERVAL"
+    )
+    REDIS_WARM_CONNECTIONS: int = Field(default=2, env="REDIS_WARM_CONNECTIONS")
+
 
 class Settings(BaseEnvSettings):
     DEBUG: bool = Field(default=True, env="DEBUG")
     DEBUG_PORT: int = Field(default=8080, env="DEBUG_PORT")
     OPENAPI_URL: str = Field(default="/openapi.json", env="OPENAPI_URL")
+    WORKERS: int = Field(default=multiprocessing.cpu_count() * 2 + 1, env="WORKERS")
+    GUNICORN_PRELOAD: bool = Field(default=False, env="GUNICORN_PRELOAD")
 
     SECRET_KEY: str = Field(..., env="SECRET_KEY")
     ALGORITHM: str = "HS256"
@@ -40,6 +64,105 @@ class Settings(BaseEnvSettings):
     REFRESH_TOKEN_EXPIRE_MINUTES: int = Field(
         default=60 * 24 * 7, env="REFRESH_TOKEN_EXPIRE_MINUTES"
     )
+    METRICS_ENABLED: bool = Field(default=True, env="METRICS_ENABLED")
+    METRICS_GAUGE_INTERVAL: int = Field(default=5, env="METRICS_GAUGE_INTERVAL")
+
+    ADMIN_TOKEN: str = Field(default="", env="ADMIN_TOKEN")
+
+    PROFILING_SAMPLE_RATE: float = Field(default=0.0, env="PROFILING_SAMPLE_RATE")
+    PROFILING_SECRET: str = Field(default="", env="PROFILING_SECRET")
+    PROFILING_SIGNATURE_TTL: int = Field(default=300, env="PROFILING_SIGNATURE_TTL")
+    PROFILING_DIR: str = Field(default="/tmp/profiles", env="PROFILING_DIR")
+    PROFILING_MAX_PROFILES: int = Field(default=100, env="PROFILING_MAX_PROFILES")
+
+    SLOW_QUERY_THRESHOLD_MS: float = Field(default=200, env="SLOW_QUERY_THRESHOLD_MS")
+    SLOW_QUERY_LOG_SIZE: int = Field(default=200, env="SLOW_QUERY_LOG_SIZE")
+    SLOW_QUERY_EXPLAIN: bool = Field(default=True, env="SLOW_QUERY_EXPLAIN")
+    SLOW_QUERY_EXPLAIN_INTERVAL: int = Field(
+        default=300, env="SLOW_QUERY_EXPLAIN_INTERVAL"
+    )
+
+    TOKEN_CACHE_SIZE: int = Field(default=10000, env="TOKEN_CACHE_SIZE")
+
+    PASSWORD_HASH_ROUNDS: int = Field(default=29000, env="PASSWORD_HASH_ROUNDS")
+    PASSWORD_HASH_EXECUTOR: str = Field(default="process", env="PASSWORD_HASH_EXECUTOR")
+    PASSWORD_HASH_WORKERS: int = Field(default=2, env="PASSWORD_HASH_WORKERS")
+    PASSWORD_HASH_MAX_PENDING: int = Field(default=64, env="PASSWORD_HASH_MAX_PENDING")
+
+    USER_CACHE_SIZE: int = Field(default=10000, env="USER_CACHE_SIZE")
+    USER_CACHE_TTL: int = Field(default=60, env="USER_CACHE_TTL")
+    USER_CACHE_REDIS_ENABLED: bool = Field(
+        default=False, env="USER_CACHE_REDIS_ENABLED"
+    )
+    USER_CACHE_REDIS_TTL: int = Field(default=300, env="USER_CACHE_REDIS_TTL")
+
+    NOTIFICATIONS_PAGE_SIZE: int = Field(default=5, env="NOTIFICATIONS_PAGE_SIZE")
+    NOTIFICATIONS_MAX_PAGE_SIZE: int = Field(
+        default=100, env="NOTIFICATIONS_MAX_PAGE_SIZE"
+    )
+    NOTIFICATIONS_BATCH_MAX_ITEMS: int = Field(
+        default=10000, env="NOTIFICATIONS_BATCH_MAX_ITEMS"
+    )
+    NOTIFICATIONS_INSERT_CHUNK_SIZE: int = Field(
+        default=1000, env="NOTIFICATIONS_INSERT_CHUNK_SIZE"
+    )
+    NOTIFICATIONS_BROADCAST_MAX_RECIPIENTS: int = Field(
+        default=100000, env="NOTIFICATIONS_BROADCAST_MAX_RECIPIENTS"
+    )
+    NOTIFICATIONS_BROADCAST_JOB_TTL: int = Field(
+        default=60 * 60 * 24, env="NOTIFICATIONS_BROADCAST_JOB_TTL"
+    )
+    NOTIFICATIONS_STREAM_QUEUE_SIZE: int = Field(
+        default=100, env="NOTIFICATIONS_STREAM_QUEUE_SIZE"
+    )
+    NOTIFICATIONS_STREAM_HEARTBEAT: float = Field(
+        default=15, env="NOTIFICATIONS_STREAM_HEARTBEAT"
+    )
+    NOTIFICATIONS_LONG_POLL_MAX: float = Field(
+        default=30, env="NOTIFICATIONS_LONG_POLL_MAX"
+    )
+
+    NOTIFICATIONS_AGGREGATION: bool = Field(
+        default=False, env="NOTIFICATIONS_AGGREGATION"
+    )
+    NOTIFICATIONS_AGGREGATION_WINDOW: int = Field(
+        default=60 * 60, env="NOTIFICATIONS_AGGREGATION_WINDOW"
+    )
+    NOTIFICATIONS_AGGREGATION_LAST_ACTORS: int = Field(
+        default=5, env="NOTIFICATIONS_AGGREGATION_LAST_ACTORS"
+    )
+
+    NOTIFICATIONS_PARTITIONS_AHEAD: int = Field(
+        default=3, env="NOTIFICATIONS_PARTITIONS_AHEAD"
+    )
+    NOTIFICATIONS_RETENTION_MONTHS: int = Field(
+        default=0, env="NOTIFICATIONS_RETENTION_MONTHS"
+    )
+
+    NOTIFICATIONS_WRITE_BEHIND: bool = Field(
+        default=False, env="NOTIFICATIONS_WRITE_BEHIND"
+    )
+    NOTIFICATIONS_INGEST_STREAM: str = Field(
+        default="NOTIFICATIONS_INGEST", env="NOTIFICATIONS_INGEST_STREAM"
+    )
+    NOTIFICATIONS_INGEST_GROUP: str = Field(
+        default="notification-writers", env="NOTIFICATIONS_INGEST_GROUP"
+    )
+    NOTIFICATIONS_INGEST_MAXLEN: int = Field(
+        default=1000000, env="NOTIFICATIONS_INGEST_MAXLEN"
+    )
+    NOTIFICATIONS_INGEST_BATCH_SIZE: int = Field(
+        default=500, env="NOTIFICATIONS_INGEST_BATCH_SIZE"
+    )
+    NOTIFICATIONS_INGEST_BLOCK_MS: int = Field(
+        default=1000, env="NOTIFICATIONS_INGEST_BLOCK_MS"
+    )
+    NOTIFICATIONS_INGEST_CLAIM_IDLE_MS: int = Field(
+        default=60000, env="NOTIFICATIONS_INGEST_CLAIM_IDLE_MS"
+    )
+    NOTIFICATIONS_INGEST_MAX_DELIVERIES: int = Field(
+        default=5, env="NOTIFICATIONS_INGEST_MAX_DELIVERIES"
+    )
 
 
 settings = Settings()
@@ -0,0 +1,206 @@
+import asyncio
+import json
+import logging
+
+from services.cache import TTLCache
+from services.redis import RedisService, redis_service
+from settings import settings
+from users.schemas import UserProfileSchema, UserSchema
+
+logger = logging.getLogger(__name__)
+
+
+class UserCacheService:
+    CACHE_PREFIX = "USER_CACHE_"
+    INVALIDATION_CHANNEL = "USER_CACHE_INVALIDATION"
+    POLL_TIMEOUT = 1.0
+    RECONNECT_DELAY = 1
+
+    def __init__(
+        self,
+        redis: RedisService,
+        max_size: int,
+        ttl: int,
+        use_redis: bool = False,
+        redis_ttl: int = 300,
+    ):
+        """Initialize the user cache service.
+
+        Args:
+            redis (RedisService): The Redis service.
+            max_size (int): Maximum number of users kept per worker.
+            ttl (int): Time to live of in-process entries in seconds.
+            use_redis (bool): Use redis as the second cache tier.
+            redis_ttl (int): Time to live of redis entries in seconds.
+        """
+        self.redis = redis
+        self.use_redis = use_redis
+        self.redis_ttl = redis_ttl
+        self.redis_hits = 0
+        self.redis_misses = 0
+        self._local: TTLCache[str, UserProfileSchema] = TTLCache(
+            max_size=max_size, ttl=ttl
+        )
+        self._listener: asyncio.Task | None = None
+
+    @staticmethod
+    def _local_key(username: str | None = None, user_id: int | None = None) -> str:
+        return f"username:{username}" if username is not None else f"id:{user_id}"
+
+    def _redis_key(
+        self, username: str | None = None, user_id: int | None = None
+    ) -> str:
+        return f"{self.CACHE_PREFIX}{self._local_key(username, user_id)}"
+
+    async def get(
+        self, username: str | None = None, user_id: int | None = None
+    ) -> UserProfileSchema | None:
+        """Get a cached user by username or id.
+
+        Args:
+            username (str | None): The user name.
+            user_id (int | None): The user id.
+
+        Returns:
+            UserProfileSchema | None: A copy of the cached user, None on a miss.
+        """
+        user = self._local.get(self._local_key(username, user_id))
+        if user is None and self.use_redis:
+            data = await self.redis.get(self._redis_key(username, user_id))
+            if data is None:
+                self.redis_misses += 1
+                return None
+            self.redis_hits += 1
+            user = UserProfileSchema.model_validate_json(data)
+            self._set_local(user)
+
+        return user.model_copy() if user is not None else None
+
+    def _set_local(self, user: UserProfileSchema) -> None:
+        self._local.set(self._local_key(username=user.username), user)
+        self._local.set(self._local_key(user_id=user.id), user)
+
+    async def put(self, user: UserSchema | UserProfileSchema) -> None:
+        """Cache a user loaded from the database.
+
+        The password hash is never cached, neither in process nor in redis.
+
+        Args:
+            user (UserSchema | UserProfileSchema): The user.
+        """
+        user = UserProfileSchema.model_validate(user.model_dump(exclude={"password"}))
+        self._set_local(user)
+        if self.use_redis:
+            data = user.model_dump_json()
+            await self.redis.set_many_with_expire(
+                [
+                    (self._redis_key(username=user.username), data, self.redis_ttl),
+                    (self._redis_key(user_id=user.id), data, self.redis_ttl),
+                ]
+            )
+
+    def _drop_local(self, user_id: int | None, usernames: set[str]) -> None:
+        # Adds the cached name of user_id to usernames, it may be the old one.
+        if user_id is not None:
+            cached = self._local.peek(self._local_key(user_id=user_id))
+            if cached is not None:
+                usernames.add(cached.username)
+            self._local.delete(self._local_key(user_id=user_id))
+        for username in usernames:
+            self._local.delete(self._local_key(username=username))
+
+    async def invalidate(
+        self, user_id: int | None = None, username: str | None = None
+    ) -> None:
+        """Drop a changed user from every tier and every worker.
+
+        Args:
+            user_id (int | None): The user id.
+            username (str | None): The user name.
+        """
+        usernames = {username} if username is not None else set()
+        self._drop_local(user_id, usernames)
+
+        if self.use_redis:
+            keys = [self._redis_key(username=name) for name in usernames]
+            if user_id is not None:
+                keys.append(self._redis_key(user_id=user_id))
+                data = await self.redis.get(self._redis_key(user_id=user_id))
+                if data is not None:
+                    keys.append(
+                        self._redis_key(
+                            username=UserProfileSchema.model_validate_json(
+                                data
+                            ).username
+                        )
+                    )
+            if keys:
+                await self.redis.delete_many(keys)
+
+        await self.redis.publish(
+            self.INVALIDATION_CHANNEL,
+            json.dumps({"id": user_id, "usernames": sorted(usernames)}),
+        )
+
+    async def _listen(self) -> None:
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(self.INVALIDATION_CHANNEL)
+                # Invalidations sent while we were not subscribed are lost.
+                self._local.clear()
+                # `listen()` would read with the pool socket timeout and fail
+                # on every idle period.
+                while True:
+                    message = await pubsub.get_message(timeout=self.POLL_TIMEOUT)
+                    if message is None:
+                        continue
+                    data = json.loads(message["data"])
+                    self._drop_local(data["id"], set(data["usernames"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as error:
+                logger.warning(f"User cache invalidation listener failed: {error}")
+                await asyncio.sleep(self.RECONNECT_DELAY)
+            finally:
+                await pubsub.aclose()
+
+    def start(self) -> None:
+        """Start listening for invalidations, called from the app lifespan."""
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        """Stop listening for invalidations, called from the app lifespan."""
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+        self._listener = None
+
+    def stats(self) -> dict[str, int]:
+        """Get the cache counters.
+
+        Returns:
+            dict[str, int]: In-process size, hits and misses and redis tier
+                hits and misses.
+        """
+        local = self._local.stats()
+        return {
+            "size": local["size"],
+            "hits": local["hits"],
+            "misses": local["misses"],
+            "redis_hits": self.redis_hits,
+            "redis_misses": self.redis_misses,
+        }
+
+
+user_cache_service = UserCacheService(
+    redis=redis_service,
+    max_size=settings.USER_CACHE_SIZE,
+    ttl=settings.USER_CACHE_TTL,
+    use_redis=settings.USER_CACHE_REDIS_ENABLED,
+    redis_ttl=settings.USER_CACHE_REDIS_TTL,
+)
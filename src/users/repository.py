@@ -1,13 +1,20 @@
+from sqlalchemy import delete, select, update
 from sqlalchemy.exc import NoResultFound
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from base_repository import BaseRepository
+from base_repository import AsyncBaseRepository
 from security import get_password_hash
+from users.cache import UserCacheService, user_cache_service
 from users.models import User as UserORM
-from users.schemas import UserSchema
+from users.schemas import UserProfileSchema, UserSchema
 
 
-class UserRepository(BaseRepository[UserSchema]):
-    def get(self, user_id: int) -> UserSchema:
+class UserRepository(AsyncBaseRepository[UserSchema]):
+    def __init__(self, db: AsyncSession, cache: UserCacheService = user_cache_service):
+        super().__init__(db=db)
+        self._cache = cache
+
+    async def get(self, user_id: int) -> UserSchema:
         """Get a user by id.
 
         Args:
@@ -19,22 +26,29 @@ class UserRepository(BaseRepository[UserSchema]):
         Raises:
             NoResultFound: If user not found.
         """
-        user = self._db.query(UserORM).filter(UserORM.id == user_id).first()
+        user = await self._db.scalar(select(UserORM).where(UserORM.id == user_id))
 
         if not user:
             raise NoResultFound("User not found")
 
         return UserSchema.model_validate(user)
 
-    def delete(self, user_id: int) -> None:
+    async def delete(self, user_id: int) -> None:
         """Delete a user by id.
 
         Args:
             user_uuid: User id.
         """
-        self._db.query(UserORM).filter(UserORM.id == user_id).delete()
-
-    def update(self, user: UserSchema) -> UserSchema:
+        usernames = (
+            await self._db.scalars(
+                delete(UserORM).where(UserORM.id == user_id).returning(UserORM.username)
+            )
+        ).all()
+        await self._db.commit()
+        for username in usernames:
+            await self._cache.invalidate(user_id=user_id, username=username)
+
+    async def update(self, user: UserSchema) -> UserSchema:
         """Update a user by id.
 
         Args:
@@ -43,19 +57,37 @@ class UserRepository(BaseRepository[UserSchema]):
         Returns:
             User: UserUpdate.
         """
-        self._db.query(UserORM).filter(UserORM.id == user.id).update(
-            values=user.model_dump(exclude_unset=True),
+        await self._db.execute(
+            update(UserORM)
+            .where(UserORM.id == user.id)
+            .values(**user.model_dump(exclude_unset=True))
         )  # noqa: WPS221
-        self._db.commit()
+        await self._db.commit()
+        await self._cache.invalidate(user_id=user.id, username=user.username)
 
-        user = self._db.query(UserORM).filter(UserORM.id == user.id).first()
+        user = await self._db.scalar(select(UserORM).where(UserORM.id == user.id))
 
         if not user:
             raise NoResultFound("User not found")
 
-        return user
+        return UserSchema.model_validate(user)
 
-    def add(self, user: UserSchema) -> UserSchema:
+    async def update_password(self, user_id: int, password: str) -> None:
+        """Replace the password hash of a user.
+
+        Args:
+            user_id: User id.
+            password: Plain password.
+        """
+        await self._db.execute(
+            update(UserORM)
+            .where(UserORM.id == user_id)
+            .values(password=await get_password_hash(password))
+        )
+        await self._db.commit()
+        await self._cache.invalidate(user_id=user_id)
+
+    async def add(self, user: UserSchema) -> UserSchema:
         """Add a user.
 
         Args:
@@ -64,15 +96,17 @@ class UserRepository(BaseRepository[UserSchema]):
         Returns:
             User: User.
         """
-        user.password = get_password_hash(user.password)
+        user.password = await get_password_hash(user.password)
         user = UserORM(**user.model_dump(exclude_unset=True))
         self._db.add(user)
-        self._db.commit()
+        await self._db.commit()
+        await self._db.refresh(user)
+        await self._cache.invalidate(user_id=user.id, username=user.username)
 
         return UserSchema.model_validate(user)
 
-    def find(self, **kwargs) -> UserSchema:
-        """Find a user.
+    async def find(self, **kwargs) -> UserSchema | None:
+        """Find a user with the password hash, bypassing the cache.
 
         Args:
             kwargs: Filters data.
@@ -80,6 +114,35 @@ class UserRepository(BaseRepository[UserSchema]):
         Returns:
             User: User.
         """
-        user_data = self._db.query(UserORM).filter_by(**kwargs).first()
+        user_data = await self._db.scalar(select(UserORM).filter_by(**kwargs).limit(1))
         if user_data:
             return UserSchema.model_validate(user_data)
+        return None
+
+    async def find_profile(
+        self, username: str | None = None, user_id: int | None = None
+    ) -> UserProfileSchema | None:
+        """Find a user by username or id through the cache.
+
+        Args:
+            username: The user name.
+            user_id: The user id.
+
+        Returns:
+            UserProfileSchema | None: The user without the password hash.
+        """
+        cached_user = await self._cache.get(username=username, user_id=user_id)
+        if cached_user is not None:
+            return cached_user
+
+        condition = (
+            UserORM.username == username
+            if username is not None
+            else UserORM.id == user_id
+        )
+        user_data = await self._db.scalar(select(UserORM).where(condition).limit(1))
+        if not user_data:
+            return None
+        user = UserProfileSchema.model_validate(user_data)
+        await self._cache.put(user)
+        return user
@@ -3,7 +3,12 @@ from datetime import timedelta
 from fastapi import APIRouter, Depends, Request, status
 
 from dependencies import get_current_user_by_refresh_token, get_user_repository
-from security import create_access_token, verify_password
+from security import (
+    create_access_token,
+    create_token_pair,
+    password_needs_rehash,
+    verify_password,
+)
 from settings import settings
 from users.exceptions import (
     UserAlreadyExistsHTTPException,
@@ -15,6 +20,7 @@ from users.schemas import (
     LoginSchema,
     RefreshTokenResponse,
     RegisterResponse,
+    UserProfileSchema,
     UserSchema,
 )
 
@@ -28,24 +34,20 @@ async def register(
     user_data: UserSchema,
     user_repository: UserRepository = Depends(get_user_repository),
 ):
-    user = user_repository.find(username=user_data.username)
+    user = await user_repository.find(username=user_data.username)
     print(user, flush=True)
     if user:
         raise UserAlreadyExistsHTTPException(
             f"user with {user_data.username=} already exists"
         )
-    user = user_repository.add(user=user_data)
+    user = await user_repository.add(user=user_data)
+    token_pair = await create_token_pair(
+        username=user.username,
+        delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
+    )
     return RegisterResponse(
-        access=await create_access_token(
-            username=user.username,
-            delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
-            is_refresh=False,
-        ),
-        refresh=await create_access_token(
-            username=user.username,
-            delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
-            is_refresh=True,
-        ),
+        access=token_pair.access_token,
+        refresh=token_pair.refresh_token,
         user_id=user.id,
     )
 
@@ -74,30 +76,31 @@ async def login(  # noqa: WPS217
         OtpRetryError: If new OTP was requested too soon.
     """
     client_ip = request.client and request.client.host
-    user = user_repository.find(username=login_data.username)
+    user = await user_repository.find(username=login_data.username)
     if not user:
         raise WrongCredentialsOrUserNotFoundHTTPException(
             "Could not validate credentials"
         )
 
-    if user.password is None or not verify_password(
+    if user.password is None or not await verify_password(
         plain_password=login_data.password, hashed_password=user.password
     ):
         raise WrongCredentialsOrUserNotFoundHTTPException(
             f"Wrong credentials for user: {login_data.username}, ip: {client_ip}"
         )
 
+    if password_needs_rehash(user.password):
+        await user_repository.update_password(
+            user_id=user.id, password=login_data.password
+        )
+
+    token_pair = await create_token_pair(
+        username=user.username,
+        delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
+    )
     return LoginResponse(
-        access=await create_access_token(
-            username=user.username,
-            delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
-            is_refresh=False,
-        ),
-        refresh=await create_access_token(
-            username=user.username,
-            delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
-            is_refresh=True,
-        ),
+        access=token_pair.access_token,
+        refresh=token_pair.refresh_token,
     )
 
 
@@ -105,7 +108,7 @@ async def login(  # noqa: WPS217
     "/refresh", status_code=status.HTTP_200_OK, response_model=RefreshTokenResponse
 )
 async def refresh_token(
-    user: UserSchema = Depends(get_current_user_by_refresh_token),
+    user: UserProfileSchema = Depends(get_current_user_by_refresh_token),
 ):
     """Refresh access token.
 
@@ -3,10 +3,13 @@ from typing import Optional
 from base_schema import BaseSchema
 
 
-class UserSchema(BaseSchema):
+class UserProfileSchema(BaseSchema):
     id: Optional[int] = None
     username: str
     avatar_url: Optional[str] = None
+
+
+class UserSchema(UserProfileSchema):
     password: str
 
 
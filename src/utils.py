@@ -3,7 +3,7 @@ from enum import StrEnum
 
 from pydantic import BaseModel
 from sqlalchemy import text
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from services.redis import redis_service
 
@@ -20,7 +20,7 @@ class HealthCheckResponse(BaseModel):
     redis: HealthCheckStatus
 
 
-def get_health_check_status_for_database(db: Session) -> HealthCheckStatus:
+async def get_health_check_status_for_database(db: AsyncSession) -> HealthCheckStatus:
     """Get health check status for database.
 
     Args:
@@ -33,7 +33,7 @@ def get_health_check_status_for_database(db: Session) -> HealthCheckStatus:
         Exception: If database health check failed.
     """
     try:
-        db.execute(text("SELECT 1"))
+        await db.execute(text("SELECT 1"))
         return HealthCheckStatus.OK
     except Exception as error:  # pragma: no cover
         logging.debug(f"Database health check failed with error: {error}")
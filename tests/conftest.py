@@ -0,0 +1,21 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# Settings are read at import time, the tests never connect to these hosts.
+for name, value in {
+    "POSTGRES_HOST": "localhost",
+    "POSTGRES_DB": "test",
+    "POSTGRES_USER": "test",
+    "POSTGRES_PASSWORD": "test",
+    "POSTGRES_PORT": "5432",
+    "REDIS_HOST": "localhost",
+    "REDIS_PORT": "6379",
+    "REDIS_DB": "0",
+    "REDIS_PASSWORD": "",
+    "REDIS_SSL": "False",
+    "SECRET_KEY": "test",
+    "METRICS_ENABLED": "False",
+}.items():
+    os.environ.setdefault(name, value)
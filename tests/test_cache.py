@@ -0,0 +1,49 @@
+"""In-process TTL cache."""
+import pytest
+
+from services import cache
+from services.cache import TTLCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_entries_expire_after_their_ttl(clock):
+    evicted = []
+    entries = TTLCache(max_size=10, ttl=5, on_evict=lambda *item: evicted.append(item))
+    entries.set("a", 1)
+    entries.set("b", 2, ttl=60)
+
+    clock[0] += 5
+    assert entries.get("a") is None
+    assert entries.get("b") == 2
+    assert evicted == [("a", 1)]
+    assert entries.stats() == {"size": 1, "hits": 1, "misses": 1}
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    evicted = []
+    entries = TTLCache(max_size=2, ttl=60, on_evict=lambda *item: evicted.append(item))
+    entries.set("a", 1)
+    entries.set("b", 2)
+    entries.get("a")
+    entries.set("c", 3)
+
+    assert evicted == [("b", 2)]
+    assert entries.peek("a") == 1
+    assert entries.peek("b") is None
+    assert len(entries) == 2
+
+
+def test_delete_does_not_call_on_evict(clock):
+    evicted = []
+    entries = TTLCache(max_size=2, ttl=60, on_evict=lambda *item: evicted.append(item))
+    entries.set("a", 1)
+    entries.delete("a")
+
+    assert entries.get("a") is None
+    assert evicted == []
@@ -0,0 +1,24 @@
+"""Split of the Postgres connection budget between workers."""
+import pytest
+
+from database_pool import get_pool_size
+
+
+def test_budget_is_split_between_workers():
+    assert get_pool_size(connection_budget=100, workers=4) == 25
+
+
+def test_reserved_connections_are_left_out():
+    assert get_pool_size(connection_budget=100, workers=4, reserved=10) == 22
+
+
+def test_no_workers_counts_as_one():
+    assert get_pool_size(connection_budget=10, workers=0) == 10
+
+
+@pytest.mark.parametrize(
+    "budget, workers, reserved", [(3, 4, 0), (10, 4, 8), (10, 1, 10)]
+)
+def test_budget_below_one_connection_per_worker_fails(budget, workers, reserved):
+    with pytest.raises(ValueError, match="does not leave a connection"):
+        get_pool_size(connection_budget=budget, workers=workers, reserved=reserved)
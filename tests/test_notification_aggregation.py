@@ -0,0 +1,141 @@
+"""Aggregated notifications and the unread counter, without Postgres.
+
+The session returns what Postgres returns for the upsert, the counters run
+on fakeredis.
+"""
+import asyncio
+from datetime import datetime, timezone
+from typing import NamedTuple
+
+import fakeredis
+from sqlalchemy.dialects import postgresql
+
+from notifications.aggregation import upsert_statement
+from notifications.counters import NotificationCounterService
+from notifications.events import NotificationEventPublisher
+from notifications.repostiory import NotificationRepository
+from notifications.schemas import NotificationSchema
+from services.redis import INCR_IF_EXISTS_SCRIPT, RedisService
+from settings import settings
+
+USER_ID = 1
+NOW = datetime(2026, 10, 18, 12, 0, tzinfo=timezone.utc)
+
+
+class MergedRow(NamedTuple):
+    id: int
+    user_id: int
+    type: str
+    text: str
+    created_at: datetime
+    last_activity_at: datetime
+    target: str
+    actor_count: int
+    last_actors: list[str]
+    is_read: bool
+    inserted: bool
+    was_read: bool
+
+
+class Result:
+    def __init__(self, row=None, rowcount: int = 0):
+        self.row = row
+        self.rowcount = rowcount
+
+    def one(self):
+        return self.row
+
+
+class Session:
+    """Answers the upsert with a merge into a row that had been read."""
+
+    def __init__(self, unread: int):
+        self.unread = unread
+
+    async def execute(self, statement):
+        if statement.is_insert:
+            return Result(
+                MergedRow(
+                    id=1,
+                    user_id=USER_ID,
+                    type="like",
+                    text="bob liked your post",
+                    created_at=NOW,
+                    last_activity_at=NOW,
+                    target="post:1",
+                    actor_count=2,
+                    last_actors=["bob", "alice"],
+                    is_read=False,
+                    inserted=False,
+                    was_read=True,
+                )
+            )
+        # mark_read of the one unread notification.
+        self.unread -= 1
+        return Result(rowcount=1)
+
+    async def scalar(self, statement):
+        return self.unread
+
+    async def commit(self):
+        pass
+
+
+def make_repository(session: Session) -> NotificationRepository:
+    redis = RedisService()
+    redis._redis = fakeredis.FakeAsyncRedis()
+    redis._incr_if_exists_script = redis._redis.register_script(INCR_IF_EXISTS_SCRIPT)
+    return NotificationRepository(
+        db=session,
+        counter=NotificationCounterService(redis),
+        events=NotificationEventPublisher(redis),
+    )
+
+
+def make_like() -> NotificationSchema:
+    return NotificationSchema(
+        user_id=USER_ID,
+        type="like",
+        text="bob liked your post",
+        target="post:1",
+        actor="bob",
+    )
+
+
+def test_previous_read_state_comes_from_the_statement_snapshot():
+    sql = str(upsert_statement(make_like()).compile(dialect=postgresql.dialect()))
+
+    assert "FOR UPDATE" not in sql
+    assert "(SELECT previous.is_read" in sql
+    assert "is_read = false" in sql
+
+
+def test_merge_into_a_read_notification_makes_it_unread_again(monkeypatch):
+    monkeypatch.setattr(settings, "NOTIFICATIONS_AGGREGATION", True)
+
+    async def scenario():
+        repository = make_repository(Session(unread=1))
+        assert await repository.unread_count(USER_ID) == 1
+        assert await repository.mark_read(USER_ID, ids=[1]) == 1
+        assert await repository.unread_count(USER_ID) == 0
+
+        notification = await repository.add(make_like())
+
+        assert notification.actor_count == 2
+        assert await repository.unread_count(USER_ID) == 1
+
+    asyncio.run(scenario())
+
+
+def test_batch_merge_into_a_read_notification_makes_it_unread_again(monkeypatch):
+    monkeypatch.setattr(settings, "NOTIFICATIONS_AGGREGATION", True)
+
+    async def scenario():
+        repository = make_repository(Session(unread=0))
+        assert await repository.unread_count(USER_ID) == 0
+
+        assert await repository.add_many([make_like()]) == 1
+
+        assert await repository.unread_count(USER_ID) == 1
+
+    asyncio.run(scenario())
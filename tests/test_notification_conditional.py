@@ -0,0 +1,25 @@
+"""ETags of the notification list."""
+import pytest
+
+from notifications.conditional import etag_matches, make_etag
+
+ETAG = make_etag(1, 5, None, "cursor", 20, False)
+
+
+def test_etag_changes_with_the_version_and_the_query():
+    assert make_etag(1, 5, None, "cursor", 20, False) == ETAG
+    assert make_etag(1, 6, None, "cursor", 20, False) != ETAG
+    assert make_etag(1, 5, None, "cursor", 50, False) != ETAG
+    assert make_etag(2, 5, None, "cursor", 20, False) != ETAG
+
+
+@pytest.mark.parametrize(
+    "header", [ETAG, f"W/{ETAG}", f'"other", {ETAG}', "*", f" {ETAG} "]
+)
+def test_matching_if_none_match(header):
+    assert etag_matches(header, ETAG)
+
+
+@pytest.mark.parametrize("header", [None, "", '"other"', ETAG.strip('"')])
+def test_stale_if_none_match(header):
+    assert not etag_matches(header, ETAG)
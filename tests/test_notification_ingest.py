@@ -0,0 +1,270 @@
+"""Write-behind ingest stream against fakeredis, without Postgres.
+
+Run from the repository root:
+
+    pip install -r requirements.txt -r tests/requirements.txt
+    pytest tests
+"""
+import asyncio
+
+import fakeredis
+
+from notifications import ingest_worker
+from notifications.ingest import NotificationIngestService
+from notifications.ingest_worker import NotificationIngestWorker
+from notifications.schemas import NotificationSchema
+from services.metrics import INGEST_STREAM_ENTRIES
+from services.redis import RedisService
+
+STREAM = "TEST_INGEST"
+GROUP = "test-writers"
+MAX_DELIVERIES = 3
+
+
+def make_ingest() -> NotificationIngestService:
+    redis = RedisService()
+    redis._redis = fakeredis.FakeAsyncRedis()
+    return NotificationIngestService(
+        redis=redis, stream=STREAM, group=GROUP, maxlen=1000
+    )
+
+
+def make_worker(
+    ingest: NotificationIngestService, consumer: str = "worker"
+) -> NotificationIngestWorker:
+    worker = NotificationIngestWorker(
+        ingest=ingest,
+        consumer=consumer,
+        batch_size=10,
+        block_ms=1,
+        claim_idle_ms=0,
+        max_deliveries=MAX_DELIVERIES,
+    )
+    worker.stored = []
+
+    async def write(notifications: list[NotificationSchema]) -> None:
+        worker.stored.extend(notifications)
+
+    worker._write = write
+    return worker
+
+
+def make_notification(text: str = "hello") -> NotificationSchema:
+    return NotificationSchema(user_id=1, type="like", text=text)
+
+
+async def read(worker: NotificationIngestWorker) -> list:
+    return await worker.redis.xreadgroup(
+        STREAM, GROUP, worker.consumer, count=worker.batch_size, block=1
+    )
+
+
+def test_enqueue_appends_the_notification_payload():
+    async def scenario():
+        ingest = make_ingest()
+        await ingest.enqueue(make_notification("first"))
+
+        client = ingest.redis.client
+        assert await client.xlen(STREAM) == 1
+        [(_, fields)] = await client.xrange(STREAM)
+        payload = NotificationSchema.model_validate_json(fields[b"payload"])
+        assert payload.text == "first"
+        assert payload.user_id == 1
+
+    asyncio.run(scenario())
+
+
+def test_group_read_writes_and_acknowledges_entries():
+    async def scenario():
+        ingest = make_ingest()
+        worker = make_worker(ingest)
+        await worker.redis.xgroup_create(STREAM, GROUP)
+        for index in range(3):
+            await ingest.enqueue(make_notification(f"n{index}"))
+
+        await worker.process(await read(worker))
+
+        assert [item.text for item in worker.stored] == ["n0", "n1", "n2"]
+        assert worker.written == 3
+        assert await ingest.stats() == {"lag": 0, "pending": 0}
+
+    asyncio.run(scenario())
+
+
+def test_failed_entries_stay_pending():
+    async def scenario():
+        ingest = make_ingest()
+        worker = make_worker(ingest)
+        await worker.redis.xgroup_create(STREAM, GROUP)
+        await ingest.enqueue(make_notification("good"))
+        await ingest.enqueue(make_notification("bad"))
+
+        async def write(notifications: list[NotificationSchema]) -> None:
+            if any(item.text == "bad" for item in notifications):
+                raise RuntimeError("insert failed")
+            worker.stored.extend(notifications)
+
+        worker._write = write
+        await worker.process(await read(worker))
+
+        assert [item.text for item in worker.stored] == ["good"]
+        assert (await ingest.stats())["pending"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_reclaim_takes_over_entries_of_a_crashed_consumer():
+    async def scenario():
+        ingest = make_ingest()
+        crashed = make_worker(ingest, consumer="crashed")
+        worker = make_worker(ingest)
+        await worker.redis.xgroup_create(STREAM, GROUP)
+        await ingest.enqueue(make_notification("orphan"))
+        assert len(await read(crashed)) == 1
+
+        # fakeredis does not count deliveries, XPENDING is answered here.
+        async def deliveries(*args, **kwargs) -> dict[bytes, int]:
+            return {}
+
+        worker.redis.xpending_deliveries = deliveries
+        await worker.reclaim()
+
+        assert [item.text for item in worker.stored] == ["orphan"]
+        assert crashed.stored == []
+        assert (await ingest.stats())["pending"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_invalid_payload_is_dead_lettered():
+    async def scenario():
+        ingest = make_ingest()
+        worker = make_worker(ingest)
+        await worker.redis.xgroup_create(STREAM, GROUP)
+        await ingest.redis.xadd(STREAM, {"payload": "not json"})
+
+        await worker.process(await read(worker))
+
+        client = ingest.redis.client
+        [(_, fields)] = await client.xrange(ingest.dead_letter_stream)
+        assert fields[b"payload"] == b"not json"
+        assert fields[b"reason"].startswith(b"invalid payload")
+        assert worker.dead_lettered == 1
+        assert (await ingest.stats())["pending"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_entries_delivered_too_often_are_dead_lettered():
+    async def scenario():
+        ingest = make_ingest()
+        worker = make_worker(ingest)
+        await worker.redis.xgroup_create(STREAM, GROUP)
+        entry_id = await ingest.enqueue(make_notification("poison"))
+        await read(make_worker(ingest, consumer="crashed"))
+
+        async def deliveries(*args, **kwargs) -> dict[bytes, int]:
+            return {entry_id: MAX_DELIVERIES + 1}
+
+        worker.redis.xpending_deliveries = deliveries
+        await worker.reclaim()
+
+        client = ingest.redis.client
+        [(_, fields)] = await client.xrange(ingest.dead_letter_stream)
+        assert fields[b"entry_id"] == entry_id
+        assert fields[b"reason"] == b"too many deliveries"
+        assert worker.stored == []
+        assert (await ingest.stats())["pending"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_trim_keeps_unread_and_pending_entries():
+    async def scenario():
+        ingest = make_ingest()
+        worker = make_worker(ingest)
+        await worker.redis.xgroup_create(STREAM, GROUP)
+        for index in range(5):
+            await ingest.enqueue(make_notification(f"n{index}"))
+        entries = await worker.redis.xreadgroup(
+            STREAM, GROUP, worker.consumer, count=3, block=1
+        )
+        # The first two are written, the third stays pending.
+        await worker.redis.xack(STREAM, GROUP, [entries[0][0], entries[1][0]])
+
+        assert await ingest.trim_acknowledged() == 2
+
+        client = ingest.redis.client
+        remaining = [fields[b"payload"] for _, fields in await client.xrange(STREAM)]
+        texts = [NotificationSchema.model_validate_json(p).text for p in remaining]
+        assert texts == ["n2", "n3", "n4"]
+
+    asyncio.run(scenario())
+
+
+def test_trim_without_group_keeps_the_stream():
+    async def scenario():
+        ingest = make_ingest()
+        await ingest.enqueue(make_notification())
+
+        assert await ingest.trim_acknowledged() == 0
+        assert await ingest.redis.client.xlen(STREAM) == 1
+
+    asyncio.run(scenario())
+
+
+def test_failed_counters_do_not_rewrite_committed_entries(monkeypatch):
+    inserts = []
+
+    class Session:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *args):
+            return False
+
+    class Repository:
+        def __init__(self, db):
+            pass
+
+        async def insert_many(self, notifications):
+            inserts.append([item.text for item in notifications])
+
+        async def publish_changes(self, changes):
+            raise ConnectionError("redis is down")
+
+    monkeypatch.setattr(ingest_worker, "AsyncSessionLocal", Session)
+    monkeypatch.setattr(ingest_worker, "NotificationRepository", Repository)
+
+    async def scenario():
+        ingest = make_ingest()
+        worker = make_worker(ingest)
+        del worker._write
+        await worker.redis.xgroup_create(STREAM, GROUP)
+        for index in range(2):
+            await ingest.enqueue(make_notification(f"n{index}"))
+
+        await worker.process(await read(worker))
+
+        assert inserts == [["n0", "n1"]]
+        assert worker.written == 2
+        assert (await ingest.stats())["pending"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_stats_export_the_lag_gauge():
+    async def scenario():
+        ingest = make_ingest()
+        worker = make_worker(ingest)
+        await worker.redis.xgroup_create(STREAM, GROUP)
+        for index in range(3):
+            await ingest.enqueue(make_notification(f"n{index}"))
+        await worker.redis.xreadgroup(STREAM, GROUP, worker.consumer, count=1, block=1)
+
+        await worker.log_stats()
+
+        assert INGEST_STREAM_ENTRIES.labels("lag")._value.get() == 2
+        assert INGEST_STREAM_ENTRIES.labels("pending")._value.get() == 1
+
+    asyncio.run(scenario())
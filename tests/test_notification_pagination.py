@@ -0,0 +1,120 @@
+"""Keyset cursors of the notification list, without Postgres."""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from notifications.pagination import NotificationCursor, decode_cursor, encode_cursor
+from notifications.repostiory import NotificationRepository
+
+NOW = datetime(2026, 10, 18, 12, 0, tzinfo=timezone.utc)
+
+
+class Row(NamedTuple):
+    id: int
+    user_id: int
+    type: str
+    text: str
+    created_at: datetime
+    last_activity_at: datetime
+    target: str | None
+    actor_count: int
+    last_actors: list[str]
+    is_read: bool
+
+
+class Result:
+    def __init__(self, rows: list[Row]):
+        self.rows = rows
+
+    def all(self) -> list[Row]:
+        return self.rows
+
+
+class Session:
+    def __init__(self, rows: list[Row]):
+        self.rows = rows
+        self.statements: list = []
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        return Result(self.rows)
+
+
+def make_rows(count: int) -> list[Row]:
+    return [
+        Row(
+            id=count - index,
+            user_id=1,
+            type="like",
+            text=f"n{index}",
+            created_at=NOW - timedelta(hours=index),
+            last_activity_at=NOW - timedelta(minutes=index),
+            target=None,
+            actor_count=1,
+            last_actors=[],
+            is_read=False,
+        )
+        for index in range(count)
+    ]
+
+
+def compile_sql(statement) -> str:
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+def test_cursor_round_trip():
+    cursor = NotificationCursor(last_activity_at=NOW, id=42)
+
+    assert decode_cursor(encode_cursor(cursor)) == cursor
+
+
+@pytest.mark.parametrize("cursor", ["", "not a cursor", "bm90fGE"])
+def test_malformed_cursor_raises(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_full_page_returns_the_cursor_of_its_last_row():
+    rows = make_rows(3)
+    session = Session(rows)
+    repository = NotificationRepository(db=session)
+
+    notifications, next_cursor = asyncio.run(
+        repository.find_with_cursor(user_id=1, limit=2)
+    )
+
+    assert [item.text for item in notifications] == ["n0", "n1"]
+    assert next_cursor == NotificationCursor(rows[1].last_activity_at, rows[1].id)
+    sql = compile_sql(session.statements[0])
+    assert "ORDER BY notifications.last_activity_at DESC, notifications.id DESC" in sql
+    assert "LIMIT" in sql
+
+
+def test_last_page_has_no_cursor():
+    session = Session(make_rows(2))
+    repository = NotificationRepository(db=session)
+
+    notifications, next_cursor = asyncio.run(
+        repository.find_with_cursor(user_id=1, limit=2)
+    )
+
+    assert len(notifications) == 2
+    assert next_cursor is None
+
+
+def test_cursor_continues_after_its_position():
+    session = Session([])
+    repository = NotificationRepository(db=session)
+    cursor = NotificationCursor(last_activity_at=NOW, id=7)
+
+    asyncio.run(repository.find_with_cursor(user_id=1, cursor=cursor, unread_only=True))
+
+    sql = compile_sql(session.statements[0])
+    assert (
+        "(notifications.last_activity_at, notifications.id) < "
+        "(%(param_1)s, %(param_2)s)" in sql
+    )
+    assert "notifications.is_read IS false" in sql
@@ -0,0 +1,83 @@
+"""Slow query log and its background EXPLAIN."""
+import asyncio
+
+from services.slow_queries import SlowQueryLog
+
+STATEMENT = "SELECT * FROM notifications WHERE user_id = $1"
+
+
+class Result:
+    def scalar(self):
+        return '[{"Plan": {"Node Type": "Seq Scan"}}]'
+
+
+class Connection:
+    def __init__(self, engine: "ExplainEngine"):
+        self.engine = engine
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    async def execution_options(self, **options):
+        return self
+
+    async def exec_driver_sql(self, statement, parameters):
+        self.engine.explained.append(statement)
+        return Result()
+
+
+class ExplainEngine:
+    def __init__(self):
+        self.explained: list[str] = []
+
+    def connect(self) -> Connection:
+        return Connection(self)
+
+
+def make_log() -> tuple[SlowQueryLog, ExplainEngine]:
+    log = SlowQueryLog(threshold_ms=100, max_records=10, explain_interval=300)
+    engine = ExplainEngine()
+    log._explain_engine = engine
+    return log, engine
+
+
+def test_slow_statement_is_explained_in_the_background():
+    async def scenario():
+        log, engine = make_log()
+        log.record(STATEMENT, (1,), duration=0.5, many=False)
+
+        # The request goes on before the plan is captured.
+        assert engine.explained == []
+        await asyncio.gather(*log._explaining)
+
+        assert engine.explained == [f"EXPLAIN (ANALYZE off, FORMAT JSON) {STATEMENT}"]
+        [record] = log.records()
+        assert record["plan"] == [{"Plan": {"Node Type": "Seq Scan"}}]
+        assert record["parameters"] == [1]
+
+    asyncio.run(scenario())
+
+
+def test_fingerprint_is_explained_once_per_interval():
+    async def scenario():
+        log, engine = make_log()
+        log.record(STATEMENT, (1,), duration=0.5, many=False)
+        await asyncio.gather(*log._explaining)
+        log.record(STATEMENT.replace("$1", "$2"), (2,), duration=0.5, many=False)
+        await asyncio.gather(*log._explaining)
+
+        assert len(engine.explained) == 1
+        assert len(log.records()) == 2
+
+    asyncio.run(scenario())
+
+
+def test_without_explain_engine_only_records():
+    log = SlowQueryLog(threshold_ms=100, max_records=10)
+    log.record(STATEMENT, (1,), duration=0.5, many=False)
+
+    assert log.records()[0]["plan"] is None
+    assert not log._explaining
@@ -0,0 +1,36 @@
+"""SQL fingerprints shared by the metrics and the slow query log."""
+from services.sql import fingerprint_sql
+
+
+def test_arguments_do_not_change_the_fingerprint():
+    first = fingerprint_sql("SELECT * FROM users WHERE id = 1 AND name = 'a'")
+    second = fingerprint_sql("SELECT *  FROM users\nWHERE id = 22 AND name = 'it''s'")
+
+    assert first == second
+    assert first.normalized == "SELECT * FROM users WHERE id = ? AND name = ?"
+    assert first.operation == "SELECT"
+    assert first.table == "users"
+
+
+def test_bind_parameters_and_lists_collapse():
+    fingerprint = fingerprint_sql(
+        "INSERT INTO notifications (user_id, text) VALUES ($1, $2), ($3, $4)"
+    )
+    single = fingerprint_sql(
+        "INSERT INTO notifications (user_id, text) VALUES (%(user_id)s, %(text)s)"
+    )
+
+    assert fingerprint.normalized == (
+        "INSERT INTO notifications (user_id, text) VALUES (...)"
+    )
+    assert fingerprint.id == single.id
+    assert fingerprint.operation == "INSERT"
+    assert fingerprint.table == "notifications"
+
+
+def test_in_lists_of_any_length_share_a_fingerprint():
+    short = fingerprint_sql("DELETE FROM notifications WHERE id IN ($1)")
+    long = fingerprint_sql("DELETE FROM notifications WHERE id IN ($1, $2, $3)")
+
+    assert short.id == long.id
+    assert short.operation == "DELETE"